@@ -1,37 +1,32 @@
 BEGIN;
 
-CREATE INDEX data_recording ON recording (data);
+-- Covers the recording_json -> recording joins of the clustering queries, so that they
+-- can be answered with index only scans.
+CREATE INDEX data_ndx_recording ON recording (data, gid, artist, release);
 
 CREATE UNIQUE INDEX data_sha256_ndx_recording_json ON recording_json (data_sha256);
 CREATE INDEX meta_sha256_ndx_recording_json ON recording_json (meta_sha256);
-CREATE UNIQUE INDEX gid_ndx_recording ON recording (gid);
 
-CREATE INDEX gid_ndx_recording_cluster ON recording_cluster (recording_gid);
-CREATE INDEX cluster_id_ndx_recording_cluster ON recording_cluster (cluster_id);
+-- Lookups by cluster_id use the indexes of the (cluster_id, *_gid) unique constraints.
+CREATE INDEX gid_ndx_recording_cluster ON recording_cluster (recording_gid, cluster_id);
+CREATE INDEX gid_ndx_artist_credit_cluster ON artist_credit_cluster (artist_credit_gid, cluster_id);
+CREATE INDEX gid_ndx_release_cluster ON release_cluster (release_gid, cluster_id);
 
-CREATE INDEX gid_ndx_artist_credit_cluster ON artist_credit_cluster (artist_credit_gid);
-CREATE INDEX cluster_id_ndx_artist_credit_cluster ON artist_credit_cluster (cluster_id);
-
-CREATE INDEX gid_ndx_release_cluster ON release_cluster (release_gid);
-CREATE INDEX cluster_id_ndx_release_cluster ON release_cluster (cluster_id);
-
-CREATE INDEX name_ndx_artist_credit ON artist_credit (name);
-CREATE INDEX title_ndx_release ON release (title);
+CREATE UNIQUE INDEX name_sha256_ndx_artist_credit ON artist_credit (name_sha256);
+CREATE UNIQUE INDEX title_sha256_ndx_release ON release (title_sha256);
 
 CREATE INDEX recording_mbid_ndx_recording_artist_join ON recording_artist_join (recording_mbid);
 CREATE INDEX artsit_mbids_ndx_recording_artist_join ON recording_artist_join (artist_mbids);
 
+-- Lookups by recording_redirect.recording_cluster_id, release_redirect.release_cluster_id
+-- and artist_credit_redirect.artist_mbids use the indexes of their unique constraints.
 CREATE INDEX recording_mbid_ndx_recording_redirect ON recording_redirect (recording_mbid);
-CREATE INDEX artist_mbids_array_ndx_artist_credit_redirect ON artist_credit_redirect (artist_mbids);
 CREATE INDEX release_mbid_ndx_recording_redirect ON release_redirect (release_mbid);
-
-CREATE INDEX recording_cluster_id_ndx_recording_redirect ON recording_redirect (recording_cluster_id);
 CREATE INDEX artist_credit_cluster_id_ndx_artist_credit_redirect ON artist_credit_redirect (artist_credit_cluster_id);
-CREATE INDEX release_cluster_id_ndx_recording_redirect ON release_redirect (release_cluster_id);
 
-CREATE INDEX recording_mbid_ndx_recording_json ON recording_json ((data ->> 'recording_mbid'));
-CREATE INDEX artist_mbid_ndx_recording_json ON recording_json ((data ->> 'artist_mbids'));
-CREATE INDEX release_mbid_ndx_recording_json ON recording_json ((data ->> 'release_mbid'));
+-- Most submissions have no MBIDs and are never looked up by them, so they are left out.
+CREATE INDEX recording_mbid_ndx_recording_json ON recording_json ((data ->> 'recording_mbid')) WHERE (data ->> 'recording_mbid') IS NOT NULL;
+CREATE INDEX release_mbid_ndx_recording_json ON recording_json ((data ->> 'release_mbid')) WHERE (data ->> 'release_mbid') IS NOT NULL;
 CREATE INDEX artist_mbid_array_ndx_recording_json ON recording_json (convert_json_array_to_sorted_uuid_array((data -> 'artist_mbids')));
 
 CREATE INDEX artist_ndx_recording ON recording (artist);
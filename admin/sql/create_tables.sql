@@ -4,9 +4,10 @@ BEGIN;
 -- represent more than 1 musicbrainz id. These are linked in the
 -- artist_redirect table.
 CREATE TABLE artist_credit (
-  gid  UUID NOT NULL,
-  name TEXT NOT NULL,
-  submitted  TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+  gid         UUID  NOT NULL,
+  name        TEXT  NOT NULL,
+  name_sha256 BYTEA NOT NULL, -- sha256 digest of name, Unique
+  submitted   TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 CREATE TABLE artist_credit_cluster (
@@ -23,12 +24,18 @@ CREATE TABLE artist_credit_redirect (
 ALTER TABLE artist_credit_redirect ADD CONSTRAINT artist_credit_redirect_artist_mbids_uniq UNIQUE (artist_mbids);
 
 CREATE TABLE recording (
-  id         SERIAL,
-  gid        UUID    NOT NULL,
-  data       INTEGER NOT NULL, -- FK to recording_json.id
-  artist     UUID    NOT NULL, -- FK to artist_credit.gid
-  release    UUID,             -- FK to release.gid
-  submitted  TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+  id             SERIAL,
+  gid            UUID    NOT NULL,
+  data           INTEGER NOT NULL, -- FK to recording_json.id
+  artist         UUID    NOT NULL, -- FK to artist_credit.gid
+  release        UUID,             -- FK to release.gid
+  submitted      TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  -- The MBIDs that the clusters of the recording, its artist credit and its release
+  -- redirect to, denormalized by data.update_resolved_mbids after each clustering run
+  -- (NULL if a cluster redirects to more than one MBID).
+  recording_mbid UUID,
+  artist_mbids   UUID[],
+  release_mbid   UUID
 );
 
 CREATE TABLE recording_artist_join (
@@ -47,8 +54,8 @@ ALTER TABLE recording_cluster ADD CONSTRAINT recording_cluster_uniq UNIQUE (clus
 CREATE TABLE recording_json (
   id          SERIAL,
   data        JSONB    NOT NULL,
-  data_sha256 CHAR(64) NOT NULL,
-  meta_sha256 CHAR(64) NOT NULL
+  data_sha256 BYTEA    NOT NULL, -- sha256 digest of the lowercased data, Unique
+  meta_sha256 BYTEA    NOT NULL  -- sha256 digest of the lowercased artist and title
 );
 
 CREATE TABLE recording_redirect (
@@ -65,9 +72,10 @@ CREATE TABLE recording_release_join (
 );
 
 CREATE TABLE release (
-  gid   UUID NOT NULL,
-  title TEXT NOT NULL,
-  submitted  TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+  gid          UUID  NOT NULL,
+  title        TEXT  NOT NULL,
+  title_sha256 BYTEA NOT NULL, -- sha256 digest of title, Unique
+  submitted    TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 CREATE TABLE release_cluster (
@@ -0,0 +1,68 @@
+-- Adds a unique sha256 digest of the name of artist credits and the title of
+-- releases, which is used instead of the names to look them up and to upsert them.
+--
+-- Artist credits and releases which were added more than once with the same name
+-- are collapsed into the oldest one. The clusters of artist credits and releases
+-- refer to the removed MSIDs, so they are truncated by this script and must be
+-- recreated with the clustering commands of manage.py afterwards.
+--
+-- pgcrypto is needed to compute the digests, so this must be run as a superuser.
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+BEGIN;
+
+-- artist_credit
+ALTER TABLE artist_credit ADD COLUMN name_sha256 BYTEA;
+UPDATE artist_credit SET name_sha256 = digest(name, 'sha256');
+
+CREATE TEMPORARY TABLE artist_credit_duplicate ON COMMIT DROP AS
+    SELECT gid, kept_gid
+      FROM (SELECT gid
+                 , first_value(gid) OVER (PARTITION BY name_sha256 ORDER BY submitted, gid) AS kept_gid
+              FROM artist_credit) AS ac
+     WHERE gid != kept_gid;
+
+UPDATE recording
+   SET artist = acd.kept_gid
+  FROM artist_credit_duplicate AS acd
+ WHERE recording.artist = acd.gid;
+
+DELETE FROM artist_credit
+      USING artist_credit_duplicate AS acd
+      WHERE artist_credit.gid = acd.gid;
+
+ALTER TABLE artist_credit ALTER COLUMN name_sha256 SET NOT NULL;
+DROP INDEX IF EXISTS name_ndx_artist_credit;
+CREATE UNIQUE INDEX name_sha256_ndx_artist_credit ON artist_credit (name_sha256);
+
+-- release
+ALTER TABLE release ADD COLUMN title_sha256 BYTEA;
+UPDATE release SET title_sha256 = digest(title, 'sha256');
+
+CREATE TEMPORARY TABLE release_duplicate ON COMMIT DROP AS
+    SELECT gid, kept_gid
+      FROM (SELECT gid
+                 , first_value(gid) OVER (PARTITION BY title_sha256 ORDER BY submitted, gid) AS kept_gid
+              FROM release) AS rel
+     WHERE gid != kept_gid;
+
+UPDATE recording
+   SET release = reld.kept_gid
+  FROM release_duplicate AS reld
+ WHERE recording.release = reld.gid;
+
+DELETE FROM release
+      USING release_duplicate AS reld
+      WHERE release.gid = reld.gid;
+
+ALTER TABLE release ALTER COLUMN title_sha256 SET NOT NULL;
+DROP INDEX IF EXISTS title_ndx_release;
+CREATE UNIQUE INDEX title_sha256_ndx_release ON release (title_sha256);
+
+TRUNCATE TABLE artist_credit_cluster;
+TRUNCATE TABLE artist_credit_redirect;
+TRUNCATE TABLE release_cluster;
+TRUNCATE TABLE release_redirect;
+
+COMMIT;
@@ -0,0 +1,59 @@
+-- Stores the MBIDs that the clusters of each recording, its artist credit and
+-- its release redirect to in the recording table, so that loading a recording
+-- doesn't have to join the cluster and redirect tables. The columns are filled
+-- in at the end of each clustering command, or right away with the UPDATE below
+-- (the same as messybrainz.db.data.update_resolved_mbids).
+BEGIN;
+
+SET search_path TO public;
+
+ALTER TABLE recording ADD COLUMN recording_mbid UUID;
+ALTER TABLE recording ADD COLUMN artist_mbids   UUID[];
+ALTER TABLE recording ADD COLUMN release_mbid   UUID;
+
+-- A cluster which redirects to more than one MBID is ambiguous, its recordings store NULL
+UPDATE recording r
+   SET recording_mbid = resolved.recording_mbid
+  FROM (SELECT rc.recording_gid
+             , CASE WHEN count(DISTINCT rr.recording_mbid) = 1
+                    THEN (array_agg(rr.recording_mbid))[1]
+                END AS recording_mbid
+          FROM recording_cluster rc
+          JOIN recording_redirect rr
+            ON rr.recording_cluster_id = rc.cluster_id
+      GROUP BY rc.recording_gid
+       ) resolved
+ WHERE r.gid = resolved.recording_gid
+   AND resolved.recording_mbid IS NOT NULL;
+
+UPDATE recording r
+   SET artist_mbids = resolved.artist_mbids
+  FROM (SELECT acc.artist_credit_gid
+             , CASE WHEN count(DISTINCT acr.artist_mbids) = 1
+                    THEN min(acr.artist_mbids)
+                END AS artist_mbids
+          FROM artist_credit_cluster acc
+          JOIN artist_credit_redirect acr
+            ON acr.artist_credit_cluster_id = acc.cluster_id
+      GROUP BY acc.artist_credit_gid
+       ) resolved
+ WHERE r.artist = resolved.artist_credit_gid
+   AND resolved.artist_mbids IS NOT NULL;
+
+UPDATE recording r
+   SET release_mbid = resolved.release_mbid
+  FROM (SELECT relc.release_gid
+             , CASE WHEN count(DISTINCT relr.release_mbid) = 1
+                    THEN (array_agg(relr.release_mbid))[1]
+                END AS release_mbid
+          FROM release_cluster relc
+          JOIN release_redirect relr
+            ON relr.release_cluster_id = relc.cluster_id
+      GROUP BY relc.release_gid
+       ) resolved
+ WHERE r.release = resolved.release_gid
+   AND resolved.release_mbid IS NOT NULL;
+
+COMMIT;
+
+VACUUM ANALYZE recording;
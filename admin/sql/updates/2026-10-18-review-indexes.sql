@@ -0,0 +1,39 @@
+-- Removes the indexes which duplicate a unique constraint or are never used,
+-- makes the recording_json MBID indexes partial and makes the indexes used
+-- by the clustering joins covering. See admin/sql/create_indexes.sql.
+BEGIN;
+
+SET search_path TO public;
+
+-- Duplicates of unique constraints
+DROP INDEX IF EXISTS gid_ndx_recording;
+DROP INDEX IF EXISTS cluster_id_ndx_recording_cluster;
+DROP INDEX IF EXISTS cluster_id_ndx_artist_credit_cluster;
+DROP INDEX IF EXISTS cluster_id_ndx_release_cluster;
+DROP INDEX IF EXISTS recording_cluster_id_ndx_recording_redirect;
+DROP INDEX IF EXISTS release_cluster_id_ndx_recording_redirect;
+DROP INDEX IF EXISTS artist_mbids_array_ndx_artist_credit_redirect;
+
+-- No query compares the text of the artist_mbids array
+DROP INDEX IF EXISTS artist_mbid_ndx_recording_json;
+
+DROP INDEX IF EXISTS data_recording;
+CREATE INDEX data_ndx_recording ON recording (data, gid, artist, release);
+
+DROP INDEX IF EXISTS gid_ndx_recording_cluster;
+DROP INDEX IF EXISTS gid_ndx_artist_credit_cluster;
+DROP INDEX IF EXISTS gid_ndx_release_cluster;
+CREATE INDEX gid_ndx_recording_cluster ON recording_cluster (recording_gid, cluster_id);
+CREATE INDEX gid_ndx_artist_credit_cluster ON artist_credit_cluster (artist_credit_gid, cluster_id);
+CREATE INDEX gid_ndx_release_cluster ON release_cluster (release_gid, cluster_id);
+
+DROP INDEX IF EXISTS recording_mbid_ndx_recording_json;
+DROP INDEX IF EXISTS release_mbid_ndx_recording_json;
+CREATE INDEX recording_mbid_ndx_recording_json ON recording_json ((data ->> 'recording_mbid')) WHERE (data ->> 'recording_mbid') IS NOT NULL;
+CREATE INDEX release_mbid_ndx_recording_json ON recording_json ((data ->> 'release_mbid')) WHERE (data ->> 'release_mbid') IS NOT NULL;
+
+COMMIT;
+
+-- Index only scans need an up to date visibility map
+VACUUM ANALYZE recording;
+VACUUM ANALYZE recording_json;
@@ -0,0 +1,15 @@
+-- Stores the data and meta hashes of recording_json as raw 32 byte sha256
+-- digests instead of 64 character hex strings, which halves the size of
+-- their indexes. ALTER COLUMN ... TYPE rewrites the table and rebuilds
+-- data_sha256_ndx_recording_json and meta_sha256_ndx_recording_json.
+BEGIN;
+
+SET search_path TO public;
+
+ALTER TABLE recording_json
+  ALTER COLUMN data_sha256 SET DATA TYPE BYTEA USING decode(data_sha256, 'hex'),
+  ALTER COLUMN meta_sha256 SET DATA TYPE BYTEA USING decode(meta_sha256, 'hex');
+
+COMMIT;
+
+ANALYZE recording_json;
@@ -1,15 +1,6 @@
 from messybrainz import db
-from messybrainz.db.artist import truncate_recording_artist_join,\
-                                fetch_and_store_artist_mbids_for_all_recording_mbids,\
-                                create_artist_credit_clusters,\
-                                truncate_artist_credit_cluster_and_redirect_tables
-from messybrainz.db import artist
-from messybrainz.db import release
-from messybrainz.webserver import create_app
-from brainzutils import musicbrainz_db
-from sqlalchemy import text
-
-import subprocess
+
+import functools
 import os
 import click
 import logging
@@ -19,15 +10,40 @@ try:
     import messybraiz.custom_config as config
 except ImportError:
     pass
-from messybrainz.db.recording import create_recording_clusters,\
-                                    truncate_recording_cluster_and_recording_redirect_table
 
+# The modules used by the commands are imported in the commands themselves, so
+# that starting manage.py only imports what the command which is run needs.
 
 ADMIN_SQL_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'admin', 'sql')
 
 cli = click.Group()
 
 
+def profile_queries(f):
+    """Adds options to a command to profile the queries it executes and
+       print a summary of the slowest ones once it is done.
+    """
+
+    @click.option("--profile-queries", is_flag=True, help="Print a summary of the queries which took the most time.")
+    @click.option("--slow-query-ms", type=float, default=None, help="Log queries slower than this many milliseconds.")
+    @functools.wraps(f)
+    def decorated(*args, profile_queries=False, slow_query_ms=None, **kwargs):
+        if not profile_queries and slow_query_ms is None:
+            return f(*args, **kwargs)
+
+        from messybrainz.db import profiling
+
+        profiling.enable(slow_query_threshold=slow_query_ms)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            profiling.disable()
+            if profile_queries:
+                print(profiling.format_summary())
+
+    return decorated
+
+
 @cli.command()
 @click.option("--host", "-h", default="0.0.0.0", show_default=True)
 @click.option("--port", "-p", default=8080, show_default=True)
@@ -35,6 +51,7 @@ cli = click.Group()
               help="Turns debugging mode on or off. If specified, overrides "
                    "'DEBUG' value in the config file.")
 def runserver(host, port, debug=False):
+    from messybrainz.webserver import create_app
     create_app(debug=debug).run(host=host, port=port)
 
 
@@ -62,6 +79,7 @@ def init_db(force):
     print('Creating database extensions...')
     exit_code = db.run_sql_script_without_transaction(os.path.join(ADMIN_SQL_DIR, 'create_extensions.sql'))
 
+    from messybrainz.webserver import create_app
     app = create_app()
     with app.app_context():
         print('Creating tables...')
@@ -115,10 +133,13 @@ def init_test_db(force=False):
 
 
 @cli.command()
+@profile_queries
 def create_recording_clusters_for_mbids():
     """Creates clusters for recording using recording MBIDs present in 
        recording_json table.
     """
+    from messybrainz.db.recording import create_recording_clusters
+
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
     try:
         clusters_modified, clusters_add_to_redirect = create_recording_clusters()
@@ -133,6 +154,8 @@ def create_recording_clusters_for_mbids():
 @cli.command()
 def truncate_recording_cluster_and_redirect():
     """Truncate recording_cluster and recording_redirect tables."""
+    from messybrainz.db.recording import truncate_recording_cluster_and_recording_redirect_table
+
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
     try:
         truncate_recording_cluster_and_recording_redirect_table()
@@ -150,6 +173,8 @@ def fetch_and_store_artist_mbids():
         table. In the end it prints to the console the total recording MBIDs it processed
         and the total recording MBIDs it added to the recording_artist_join table.
     """
+    from brainzutils import musicbrainz_db
+    from messybrainz.db.artist import fetch_and_store_artist_mbids_for_all_recording_mbids
 
     # Init databases
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
@@ -168,6 +193,8 @@ def fetch_and_store_artist_mbids():
 @cli.command()
 def truncate_recording_artist_join_table():
     """Truncate table recording_artist_join."""
+    from messybrainz.db.artist import truncate_recording_artist_join
+
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
     try:
         truncate_recording_artist_join()
@@ -178,11 +205,13 @@ def truncate_recording_artist_join_table():
 
 
 @cli.command()
+@profile_queries
 @click.option("--verbose", "-v", default='WARNING', help="Print debug information for given verbose level(WARNING, INFO, DEBUG).")
 def create_artist_credit_clusters_for_mbids(verbose='WARNING'):
     """Creates clusters for artist_credits using artist MBIDs present in
        recording_json table.
     """
+    from messybrainz.db.artist import create_artist_credit_clusters
 
     try:
         if verbose == 'INFO':
@@ -207,11 +236,13 @@ def create_artist_credit_clusters_for_mbids(verbose='WARNING'):
 
 
 @cli.command()
+@profile_queries
 @click.option("--verbose", "-v", default=0, help="Print debug information for given verbose level(0,1,2).")
 def create_release_clusters_for_mbids(verbose=0):
     """Creates clusters for release using release MBIDs present in
        recording_json table.
     """
+    from messybrainz.db import release
 
     if verbose == 1:
         logging.basicConfig(format='%(message)s', level=logging.INFO)
@@ -236,6 +267,7 @@ def create_release_clusters_for_mbids(verbose=0):
 @cli.command()
 def truncate_artist_credit_cluster_and_redirect():
     """Truncate artist_credit_cluster and artist_credit_redirect table."""
+    from messybrainz.db.artist import truncate_artist_credit_cluster_and_redirect_tables
 
     logging.basicConfig(format='%(message)s', level=logging.INFO)
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
@@ -253,6 +285,8 @@ def truncate_artist_credit_cluster_and_redirect():
 @cli.command()
 def truncate_release_cluster_and_redirect():
     """Truncate release_cluster and release_redirect tables."""
+    from messybrainz.db import release
+
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
     try:
         release.truncate_release_cluster_and_release_redirect_table()
@@ -271,6 +305,8 @@ def fetch_and_store_releases(verbose=False):
         table. In the end it prints to the console the total recording MBIDs it processed
         and the total recording MBIDs it added to the recording_release_join table.
     """
+    from brainzutils import musicbrainz_db
+    from messybrainz.db import release
 
     print("Fetching release for recording MBIDs...")
     if verbose:
@@ -295,6 +331,8 @@ def fetch_and_store_releases(verbose=False):
 @cli.command()
 def truncate_recording_release_join_table():
     """Truncate table recording_release_join."""
+    from messybrainz.db import release
+
     db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
     try:
         release.truncate_recording_release_join()
@@ -305,11 +343,13 @@ def truncate_recording_release_join_table():
 
 
 @cli.command()
+@profile_queries
 @click.option("--verbose", "-v", default="WARNING", help="Print debug information for given verbose level(WARNING, INFO, DEBUG).")
 def create_clusters_using_fetched_artist_mbids(verbose="WARNING"):
     """Creates clusters for artist_credits using artist MBIDs fetched from MusicBrainz
        database and stored in recording_artist_join table.
     """
+    from messybrainz.db import artist
 
     try:
         if verbose == "INFO":
@@ -332,5 +372,147 @@ def create_clusters_using_fetched_artist_mbids(verbose="WARNING"):
         print("While creating artist_credit clusters using fetched artist MBIDs. An error occured: {0}".format(error))
 
 
+@cli.command()
+@click.option("--batch-size", "-b", default=1000, show_default=True, help="Number of queued listens inserted per transaction.")
+def run_submit_writer(batch_size):
+    """Inserts the listens queued by /submit when ASYNC_SUBMIT is enabled. Only one
+       writer must be run at a time.
+    """
+    from messybrainz import submit_queue
+    from messybrainz.db import data
+
+    logging.basicConfig(format='%(asctime)s %(message)s', level=logging.INFO)
+    db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
+    data.set_deterministic_msids(config.DETERMINISTIC_MSIDS)
+    submit_queue.init_redis_connection(config.REDIS_HOST, config.REDIS_PORT, config.SUBMIT_QUEUE_KEY)
+    print("Writing queued listens...")
+    submit_queue.run_writer(batch_size=batch_size)
+
+
+@cli.command()
+@click.argument("input", type=click.File("r"))
+@click.option("--output", "-o", type=click.File("w"), default="-", help="File to write the JSON lines results to.")
+@click.option("--batch-size", "-b", default=1000, show_default=True, help="Number of artist and title pairs looked up per query.")
+def lookup_meta_msids(input, output, batch_size):
+    """Finds the MessyBrainz IDs of all the recordings with the same artist and
+       title (ignoring case) for each JSON object with artist and title keys in
+       the JSON lines INPUT file. Lines which aren't such an object are skipped
+       and reported on stderr.
+    """
+    import json
+    from messybrainz.db import data
+
+    db.init_db_engine(config.SQLALCHEMY_DATABASE_URI)
+
+    def lookup(batch):
+        with db.engine.connect() as connection:
+            ids = data.get_ids_from_meta_sha256s(connection, {meta_sha256 for meta_sha256, _ in batch})
+        for meta_sha256, line in batch:
+            output.write(json.dumps({
+                "artist": line["artist"],
+                "title": line["title"],
+                "meta_sha256": meta_sha256,
+                "recording_msids": ids.get(meta_sha256, []),
+            }) + "\n")
+
+    batch = []
+    skipped = 0
+    for line_number, line in enumerate(input, start=1):
+        if not line.strip():
+            continue
+        try:
+            line = json.loads(line)
+        except ValueError as e:
+            line = e
+        if not isinstance(line, dict) or "artist" not in line or "title" not in line:
+            click.echo("Skipping line {0}: not a JSON object with artist and title keys".format(line_number), err=True)
+            skipped += 1
+            continue
+        batch.append((data.get_meta_sha256(line), line))
+        if len(batch) == batch_size:
+            lookup(batch)
+            batch = []
+    if batch:
+        lookup(batch)
+    if skipped:
+        click.echo("Skipped {0} lines".format(skipped), err=True)
+
+
+@cli.command()
+@click.option("--sizes", "-s", default="10000,100000,1000000", show_default=True,
+              help="Comma separated numbers of listens to run the benchmarks with.")
+@click.option("--batch-size", "-b", default=100, show_default=True, help="Number of listens per submission.")
+@click.option("--lookups", default=1000, show_default=True, help="Number of recordings loaded by the lookup benchmark.")
+@click.option("--seed", default=0, show_default=True, help="Seed of the synthetic listens generator.")
+@click.option("--mbid-coverage", default=0.5, show_default=True, help="Fraction of listens with MusicBrainz IDs.")
+@click.option("--output", "-o", type=click.File("w"), default="-", help="File to write the JSON lines results to.")
+def run_benchmarks(sizes, batch_size, lookups, seed, mbid_coverage, output):
+    """Benchmarks submitting, loading and clustering synthetic listens.
+
+    WARNING: The database in the config file is dropped and recreated for each size.
+    """
+    from messybrainz.benchmarks import db as benchmarks
+
+    sizes = [int(size) for size in sizes.split(",")]
+    benchmarks.run(sizes, batch_size=batch_size, lookups=lookups, seed=seed,
+                   mbid_coverage=mbid_coverage, output=output)
+
+
+@cli.command()
+@click.option("--iterations", "-n", default=10000, show_default=True, help="Number of requests timed by each benchmark.")
+@click.option("--output", "-o", type=click.File("w"), default="-", help="File to write the JSON lines results to.")
+def run_webserver_benchmarks(iterations, output):
+    """Benchmarks the per-request overhead of the webserver decorators."""
+    from messybrainz.benchmarks import webserver as benchmarks
+    from messybrainz.webserver import create_app
+
+    benchmarks.run(create_app(), iterations=iterations, output=output)
+
+
+@cli.command()
+@click.option("--repeat", "-r", default=5, show_default=True, help="Number of runs of each process, the fastest is reported.")
+@click.option("--workers", "-w", default=4, show_default=True, help="Number of workers forked by the memory benchmark.")
+@click.option("--requests", default=100, show_default=True, help="Number of requests handled by each worker.")
+@click.option("--output", "-o", type=click.File("w"), default="-", help="File to write the JSON lines results to.")
+def run_startup_benchmarks(repeat, workers, requests, output):
+    """Benchmarks the startup time of every manage.py command and of the WSGI app,
+       and the memory of workers forked from the app with and without warmup.
+    """
+    from messybrainz.benchmarks import startup as benchmarks
+
+    benchmarks.run(sorted(cli.commands), repeat=repeat, workers=workers, requests=requests, output=output)
+
+
+@cli.command()
+@click.option("--url", "-u", default=None, help="URL of a running server. If not given, requests are "
+                                               "sent to an in process app through the Flask test client.")
+@click.option("--listens", "-n", default=10000, show_default=True, help="Number of listens to submit.")
+@click.option("--batch-size", "-b", default=100, show_default=True, help="Number of listens per submission.")
+@click.option("--lookups", default=1000, show_default=True, help="Number of GET requests for submitted MSIDs.")
+@click.option("--concurrency", "-c", default=4, show_default=True, help="Number of concurrent clients.")
+@click.option("--seed", default=0, show_default=True, help="Seed of the synthetic listens generator.")
+@click.option("--mbid-coverage", default=0.5, show_default=True, help="Fraction of listens with MusicBrainz IDs.")
+@click.option("--edge-case-ratio", default=0.01, show_default=True,
+              help="Fraction of listens with unusual unicode characters in their names.")
+@click.option("--nul", is_flag=True, help="Also use the NUL character as an edge case, those listens are rejected.")
+@click.option("--ids-only", is_flag=True, help="Don't echo the submitted data back in the /submit responses.")
+def load_test(url, listens, batch_size, lookups, concurrency, seed, mbid_coverage, edge_case_ratio, nul, ids_only):
+    """Replays synthetic listens against /submit and GET /<msid> and prints
+       the throughput and latency percentiles as JSON.
+    """
+    import json
+    from messybrainz.benchmarks import load
+    from messybrainz.webserver import create_app
+
+    if url:
+        target = load.HTTPTarget(url)
+    else:
+        target = load.TestClientTarget(create_app())
+    summaries = load.run(target, listens=listens, batch_size=batch_size, lookups=lookups,
+                         concurrency=concurrency, seed=seed, mbid_coverage=mbid_coverage,
+                         edge_case_ratio=edge_case_ratio, nul=nul, ids_only=ids_only)
+    for summary in summaries:
+        print(json.dumps(summary, sort_keys=True))
+
 if __name__ == '__main__':
     cli()
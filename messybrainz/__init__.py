@@ -1,25 +1,56 @@
 from messybrainz.db import exceptions
+import math
 import sqlalchemy.exc
 from messybrainz.db import data
 
 from messybrainz import db
+from messybrainz import metrics
 
-def submit_listens_and_sing_me_a_sweet_song(recordings):
+def _validate_values(value):
+    """ Raises BadDataException if the value contains something that PostgreSQL
+        can't store as JSONB: NUL characters or non finite numbers.
+    """
+    if isinstance(value, str):
+        if "\u0000" in value:
+            raise exceptions.BadDataException("Submissions must not contain NUL characters")
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            raise exceptions.BadDataException("Submissions must not contain NaN or Infinity")
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _validate_values(key)
+            _validate_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            _validate_values(item)
 
+
+def validate_recordings(recordings):
+    """ Raises BadDataException if any of the recordings can't be submitted."""
     for r in recordings:
+        if not isinstance(r, dict):
+            raise exceptions.BadDataException("Each submission must be a JSON object")
         if "artist" not in r or "title" not in r:
             raise exceptions.BadDataException("Require artist and title keys in submission")
+        _validate_values(r)
+
+
+def submit_listens_and_sing_me_a_sweet_song(recordings, ids_only=False, raw_payloads=False, json_and_hashes=None):
 
+    validate_recordings(recordings)
+
+    metrics.LISTENS_PER_SUBMIT.observe(len(recordings))
     attempts = 0
     success = False
     while not success and attempts < 3:
         try:
-            data = insert_all_in_transaction(recordings)
+            data = insert_all_in_transaction(recordings, ids_only=ids_only, raw_payloads=raw_payloads,
+                                             json_and_hashes=json_and_hashes)
             success = True
         except sqlalchemy.exc.IntegrityError as e:
             # If we get an IntegrityError then our transaction failed.
             # We should try again
-            pass
+            metrics.SUBMIT_RETRIES.inc()
 
         attempts += 1
 
@@ -28,22 +59,62 @@ def submit_listens_and_sing_me_a_sweet_song(recordings):
     else:
         raise exceptions.ErrorAddingException("Failed to add data")
 
-def load_recording(mbid):
+def load_recording(mbid, raw_payload=False):
     with db.engine.begin() as connection:
-        return data.load_recording(connection, mbid)
+        return data.load_recording(connection, mbid, raw_payload=raw_payload)
+
 
+def load_recording_ids(msids):
+    with db.engine.connect() as connection:
+        return data.load_recording_ids(connection, msids)
 
-def insert_single(connection, recording):
-    gid = data.get_id_from_recording(connection, recording)
-    if not gid:
-        gid = data.submit_recording(connection, recording)
-    loaded = data.load_recording(connection, gid)
-    return loaded
 
-def insert_all_in_transaction(recordings):
+def get_msids_from_meta(artist, title, after=None, count=100):
+    """ Returns the meta hash of the artist and title, and a page of the MessyBrainz IDs
+        of the recordings which have the same artist and title (ignoring case).
+    """
+    meta_sha256 = data.get_meta_sha256({"artist": artist, "title": title})
+    with db.engine.connect() as connection:
+        return meta_sha256, data.get_ids_from_meta_sha256(connection, meta_sha256, after=after, count=count)
+
+
+def insert_single(connection, recording, raw_payload=False, json_and_hashes=None):
+    """ Inserts the recording if it doesn't exist yet and returns a tuple
+        of its loaded data and whether it was newly added.
+    """
+    gid, added = data.get_or_submit_recording(connection, recording, json_and_hashes=json_and_hashes)
+    loaded = data.load_recording(connection, gid, raw_payload=raw_payload)
+    return loaded, added
+
+def insert_all_in_transaction(recordings, ids_only=False, raw_payloads=False, json_and_hashes=None):
+    """ Inserts the recordings which don't exist yet and returns the loaded data of
+        each recording, or only their ids if ids_only is True. If raw_payloads is
+        True, the payloads are returned as RawJSON (see data.load_recording).
+        json_and_hashes is the list of the data.get_recording_json_and_hashes results
+        of the recordings, if they were computed already.
+    """
     ret = []
+    num_added = 0
+    if json_and_hashes is None:
+        json_and_hashes = [None] * len(recordings)
     with db.engine.begin() as connection:
-        for recording in recordings:
-            result = insert_single(connection, recording)
-            ret.append(result)
+        if ids_only:
+            gids = []
+            for recording, recording_json_and_hashes in zip(recordings, json_and_hashes):
+                gid, added = data.get_or_submit_recording(connection, recording,
+                                                          json_and_hashes=recording_json_and_hashes)
+                gids.append(gid)
+                num_added += added
+            ids = data.load_recording_ids(connection, gids)
+            ret = [{"ids": ids[gid]} for gid in gids]
+        else:
+            for recording, recording_json_and_hashes in zip(recordings, json_and_hashes):
+                result, added = insert_single(connection, recording, raw_payload=raw_payloads,
+                                              json_and_hashes=recording_json_and_hashes)
+                ret.append(result)
+                num_added += added
+
+    # Only count recordings once the transaction has been committed, so that retries aren't counted twice
+    metrics.RECORDINGS_SUBMITTED.labels(status="new").inc(num_added)
+    metrics.RECORDINGS_SUBMITTED.labels(status="existing").inc(len(recordings) - num_added)
     return ret
@@ -0,0 +1,219 @@
+""" Benchmarks for the submit, lookup and clustering hot paths.
+
+Each benchmark run recreates the test database with
+`messybrainz.db.testing.DatabaseTestCase`, submits a synthetic corpus of
+listens and times the database functions. Results are written as one JSON
+object per line so that they can be compared between runs.
+"""
+import json
+import platform
+import random
+import subprocess
+import time
+
+from messybrainz import db
+from messybrainz import load_recording
+from messybrainz import submit_listens_and_sing_me_a_sweet_song
+from messybrainz.benchmarks.listens import ListenGenerator
+from messybrainz.db import artist
+from messybrainz.db import data
+from messybrainz.db import recording
+from messybrainz.db import release
+from messybrainz.db.testing import DatabaseTestCase
+from messybrainz.webserver.views.api import dumps_recording
+from sqlalchemy import text
+
+
+# Representative lookups of the clustering commands, explained by benchmark_explain
+EXPLAIN_QUERIES = (
+    ("recording_gids_for_recording_mbid", """
+        SELECT r.gid
+          FROM recording_json AS rj
+          JOIN recording AS r
+            ON rj.id = r.data
+     LEFT JOIN recording_cluster AS rc
+            ON r.gid = rc.recording_gid
+         WHERE rj.data ->> 'recording_mbid' = :recording_mbid
+           AND rc.recording_gid IS NULL
+    """),
+    ("release_gids_for_release_mbid", """
+        SELECT DISTINCT rec.release
+                   FROM recording_json AS recj
+                   JOIN recording AS rec
+                     ON recj.id = rec.data
+              LEFT JOIN release_cluster AS relc
+                     ON rec.release = relc.release_gid
+                  WHERE recj.data ->> 'release_mbid' = :release_mbid
+                    AND relc.release_gid IS NULL
+    """),
+    ("recording_mbids_left_to_cluster", """
+        SELECT DISTINCT rj.data ->> 'recording_mbid'
+                   FROM recording_json AS rj
+              LEFT JOIN recording_cluster AS rc
+                     ON (rj.data ->> 'recording_mbid')::uuid = rc.recording_gid
+                  WHERE rj.data ->> 'recording_mbid' IS NOT NULL
+                    AND rc.recording_gid IS NULL
+    """),
+)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _result(name, rows, items, seconds, **extra):
+    result = {
+        "benchmark": name,
+        "rows": rows,
+        "items": items,
+        "seconds": round(seconds, 6),
+        "items_per_second": round(items / seconds, 2) if seconds else None,
+        "ms_per_item": round(seconds * 1000 / items, 4) if items else None,
+    }
+    result.update(extra)
+    return result
+
+
+def benchmark_submit(listens, batch_size):
+    """ Submits the listens in batches and returns the MSIDs of the submitted
+        recordings and the benchmark result.
+    """
+    msids = []
+    start = time.perf_counter()
+    for i in range(0, len(listens), batch_size):
+        result = submit_listens_and_sing_me_a_sweet_song(listens[i:i + batch_size])
+        msids.extend(r["ids"]["recording_msid"] for r in result["payload"])
+    seconds = time.perf_counter() - start
+    return msids, _result("submit", len(listens), len(listens), seconds, batch_size=batch_size)
+
+
+def benchmark_load_recording(msids, rows, sample_size, seed, raw_payload=False):
+    """ Loads a random sample of the submitted recordings one by one and encodes them
+        like GET /<msid> does. The CPU time of this process is reported as well.
+    """
+    sample = random.Random(seed).sample(msids, min(sample_size, len(msids)))
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    for msid in sample:
+        dumps_recording(load_recording(msid, raw_payload=raw_payload))
+    cpu_seconds = time.process_time() - start_cpu
+    return _result("load_recording_raw" if raw_payload else "load_recording", rows, len(sample),
+                   time.perf_counter() - start, cpu_seconds=round(cpu_seconds, 6),
+                   cpu_ms_per_item=round(cpu_seconds * 1000 / len(sample), 4) if sample else None)
+
+
+def benchmark_get_id_from_recording(listens, rows, sample_size, seed):
+    """ Looks up a random sample of the submitted recordings by their data hash."""
+    sample = random.Random(seed).sample(listens, min(sample_size, len(listens)))
+    with db.engine.connect() as connection:
+        start = time.perf_counter()
+        for listen in sample:
+            data.get_id_from_recording(connection, listen)
+        return _result("get_id_from_recording", rows, len(sample), time.perf_counter() - start)
+
+
+def benchmark_index_sizes(rows):
+    """ Returns the size on disk of the recording_json indexes, the items of the
+        result are the sizes in bytes.
+    """
+    results = []
+    with db.engine.connect() as connection:
+        result = connection.execute("""SELECT indexrelid::regclass::text AS name
+                                            , pg_relation_size(indexrelid) AS size
+                                         FROM pg_index
+                                        WHERE indrelid = 'recording_json'::regclass
+                                     ORDER BY name""")
+        for row in result:
+            results.append(_result("index_size", rows, row["size"], 0, index=row["name"]))
+    return results
+
+
+def _plan_indexes(plan):
+    """ Returns the names of the indexes used by a JSON query plan node and its children."""
+    indexes = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        indexes |= _plan_indexes(child)
+    return indexes
+
+
+def benchmark_explain(listens, rows):
+    """ Runs EXPLAIN ANALYZE on the EXPLAIN_QUERIES, the MBIDs are taken from the
+        first listen which has them.
+    """
+    params = next(({"recording_mbid": listen["recording_mbid"], "release_mbid": listen["release_mbid"]}
+                   for listen in listens if "recording_mbid" in listen), None)
+    if params is None:
+        return []
+
+    results = []
+    with db.engine.connect() as connection:
+        connection.execute("ANALYZE")
+        for name, query in EXPLAIN_QUERIES:
+            result = connection.execute(text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query), params)
+            plan = result.fetchone()[0][0]
+            results.append(_result("explain", rows, 1, plan["Execution Time"] / 1000, query=name,
+                                   indexes=sorted(_plan_indexes(plan["Plan"])),
+                                   shared_blocks_hit=plan["Plan"].get("Shared Hit Blocks"),
+                                   shared_blocks_read=plan["Plan"].get("Shared Read Blocks")))
+    return results
+
+
+def benchmark_clustering(rows):
+    """ Times each clustering command, they are run in the same order as in production."""
+    results = []
+    for name, create_clusters in (
+        ("create_recording_clusters", recording.create_recording_clusters),
+        ("create_release_clusters", release.create_release_clusters),
+        ("create_artist_credit_clusters", artist.create_artist_credit_clusters),
+    ):
+        start = time.perf_counter()
+        clusters_modified, clusters_add_to_redirect = create_clusters()
+        results.append(_result(name, rows, clusters_modified, time.perf_counter() - start,
+                               clusters_add_to_redirect=clusters_add_to_redirect))
+    return results
+
+
+def run(sizes, batch_size=100, lookups=1000, seed=0, mbid_coverage=0.5, output=None):
+    """ Runs all the benchmarks for each number of rows in `sizes` against a freshly
+        created test database and writes the results as JSON lines to `output`.
+
+    Returns:
+        results (list): the results of all the benchmarks.
+    """
+    common = {
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "seed": seed,
+        "mbid_coverage": mbid_coverage,
+    }
+    results = []
+    for rows in sizes:
+        database = DatabaseTestCase()
+        database.setUp()
+        try:
+            generator = ListenGenerator(seed=seed, num_artists=max(rows // 20, 1), mbid_coverage=mbid_coverage)
+            listens = list(generator.generate(rows))
+            msids, result = benchmark_submit(listens, batch_size)
+            run_results = [
+                result,
+                benchmark_load_recording(msids, rows, lookups, seed),
+                benchmark_load_recording(msids, rows, lookups, seed, raw_payload=True),
+                benchmark_get_id_from_recording(listens, rows, lookups, seed),
+            ]
+            run_results.extend(benchmark_index_sizes(rows))
+            run_results.extend(benchmark_explain(listens, rows))
+            run_results.extend(benchmark_clustering(rows))
+        finally:
+            database.tearDown()
+
+        for result in run_results:
+            result.update(common)
+            if output is not None:
+                output.write(json.dumps(result, sort_keys=True) + "\n")
+                output.flush()
+        results.extend(run_results)
+    return results
@@ -0,0 +1,122 @@
+""" Generates a deterministic synthetic corpus of listens to be submitted
+to MessyBrainz by the benchmarks.
+
+The corpus tries to look like real submissions: a few popular artists get
+most of the listens (Zipf distribution), some listens are exact repeats of
+earlier ones and only a part of the listens carry MusicBrainz IDs. Optionally
+some names contain unusual unicode or NUL characters.
+"""
+import itertools
+import random
+import uuid
+
+
+# Strings which are appended to names to exercise unicode handling. The NUL
+# character is not accepted in JSONB by PostgreSQL, so listens with it are
+# rejected with 400 Bad Request.
+EDGE_CASE_SUFFIXES = (
+    " \u00e9\u00e8\u00fc\u00df",          # Latin-1 accents
+    " \u0410\u043b\u0438\u0441\u0430",    # Cyrillic
+    " \u6771\u4eac\u4e8b\u5909",          # CJK
+    " \u05e9\u05dc\u05d5\u05dd",          # Right to left
+    " e\u0301\u0308",                     # Combining marks
+    " \U0001f3b6\U0001f525",              # Emoji (outside the BMP)
+    " \u2010\u00a0\u200b",                # Hyphen, nbsp and zero width space
+    " \u0000",                            # NUL
+)
+
+
+def _random_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class ListenGenerator(object):
+    """ Generates synthetic listens.
+
+    Args:
+        seed (int): seed of the random generator, the same seed always generates
+                    the same listens.
+        num_artists (int): number of distinct artists.
+        zipf_exponent (float): exponent of the Zipf distribution of listens over
+                               artists, higher values mean more skew.
+        repeat_ratio (float): probability that a listen is an exact repeat of one
+                              of the last `repeat_window` distinct listens.
+        repeat_window (int): number of recent distinct listens repeats are picked from.
+        mbid_coverage (float): probability that a listen has MusicBrainz IDs.
+        edge_case_ratio (float): probability that the artist, release or title of a
+                                 new listen gets one of EDGE_CASE_SUFFIXES appended.
+        nul (bool): whether the NUL character may be used as an edge case.
+    """
+
+    def __init__(self, seed=0, num_artists=1000, zipf_exponent=1.1, repeat_ratio=0.3,
+                 repeat_window=10000, mbid_coverage=0.5, edge_case_ratio=0.0, nul=False):
+        self.seed = seed
+        self.num_artists = num_artists
+        self.repeat_ratio = repeat_ratio
+        self.repeat_window = repeat_window
+        self.mbid_coverage = mbid_coverage
+        self.edge_case_ratio = edge_case_ratio
+        self.edge_cases = EDGE_CASE_SUFFIXES if nul else EDGE_CASE_SUFFIXES[:-1]
+        self._artist_weights = list(itertools.accumulate(
+            1.0 / (rank ** zipf_exponent) for rank in range(1, num_artists + 1)
+        ))
+        self._artists = {}
+
+    def _artist(self, index):
+        """ Returns the artist with the given index, its releases and tracks are
+            generated with a random generator seeded by the index so that they
+            don't depend on the order in which artists are picked.
+        """
+        if index not in self._artists:
+            rng = random.Random("{0}-{1}".format(self.seed, index))
+            releases = []
+            for release_index in range(rng.randint(1, 5)):
+                tracks = [
+                    ("Track {0}-{1}-{2}".format(index, release_index, track_index), _random_uuid(rng))
+                    for track_index in range(rng.randint(5, 15))
+                ]
+                releases.append(("Release {0}-{1}".format(index, release_index), _random_uuid(rng), tracks))
+            self._artists[index] = (
+                "Artist {0}".format(index),
+                [_random_uuid(rng) for _ in range(rng.choice((1, 1, 1, 2)))],
+                releases,
+            )
+        return self._artists[index]
+
+    def make_listen(self, rng):
+        """ Returns a new (non repeated) listen using the given random generator."""
+        index = rng.choices(range(self.num_artists), cum_weights=self._artist_weights)[0]
+        artist, artist_mbids, releases = self._artist(index)
+        release, release_mbid, tracks = rng.choice(releases)
+        title, recording_mbid = rng.choice(tracks)
+
+        listen = {
+            "artist": artist,
+            "title": title,
+            "release": release,
+        }
+        if rng.random() < self.mbid_coverage:
+            listen["artist_mbids"] = artist_mbids
+            listen["release_mbid"] = release_mbid
+            listen["recording_mbid"] = recording_mbid
+        if self.edge_case_ratio and rng.random() < self.edge_case_ratio:
+            key = rng.choice(("artist", "release", "title"))
+            listen[key] += rng.choice(self.edge_cases)
+        return listen
+
+    def generate(self, count):
+        """ Yields `count` listens."""
+        rng = random.Random(self.seed)
+        recent = []
+        num_distinct = 0
+        for _ in range(count):
+            if recent and rng.random() < self.repeat_ratio:
+                listen = dict(rng.choice(recent))
+            else:
+                listen = self.make_listen(rng)
+                if len(recent) < self.repeat_window:
+                    recent.append(listen)
+                else:
+                    recent[num_distinct % self.repeat_window] = listen
+                num_distinct += 1
+            yield listen
@@ -0,0 +1,142 @@
+""" Load test driver for the MessyBrainz API.
+
+Replays a synthetic listen corpus against /submit and then looks up a sample
+of the returned MSIDs with GET /<msid>, either in process through the Flask
+test client or against a running server, and reports the throughput and the
+latency percentiles of both endpoints.
+"""
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+from messybrainz.benchmarks.listens import ListenGenerator
+
+
+class TestClientTarget(object):
+    """ Sends the requests to an in process app through the Flask test client."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        # Test clients keep state between requests, so each thread gets its own
+        if not hasattr(self._local, "client"):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def post(self, path, body):
+        response = self.client.post(path, data=body, content_type="application/json")
+        return response.status_code, response.data
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.data
+
+
+class HTTPTarget(object):
+    """ Sends the requests to a running server."""
+
+    def __init__(self, url, timeout=60):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def post(self, path, body):
+        return self._request(urllib.request.Request(self.url + path, data=body, method="POST",
+                                                    headers={"Content-Type": "application/json"}))
+
+    def get(self, path):
+        return self._request(urllib.request.Request(self.url + path))
+
+
+def percentile(sorted_values, p):
+    """ Returns the p-th percentile of a sorted list using the nearest rank method."""
+    if not sorted_values:
+        return None
+    rank = max(int(math.ceil(p / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(endpoint, latencies, statuses, items, seconds, response_bytes=None):
+    """ Returns the throughput and latency percentiles (in ms) of an endpoint."""
+    latencies = sorted(latencies)
+    summary = {
+        "endpoint": endpoint,
+        "requests": len(latencies),
+        "response_bytes": response_bytes,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 2) if seconds else None,
+        "items_per_second": round(items / seconds, 2) if seconds else None,
+        "statuses": {str(status): statuses.count(status) for status in sorted(set(statuses))},
+    }
+    for p in (50, 90, 95, 99, 100):
+        value = percentile(latencies, p)
+        summary["p{0}_ms".format(p)] = round(value * 1000, 2) if value is not None else None
+    return summary
+
+
+def _run_requests(requests, send, concurrency):
+    """ Sends the requests with `concurrency` threads and returns the latency and
+        result of each request, in order, and the total elapsed time.
+    """
+    def timed(request):
+        start = time.perf_counter()
+        result = send(request)
+        return time.perf_counter() - start, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, requests))
+    return results, time.perf_counter() - start
+
+
+def run(target, listens=10000, batch_size=100, lookups=1000, concurrency=4, seed=0,
+        mbid_coverage=0.5, edge_case_ratio=0.01, nul=False, ids_only=False):
+    """ Runs the load test against the given target. If ids_only is True, the
+        submitted data isn't echoed back in the /submit responses.
+
+    Returns:
+        list of the summaries of the submit and get endpoints.
+    """
+    generator = ListenGenerator(seed=seed, num_artists=max(listens // 20, 1), mbid_coverage=mbid_coverage,
+                                edge_case_ratio=edge_case_ratio, nul=nul)
+    corpus = list(generator.generate(listens))
+    batches = [corpus[i:i + batch_size] for i in range(0, len(corpus), batch_size)]
+    bodies = [json.dumps(batch).encode("utf-8") for batch in batches]
+
+    path = "/submit?ids_only=1" if ids_only else "/submit"
+    results, seconds = _run_requests(bodies, lambda body: target.post(path, body), concurrency)
+    statuses = [status for _, (status, _) in results]
+    submitted = sum(len(batch) for batch, status in zip(batches, statuses) if status == 200)
+    response_bytes = sum(len(body) for _, (_, body) in results)
+    summaries = [summarize("submit", [latency for latency, _ in results], statuses, submitted, seconds,
+                           response_bytes=response_bytes)]
+
+    msids = []
+    for _, (status, body) in results:
+        if status == 200:
+            msids.extend(r["ids"]["recording_msid"] for r in json.loads(body.decode("utf-8"))["payload"])
+    if msids:
+        rng = random.Random(seed)
+        sample = [rng.choice(msids) for _ in range(lookups)]
+        results, seconds = _run_requests(sample, lambda msid: target.get("/{0}".format(msid)), concurrency)
+        statuses = [status for _, (status, _) in results]
+        response_bytes = sum(len(body) for _, (_, body) in results)
+        summaries.append(summarize("get", [latency for latency, _ in results], statuses,
+                                   statuses.count(200), seconds, response_bytes=response_bytes))
+
+    return summaries
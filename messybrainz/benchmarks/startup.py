@@ -0,0 +1,148 @@
+""" Benchmarks of the startup time of manage.py commands and of the WSGI app.
+
+Each measurement starts a new Python process, so that nothing is imported
+already. manage.py commands are run with --help, which imports everything
+needed to load the command without running it. The WSGI app is timed by
+importing messybrainz.webserver.wsgi like a uwsgi worker does.
+
+The memory of uwsgi-like workers is measured by creating the app in a new
+process and forking workers from it, which each handle requests to the home
+page. The memory of each worker is read from /proc once all of them are done,
+so that the shared memory is split between all of them.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from messybrainz.benchmarks.db import _git_revision, _result
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+
+# Run in a new process with the arguments: workers, requests per worker, 1 to warm up the app
+_WORKER_MEMORY_SCRIPT = """
+import json
+import os
+import sys
+import traceback
+
+from messybrainz.webserver import create_app
+
+
+def read_memory():
+    memory = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                memory[key] = int(value.split()[0])
+    return memory
+
+
+def wait_for(fd):
+    while os.read(fd, 1):
+        pass
+
+
+def run_worker(app, requests, result_fd):
+    for pipe in (start, measure, done):
+        os.close(pipe[1])
+    wait_for(start[0])
+    with app.test_client() as client:
+        for _ in range(requests):
+            client.get("/")
+    os.write(result_fd, b"\\n")
+    wait_for(measure[0])
+    os.write(result_fd, json.dumps(read_memory()).encode("utf-8"))
+    os.close(result_fd)
+    wait_for(done[0])
+
+
+workers, requests, warmup = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3] == "1"
+app = create_app(warmup=warmup)
+start, measure, done = os.pipe(), os.pipe(), os.pipe()
+results = []
+for _ in range(workers):
+    result = os.pipe()
+    if os.fork() == 0:
+        try:
+            run_worker(app, requests, result[1])
+        except Exception:
+            traceback.print_exc()
+        os._exit(0)
+    os.close(result[1])
+    results.append(os.fdopen(result[0]))
+
+for pipe in (start, measure, done):
+    os.close(pipe[0])
+os.close(start[1])
+for result in results:
+    result.readline()
+os.close(measure[1])
+memory = [json.loads(result.read()) for result in results]
+os.close(done[1])
+for _ in range(workers):
+    os.wait()
+print(json.dumps(memory))
+"""
+
+
+def _time_process(args, repeat):
+    """ Returns the shortest time it took to run the process out of `repeat` runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call(args, cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def benchmark_manage_py(command, repeat):
+    seconds = _time_process([sys.executable, "manage.py", command, "--help"], repeat)
+    return _result("manage_py_startup", 0, 1, seconds, command=command)
+
+
+def benchmark_wsgi(repeat):
+    seconds = _time_process([sys.executable, "-c", "import messybrainz.webserver.wsgi"], repeat)
+    return _result("wsgi_startup", 0, 1, seconds)
+
+
+def benchmark_worker_memory(workers, requests, warmup):
+    """ Returns the memory of each worker in kB: its RSS, its proportional share
+        of the memory it shares with the other workers (PSS), and its private
+        memory. Requires Linux 4.14 or newer.
+    """
+    memory = json.loads(subprocess.check_output(
+        [sys.executable, "-c", _WORKER_MEMORY_SCRIPT, str(workers), str(requests), "1" if warmup else "0"],
+        cwd=ROOT_DIR,
+    ).decode("utf-8").splitlines()[-1])
+    return [
+        _result("worker_memory", 0, requests, 0, worker=i, warmup=warmup, rss_kb=m["Rss"], pss_kb=m["Pss"],
+                private_kb=m["Private_Clean"] + m["Private_Dirty"])
+        for i, m in enumerate(memory)
+    ]
+
+
+def run(commands, repeat=5, workers=4, requests=100, output=None):
+    """ Times the startup of each of the manage.py `commands` and of the WSGI app,
+        measures the memory of `workers` forked workers with and without the app
+        warmup, and writes the results as JSON lines to `output`.
+
+    Returns:
+        results (list): the results of all the benchmarks.
+    """
+    results = [benchmark_manage_py(command, repeat) for command in commands]
+    results.append(benchmark_wsgi(repeat))
+    results.extend(benchmark_worker_memory(workers, requests, warmup=False))
+    results.extend(benchmark_worker_memory(workers, requests, warmup=True))
+    git_revision = _git_revision()
+    for result in results:
+        result["git_revision"] = git_revision
+        if output is not None:
+            output.write(json.dumps(result, sort_keys=True) + "\n")
+            output.flush()
+    return results
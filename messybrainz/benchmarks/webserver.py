@@ -0,0 +1,49 @@
+""" Micro-benchmarks of the per-request overhead of the webserver decorators.
+
+The decorated view does nothing, so that the timings only include the work
+done by the decorators. No database is needed.
+"""
+import json
+import time
+import uuid
+
+from flask import make_response
+from messybrainz.benchmarks.db import _result
+from messybrainz.webserver.decorators import crossdomain
+
+
+def _time_view(app, view, path, iterations):
+    messybrainz_id = uuid.UUID(path[1:])
+    with app.test_request_context(path):
+        view(messybrainz_id)  # the first request fills the caches of the decorators
+        start = time.perf_counter()
+        for _ in range(iterations):
+            view(messybrainz_id)
+        return time.perf_counter() - start
+
+
+def benchmark_crossdomain(app, iterations=10000):
+    """ Calls a view for GET /<msid> with and without the crossdomain decorator,
+        and reports the difference per request as the decorator's overhead.
+    """
+    def view(messybrainz_id):
+        return ""
+
+    path = "/%s" % uuid.uuid4()
+    baseline = _time_view(app, lambda messybrainz_id: make_response(view(messybrainz_id)), path, iterations)
+    seconds = _time_view(app, crossdomain()(view), path, iterations)
+    return _result("crossdomain", 0, iterations, seconds,
+                   overhead_us_per_request=round((seconds - baseline) * 1000000 / iterations, 3))
+
+
+def run(app, iterations=10000, output=None):
+    """ Runs the webserver benchmarks and writes the results as JSON lines to `output`.
+
+    Returns:
+        results (list): the results of all the benchmarks.
+    """
+    results = [benchmark_crossdomain(app, iterations)]
+    if output is not None:
+        for result in results:
+            output.write(json.dumps(result, sort_keys=True) + "\n")
+    return results
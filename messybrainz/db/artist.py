@@ -1,5 +1,6 @@
 
 import brainzutils.musicbrainz_db.recording as mb_recording
+import json
 import messybrainz.db.common as db_common
 from brainzutils import musicbrainz_db
 from brainzutils.musicbrainz_db.exceptions import NoDataFoundException
@@ -149,12 +150,35 @@ def link_artist_mbids_to_artist_credit_cluster_id(connection, cluster_id, artist
     })
 
 
+def link_artist_mbids_to_artist_credit_cluster_ids(connection, links):
+    """Links the artist mbids to the cluster_ids in a single bulk insert.
+
+    Args:
+        connection: the sqlalchemy db connection to be used to execute queries
+        links (list): list of (cluster_id, artist_credit_mbids) tuples.
+    """
+
+    values = [
+        {"cluster_id": cluster_id, "artist_credit_mbids": artist_credit_mbids}
+        for cluster_id, artist_credit_mbids in links
+    ]
+
+    connection.execute(text("""
+        INSERT INTO artist_credit_redirect (artist_credit_cluster_id, artist_mbids)
+             VALUES (:cluster_id, array_sort(:artist_credit_mbids))
+    """), values
+    )
+
+
 def truncate_artist_credit_cluster_and_redirect_tables():
-    """Truncates artis_credit_cluster and artist_credit_redirect table."""
+    """Truncates artis_credit_cluster and artist_credit_redirect table and clears the
+       resolved artist MBIDs of the recordings.
+    """
 
     with db.engine.begin() as connection:
         connection.execute(text("""TRUNCATE TABLE artist_credit_cluster"""))
         connection.execute(text("""TRUNCATE TABLE artist_credit_redirect"""))
+        data.clear_resolved_mbids(connection, "artist_credit")
 
 
 def insert_artist_credit_cluster(connection, cluster_id, artist_credit_gids):
@@ -229,27 +253,32 @@ def get_artist_cluster_id_using_artist_mbids(connection, artist_credit_mbids):
     return None
 
 
-def fetch_artist_credits_left_to_cluster(connection):
-    """ Returns array of artist_mbids for the artist MBIDs that
-        were not clustered after executing the first phase of clustering.
-        These are anomalies (A single MSID pointing to multiple MBIDs arrays
-        in artist_credit_redirect table).
+def fetch_artist_credits_and_cluster_ids_left_to_cluster(connection):
+    """ Returns a list of (artist_mbids, cluster IDs) tuples for the artist MBIDs
+        that were not clustered after executing the first phase of clustering.
+        The cluster IDs are the distinct clusters of the artist MSIDs which have
+        these artist MBIDs. These are anomalies (A single MSID pointing to multiple
+        MBIDs arrays in artist_credit_redirect table).
     """
 
     # convert_json_array_to_sorted_uuid_array is a custom function for implementation
     # details check admin/sql/create_functions.sql
     result = connection.execute(text("""
-        SELECT DISTINCT convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids')
-                   FROM recording as r
-                   JOIN recording_json AS rj
-                     ON r.data = rj.id
-              LEFT JOIN artist_credit_redirect AS acr
-                     ON convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids') = acr.artist_mbids
-                  WHERE rj.data ->> 'artist_mbids' IS NOT NULL
-                    AND acr.artist_mbids IS NULL
+        SELECT convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids') AS artist_mbids
+             , array_agg(DISTINCT acc.cluster_id) AS cluster_ids
+          FROM recording as r
+          JOIN recording_json AS rj
+            ON r.data = rj.id
+          JOIN artist_credit_cluster AS acc
+            ON r.artist = acc.artist_credit_gid
+     LEFT JOIN artist_credit_redirect AS acr
+            ON convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids') = acr.artist_mbids
+         WHERE rj.data ->> 'artist_mbids' IS NOT NULL
+           AND acr.artist_mbids IS NULL
+      GROUP BY convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids')
     """))
 
-    return [r[0] for r in result]
+    return [(r['artist_mbids'], r['cluster_ids']) for r in result]
 
 
 def get_cluster_id_using_msid(connection, msid):
@@ -276,32 +305,6 @@ def get_cluster_id_using_msid(connection, msid):
     return None
 
 
-def get_artist_gids_from_recording_json_using_mbids(connection, artist_mbids):
-    """Returns artist MSIDs using a list of artist MBIDs.
-
-    Args:
-        connection: the sqlalchemy db connection to be used to execute queries
-        artist_mbids (list): a list of artist MBIDs for which gids are to be fetched.
-
-    Returns:
-        gids(list): list of artist gids for a given array of artist MBIDs.
-    """
-
-    # convert_json_array_to_sorted_uuid_array is a custom function for implementation
-    # details check admin/sql/create_functions.sql
-    result = connection.execute(text("""
-        SELECT DISTINCT r.artist
-                   FROM recording AS r
-                   JOIN recording_json AS rj
-                     ON r.data = rj.id
-                  WHERE array_sort(:artist_mbids) = convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids')
-    """), {
-        "artist_mbids": artist_mbids,
-    })
-
-    return [artist_gid[0] for artist_gid in result]
-
-
 def get_artist_mbids_using_msid(connection, artist_msid):
     """Returns a list of list of artist MBIDs that corresponds
        to the given artist MSID.
@@ -327,17 +330,42 @@ def get_artist_mbids_using_msid(connection, artist_msid):
 def get_recordings_metadata_using_artist_mbids(connection, mbids):
     """Returns the recording Metadata from recording_json table using artist MBIDs."""
 
+    return get_recordings_metadata_using_artist_mbids_list(connection, [mbids])[0]
+
+
+def get_recordings_metadata_using_artist_mbids_list(connection, mbids_list):
+    """Returns the recording Metadata from recording_json table for each of the
+       given lists of artist MBIDs, in a single query.
+
+    Returns:
+        list: a list of recordings Metadata for each list of artist MBIDs, in the
+              order of mbids_list.
+    """
+
     # convert_json_array_to_sorted_uuid_array is a custom function for implementation
     # details check admin/sql/create_functions.sql
     recordings = connection.execute(text("""
-        SELECT recording_json.data
-          FROM recording_json
-         WHERE convert_json_array_to_sorted_uuid_array(data -> 'artist_mbids') = :mbids
+        SELECT m.i, rj.data
+          FROM jsonb_array_elements(CAST(:mbids_list AS JSONB)) WITH ORDINALITY AS m(mbids, i)
+          JOIN recording_json AS rj
+            ON convert_json_array_to_sorted_uuid_array(rj.data -> 'artist_mbids') =
+               ARRAY(SELECT jsonb_array_elements_text(m.mbids))::uuid[]
     """), {
-        "mbids": mbids,
+        "mbids_list": _dump_mbids_list(mbids_list),
     })
 
-    return [recording[0] for recording in recordings]
+    return _group_recordings_metadata(recordings, len(mbids_list))
+
+
+def _dump_mbids_list(mbids_list):
+    return json.dumps([[str(mbid) for mbid in mbids] for mbids in mbids_list])
+
+
+def _group_recordings_metadata(recordings, count):
+    recordings_metadata = [[] for _ in range(count)]
+    for i, recording in recordings:
+        recordings_metadata[i - 1].append(recording)
+    return recordings_metadata
 
 
 def create_artist_credit_clusters_without_considering_anomalies(connection):
@@ -358,7 +386,7 @@ def create_artist_credit_clusters_without_considering_anomalies(connection):
         get_artist_cluster_id_using_artist_mbids,
         link_artist_mbids_to_artist_credit_cluster_id,
         insert_artist_credit_cluster,
-        get_recordings_metadata_using_artist_mbids
+        get_recordings_metadata_using_artist_mbids_list
     )
 
 
@@ -373,11 +401,9 @@ def create_artist_credit_clusters_for_anomalies(connection):
         clusters_add_to_redirect (int): number of clusters added to redirect table.
     """
     return db_common.create_entity_clusters_for_anomalies(connection,
-        fetch_artist_credits_left_to_cluster,
-        get_artist_gids_from_recording_json_using_mbids,
-        get_cluster_id_using_msid,
-        link_artist_mbids_to_artist_credit_cluster_id,
-        get_recordings_metadata_using_artist_mbids
+        fetch_artist_credits_and_cluster_ids_left_to_cluster,
+        link_artist_mbids_to_artist_credit_cluster_ids,
+        get_recordings_metadata_using_artist_mbids_list
     )
 
 
@@ -392,6 +418,7 @@ def create_artist_credit_clusters():
     return db.common.create_entity_clusters(
         create_artist_credit_clusters_without_considering_anomalies,
         create_artist_credit_clusters_for_anomalies,
+        "artist_credit",
     )
 
 
@@ -452,65 +479,62 @@ def fetch_unclustered_gids_for_artist_mbids_using_recording_artist_join(connecti
     return [gid[0] for gid in gids]
 
 
-def fetch_artist_mbids_left_to_cluster_from_recording_artist_join(connection):
-    """ Returns array of artist_mbids for the artist MBIDs that
-        were not clustered after executing the first phase of clustering using
-        fetched artist MBIDs. These are anomalies (A single MSID pointing to
-        multiple MBIDs arrays in artist_credit_redirect table).
+def fetch_artist_mbids_and_cluster_ids_left_to_cluster_from_recording_artist_join(connection):
+    """ Returns a list of (artist_mbids, cluster IDs) tuples for the artist MBIDs
+        that were not clustered after executing the first phase of clustering using
+        fetched artist MBIDs. The cluster IDs are the distinct clusters of the artist
+        MSIDs which have these artist MBIDs. These are anomalies (A single MSID pointing
+        to multiple MBIDs arrays in artist_credit_redirect table).
     """
 
     result = connection.execute(text("""
-        SELECT DISTINCT raj.artist_mbids
-                   FROM recording AS r
-                   JOIN recording_json AS rj
-                     ON r.data = rj.id
-                   JOIN recording_artist_join AS raj
-                     ON (rj.data ->> 'recording_mbid') = (raj.recording_mbid)::text
-              LEFT JOIN artist_credit_redirect AS acr
-                     ON raj.artist_mbids = acr.artist_mbids
-                  WHERE acr.artist_mbids IS NULL
+        SELECT raj.artist_mbids
+             , array_agg(DISTINCT acc.cluster_id) AS cluster_ids
+          FROM recording AS r
+          JOIN recording_json AS rj
+            ON r.data = rj.id
+          JOIN recording_artist_join AS raj
+            ON (rj.data ->> 'recording_mbid') = (raj.recording_mbid)::text
+          JOIN artist_credit_cluster AS acc
+            ON r.artist = acc.artist_credit_gid
+     LEFT JOIN artist_credit_redirect AS acr
+            ON raj.artist_mbids = acr.artist_mbids
+         WHERE acr.artist_mbids IS NULL
+      GROUP BY raj.artist_mbids
     """))
 
-    return [r[0] for r in result]
+    return [(r['artist_mbids'], r['cluster_ids']) for r in result]
 
 
-def get_gids_from_recording_using_fetched_artist_mbids(connection, artist_mbids):
-    """ Returns artist gids from recording table using artist MBIDs and
-        recording_artist_join table using a given list of artist MBIDs.
+def get_recordings_metadata_using_artist_mbids_and_recording_artist_join(connection, mbids):
+    """ Returns the recording Metadata from recording_json table using artist MBIDs and
+        recording_artist_join.
     """
 
-    artist_mbids.sort()
-    result = connection.execute(text("""
-        SELECT DISTINCT r.artist
-                   FROM recording AS r
-                   JOIN recording_json AS rj
-                     ON r.data = rj.id
-                   JOIN recording_artist_join AS raj
-                     ON rj.data ->> 'recording_mbid' = (raj.recording_mbid)::text
-                  WHERE :artist_mbids = raj.artist_mbids
-    """), {
-        "artist_mbids": artist_mbids,
-    })
+    return get_recordings_metadata_using_artist_mbids_list_and_recording_artist_join(connection, [mbids])[0]
 
-    return [artist_gid[0] for artist_gid in result]
 
+def get_recordings_metadata_using_artist_mbids_list_and_recording_artist_join(connection, mbids_list):
+    """ Returns the recording Metadata from recording_json table for each of the given
+        lists of artist MBIDs using recording_artist_join, in a single query.
 
-def get_recordings_metadata_using_artist_mbids_and_recording_artist_join(connection, mbids):
-    """ Returns the recording Metadata from recording_json table using artist MBIDs and
-        recording_artist_join.
+    Returns:
+        list: a list of recordings Metadata for each list of artist MBIDs, in the
+              order of mbids_list.
     """
 
     recordings = connection.execute(text("""
-        SELECT rj.data
-          FROM recording_json AS rj
+        SELECT m.i, rj.data
+          FROM jsonb_array_elements(CAST(:mbids_list AS JSONB)) WITH ORDINALITY AS m(mbids, i)
           JOIN recording_artist_join AS raj
+            ON raj.artist_mbids = ARRAY(SELECT jsonb_array_elements_text(m.mbids))::uuid[]
+          JOIN recording_json AS rj
             ON rj.data ->> 'recording_mbid' = (raj.recording_mbid)::text
-         WHERE raj.artist_mbids = :mbids
     """), {
-        "mbids": mbids,
+        "mbids_list": _dump_mbids_list(mbids_list),
     })
 
-    return [recording[0] for recording in recordings]
+    return _group_recordings_metadata(recordings, len(mbids_list))
 
 
 def create_clusters_using_fetched_artist_mbids_without_anomalies(connection):
@@ -531,7 +555,7 @@ def create_clusters_using_fetched_artist_mbids_without_anomalies(connection):
         get_artist_cluster_id_using_artist_mbids,
         link_artist_mbids_to_artist_credit_cluster_id,
         insert_artist_credit_cluster,
-        get_recordings_metadata_using_artist_mbids_and_recording_artist_join,
+        get_recordings_metadata_using_artist_mbids_list_and_recording_artist_join,
     )
 
 
@@ -548,11 +572,9 @@ def create_clusters_using_fetched_artist_mbids_for_anomalies(connection):
     """
 
     return db_common.create_entity_clusters_for_anomalies(connection,
-        fetch_artist_mbids_left_to_cluster_from_recording_artist_join,
-        get_gids_from_recording_using_fetched_artist_mbids,
-        get_cluster_id_using_msid,
-        link_artist_mbids_to_artist_credit_cluster_id,
-        get_recordings_metadata_using_artist_mbids_and_recording_artist_join
+        fetch_artist_mbids_and_cluster_ids_left_to_cluster_from_recording_artist_join,
+        link_artist_mbids_to_artist_credit_cluster_ids,
+        get_recordings_metadata_using_artist_mbids_list_and_recording_artist_join
     )
 
 
@@ -568,4 +590,5 @@ def create_clusters_using_fetched_artist_mbids():
     return db.common.create_entity_clusters(
         create_clusters_using_fetched_artist_mbids_without_anomalies,
         create_clusters_using_fetched_artist_mbids_for_anomalies,
+        "artist_credit",
     )
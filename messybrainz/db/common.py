@@ -1,8 +1,9 @@
 from messybrainz import db
+from messybrainz.db import data
 import logging
 
 
-def create_entity_clusters(create_without_anomalies, create_with_anomalies):
+def create_entity_clusters(create_without_anomalies, create_with_anomalies, entity):
     """Takes two functions which create clusters for a given entity.
 
     Args:
@@ -10,6 +11,8 @@ def create_entity_clusters(create_without_anomalies, create_with_anomalies):
         clusters without considering anomalies.
         create_with_anomalies(function): this function will create clusters for the
         anomalies (A single MSID pointing to multiple MBIDs in entity_redirect table).
+        entity(str): the clustered entity, "artist_credit" or "release", whose resolved
+        MBIDs are updated in the recording table.
 
     Returns:
         clusters_modified (int): number of clusters modified.
@@ -22,67 +25,54 @@ def create_entity_clusters(create_without_anomalies, create_with_anomalies):
     with db.engine.connect() as connection:
         clusters_modified, clusters_added_to_redirect = create_without_anomalies(connection)
         clusters_added_to_redirect += create_with_anomalies(connection)
+        data.update_resolved_mbids(connection, entity)
 
     return clusters_modified, clusters_added_to_redirect
 
 
 def create_entity_clusters_for_anomalies(connection,
-                                        fetch_entities_left_to_cluster,
-                                        get_entity_gids_from_recording_json_using_mbids,
-                                        get_cluster_id_using_msid,
-                                        link_entity_mbid_to_entity_cluster_id,
-                                        get_recordings_metadata_using_entity_mbid):
+                                        fetch_entity_mbids_and_cluster_ids_left_to_cluster,
+                                        link_entity_mbids_to_entity_cluster_ids,
+                                        get_recordings_metadata_using_entity_mbids):
     """Creates entity clusters for the anomalies (A single MSID pointing
        to multiple MBIDs in entity_redirect table).
 
     Args:
         connection: the sqlalchemy db connection to be used to execute queries
-        fetch_entities_left_to_cluster(function): Returns mbids for the entity MBIDs that
-                                                were not clustered after executing the
-                                                first phase of clustering (clustering without
-                                                considering anomalies). These are anomalies
-                                                (A single MSID pointing to multiple MBIDs in
-                                                entity_redirect table).
-        get_entity_gids_from_recording_json_using_mbids(function): Returns entity MSIDs using
-                                                                an entity MBID.
-        get_cluster_id_using_msid(function): Gets the cluster ID for a given MSID.
-        link_entity_mbid_to_entity_cluster_id(function): Links the entity mbid to the cluster_id.
-        get_recordings_metadata_using_entity_mbid(function): gets recordings metadata using given MBID.
+        fetch_entity_mbids_and_cluster_ids_left_to_cluster(function): Returns (mbid, cluster_ids)
+                                                pairs for the entity MBIDs that were not clustered
+                                                after executing the first phase of clustering
+                                                (clustering without considering anomalies), along
+                                                with the distinct cluster IDs of the entity MSIDs
+                                                which have these MBIDs. These are anomalies (A single
+                                                MSID pointing to multiple MBIDs in entity_redirect table).
+        link_entity_mbids_to_entity_cluster_ids(function): Links a list of (cluster_id, mbid) pairs
+                                                        in a single bulk insert.
+        get_recordings_metadata_using_entity_mbids(function): gets recordings metadata for each of the
+                                                given MBIDs in a single query.
 
     Returns:
         clusters_add_to_redirect (int): number of clusters added to redirect table.
     """
 
     logger = logging.getLogger(__name__)
-    logger_level = logger.getEffectiveLevel()
+    report = logger.isEnabledFor(logging.INFO)
 
     logger.info("Creating clusters for anomalies...")
-    clusters_add_to_redirect = 0
-    entities_left = fetch_entities_left_to_cluster(connection)
-    for entity_mbid in entities_left:
-        entity_gids = get_entity_gids_from_recording_json_using_mbids(connection, entity_mbid)
-        cluster_ids = {get_cluster_id_using_msid(connection, entity_gid) for entity_gid in entity_gids}
+    links = []
+    for entity_mbid, cluster_ids in fetch_entity_mbids_and_cluster_ids_left_to_cluster(connection):
         for cluster_id in cluster_ids:
-            link_entity_mbid_to_entity_cluster_id(connection, cluster_id, entity_mbid)
-            clusters_add_to_redirect += 1
-            logger.info("=" * 80)
-            logger.info("Cluster ID: {0}\n".format(cluster_id))
-            if logger_level == logging.DEBUG:
-                if isinstance(entity_mbid, list):
-                    mbids_str_list = [str(mbid) for mbid in entity_mbid]
-                    mbids_str = ', '.join(mbids_str_list)
-                else:
-                    mbids_str = str(entity_mbid)
-                logger.debug("Cluster MBID: {0}\n".format(mbids_str))
-            logger.info("Recordings:")
-            if logger_level >= logging.DEBUG:
-                recordings = get_recordings_metadata_using_entity_mbid(connection, entity_mbid)
-                if logger_level == logging.INFO:
-                    formatted_rec = _format_recordings(recordings)
-                else:
-                    formatted_rec = _format_recordings(recordings, uuids=True)
-                logger.info("{0}".format(formatted_rec))
+            links.append((cluster_id, entity_mbid))
 
+    if links:
+        link_entity_mbids_to_entity_cluster_ids(connection, links)
+    clusters_add_to_redirect = len(links)
+
+    if report:
+        _report_clusters(connection, logger,
+            [(cluster_id, entity_mbid, None) for cluster_id, entity_mbid in links],
+            get_recordings_metadata_using_entity_mbids,
+        )
     logger.info("\nClusters added to redirect table: {0}.".format(clusters_add_to_redirect))
     return clusters_add_to_redirect
 
@@ -93,7 +83,7 @@ def create_entity_clusters_without_considering_anomalies(connection,
                                                         get_entity_cluster_id_using_entity_mbids,
                                                         link_entity_mbids_to_entity_cluster_id,
                                                         insert_entity_cluster,
-                                                        get_recordings_metadata_using_entity_mbid):
+                                                        get_recordings_metadata_using_entity_mbids):
     """Creates cluster for entity without considering anomalies (A single MSID pointing
        to multiple MBIDs in entity_redirect table).
 
@@ -111,7 +101,8 @@ def create_entity_clusters_without_considering_anomalies(connection,
         link_entity_mbids_to_entity_cluster_id (function): Links the entity mbid to the cluster_id.
         insert_entity_cluster (function): Creates a cluster with given cluster_id in the
                                         entity_cluster table.
-        get_recordings_metadata_using_entity_mbid(function): gets recordings metadata using given MBID.
+        get_recordings_metadata_using_entity_mbids(function): gets recordings metadata for each of the
+                                                given MBIDs in a single query.
 
     Returns:
         clusters_modified (int): number of clusters modified.
@@ -119,11 +110,12 @@ def create_entity_clusters_without_considering_anomalies(connection,
     """
 
     logger = logging.getLogger(__name__)
-    logger_level = logger.getEffectiveLevel()
+    report = logger.isEnabledFor(logging.INFO)
 
     logger.info("\nCreating clusters without considering anomalies...")
     clusters_modified = 0
     clusters_added_to_redirect = 0
+    clusters = []
     distinct_entity_mbids = fetch_unclustered_entity_mbids(connection)
     for entity_mbids in distinct_entity_mbids:
         gids = fetch_unclustered_gids_for_entity_mbids(connection, entity_mbids)
@@ -135,30 +127,54 @@ def create_entity_clusters_without_considering_anomalies(connection,
                 clusters_added_to_redirect +=1
             insert_entity_cluster(connection, cluster_id, gids)
             clusters_modified += 1
-            logger.info("=" * 80)
-            logger.info("Cluster ID: {0}\n".format(cluster_id))
-            if logger_level == logging.DEBUG:
-                if isinstance(entity_mbids, list):
-                    mbids_str_list = [str(mbid) for mbid in entity_mbids]
-                    mbids_str = ', '.join(mbids_str_list)
-                else:
-                    mbids_str = str(entity_mbids)
-                logger.debug("Cluster MBID: {0}\n".format(mbids_str))
-            logger.info("Number of entity added to this cluster: {0}.\n".format(len(gids)))
-            logger.info("Recordings:")
-            if logger_level >= logging.DEBUG:
-                recordings = get_recordings_metadata_using_entity_mbid(connection, entity_mbids)
-                if logger_level == logging.INFO:
-                    formatted_rec = _format_recordings(recordings)
-                else:
-                    formatted_rec = _format_recordings(recordings, uuids=True)
-                logger.info("{0}".format(formatted_rec))
+            if report:
+                clusters.append((cluster_id, entity_mbids, len(gids)))
+
+    if report:
+        _report_clusters(connection, logger, clusters, get_recordings_metadata_using_entity_mbids)
     logger.info("\nClusters modified: {0}.".format(clusters_modified))
     logger.info("Clusters added to redirect table: {0}.\n".format(clusters_added_to_redirect))
 
     return clusters_modified, clusters_added_to_redirect
 
 
+def _report_clusters(connection, logger, clusters, get_recordings_metadata_using_entity_mbids):
+    """Logs a report of the clusters created by a clustering pass. This is called
+       once the pass is done and only if INFO logging is enabled, so that the
+       recordings metadata is only fetched and formatted when it is printed. The
+       recordings metadata of all the clusters is fetched in a single query.
+
+    Args:
+        connection: the sqlalchemy db connection to be used to execute queries.
+        logger: the logger to write the report to.
+        clusters (list): list of (cluster_id, entity_mbids, number of gids added) tuples,
+                         number of gids added is None if it should not be reported.
+        get_recordings_metadata_using_entity_mbids(function): gets recordings metadata for each of the
+                                                given MBIDs in a single query.
+    """
+
+    if not clusters:
+        return
+
+    uuids = logger.isEnabledFor(logging.DEBUG)
+    recordings_metadata = get_recordings_metadata_using_entity_mbids(connection,
+        [entity_mbids for _, entity_mbids, _ in clusters],
+    )
+    for (cluster_id, entity_mbids, num_gids), recordings in zip(clusters, recordings_metadata):
+        logger.info("=" * 80)
+        logger.info("Cluster ID: {0}\n".format(cluster_id))
+        if uuids:
+            if isinstance(entity_mbids, list):
+                mbids_str = ', '.join(str(mbid) for mbid in entity_mbids)
+            else:
+                mbids_str = str(entity_mbids)
+            logger.debug("Cluster MBID: {0}\n".format(mbids_str))
+        if num_gids is not None:
+            logger.info("Number of entity added to this cluster: {0}.\n".format(num_gids))
+        logger.info("Recordings:")
+        logger.info("{0}".format(_format_recordings(recordings, uuids=uuids)))
+
+
 def _format_recordings(recordings, uuids=False):
     """ Returns string of formatted recordings in a human readable format.
             artist: <artist name>,
@@ -3,10 +3,48 @@ import logging
 import uuid
 
 from hashlib import sha256
+from messybrainz import metrics
 from messybrainz.db import exceptions
 from sqlalchemy import text
 
 
+# Namespace of the MessyBrainz IDs which are derived from a hash of
+# the submitted data (UUIDv5) instead of being random.
+MESSYBRAINZ_NAMESPACE = uuid.UUID("a4cd0c7d-5d2b-4f3c-9e8d-2b1f6d3c7a10")
+ARTIST_CREDIT_NAMESPACE = uuid.uuid5(MESSYBRAINZ_NAMESPACE, "artist_credit")
+RELEASE_NAMESPACE = uuid.uuid5(MESSYBRAINZ_NAMESPACE, "release")
+
+# If True, new recordings, artist credits and releases get name based MessyBrainz IDs
+# (see DETERMINISTIC_MSIDS in the config) and are inserted with ON CONFLICT DO NOTHING
+# instead of being looked up first. IDs which were randomly generated before this was
+# enabled are kept, as they have already been handed out to clients: recordings, artist
+# credits and releases that already exist still resolve to their old IDs.
+deterministic_msids = False
+
+
+# The queries are built once, as module level text() constants, rather than on
+# each call. The webserver imports this module before uwsgi forks the workers
+# (see messybrainz/webserver/warmup.py), so that they share them.
+
+
+class RawJSON(str):
+    """ An already serialized JSON document, see load_recording."""
+    pass
+
+
+def set_deterministic_msids(enabled):
+    global deterministic_msids
+    deterministic_msids = enabled
+
+
+_GET_ID_FROM_META_SHA256 = text("""SELECT s.gid
+                                     FROM recording s
+                                LEFT JOIN recording_json sj
+                                       ON sj.id = s.data
+                                    WHERE sj.meta_sha256 = :meta_sha256""")
+
+
+@metrics.timed_db_function
 def get_id_from_meta_hash(connection, data):
     """ Gets Recording MessyBrainz ID from metadata.
 
@@ -18,23 +56,26 @@ def get_id_from_meta_hash(connection, data):
         The MessyBrainz ID for the recording with same metadata hash if it exists, None otherwise
     """
 
-    meta = {"artist": data["artist"], "title": data["title"]}
-    _, meta_json = convert_to_messybrainz_json(meta)
-    meta_sha256 = sha256(meta_json.encode("utf-8")).hexdigest()
-
-    query = text("""SELECT s.gid
-                      FROM recording s
-                 LEFT JOIN recording_json sj
-                        ON sj.id = s.data
-                     WHERE sj.meta_sha256 = :meta_sha256""")
+    meta_sha256 = bytes.fromhex(get_meta_sha256(data))
 
-    result = connection.execute(query, {"meta_sha256": meta_sha256})
+    result = connection.execute(_GET_ID_FROM_META_SHA256, {"meta_sha256": meta_sha256})
     if result.rowcount:
         return result.fetchone()["gid"]
     else:
         return None
 
 
+def get_name_sha256(name):
+    """ Returns the sha256 digest used to look up an artist credit name or a release title."""
+    return sha256(name.encode("utf-8")).digest()
+
+
+_GET_ARTIST_CREDIT = text("""SELECT a.gid
+                               FROM artist_credit a
+                              WHERE a.name_sha256 = :name_sha256""")
+
+
+@metrics.timed_db_function
 def get_artist_credit(connection, artist_credit):
     """ Returns the MessyBrainz artist ID for artist with specified artist credit
 
@@ -45,16 +86,19 @@ def get_artist_credit(connection, artist_credit):
     Returns:
         uuid (str): the Artist MessyBrainz ID if it exists, None otherwise
     """
-    query = text("""SELECT a.gid
-                      FROM artist_credit a
-                     WHERE a.name = :name""")
-    result = connection.execute(query, {"name": artist_credit})
+    result = connection.execute(_GET_ARTIST_CREDIT, {"name_sha256": get_name_sha256(artist_credit)})
     row = result.fetchone()
     if row:
         return str(row["gid"])
     return None
 
 
+_GET_RELEASE = text("""SELECT r.gid
+                         FROM release r
+                        WHERE r.title_sha256 = :title_sha256""")
+
+
+@metrics.timed_db_function
 def get_release(connection, release):
     """ Returns the MessyBrainz release ID for release with specified release title.
 
@@ -66,159 +110,579 @@ def get_release(connection, release):
         uuid(str): the Release MessyBrainz ID if it exists, None otherwise
     """
 
-    query = text("""SELECT r.gid
-                      FROM release r
-                     WHERE r.title = :title""")
-    result = connection.execute(query, {"title": release})
+    result = connection.execute(_GET_RELEASE, {"title_sha256": get_name_sha256(release)})
     row = result.fetchone()
     if row:
         return str(row["gid"])
     return None
 
 
+def get_artist_credit_gid_from_name(artist_credit):
+    """ Returns the name based Artist MessyBrainz ID for the artist credit."""
+    return str(uuid.uuid5(ARTIST_CREDIT_NAMESPACE, artist_credit))
+
+
+def get_release_gid_from_title(release):
+    """ Returns the name based Release MessyBrainz ID for the release title."""
+    return str(uuid.uuid5(RELEASE_NAMESPACE, release))
+
+
+def _upsert_and_get_gid(connection, query, params):
+    """ Executes an insert-or-select query which returns the gid of the inserted
+        or existing row.
+    """
+    row = connection.execute(query, params).fetchone()
+    if not row:
+        # The row was inserted by a concurrent transaction which committed after
+        # the query started, so it is only visible to a new query.
+        row = connection.execute(query, params).fetchone()
+    return str(row["gid"])
+
+
+_ADD_ARTIST_CREDIT = text("""WITH inserted AS (
+                                  INSERT INTO artist_credit (gid, name, name_sha256, submitted)
+                                       VALUES (:gid, :name, :name_sha256, now())
+                                  ON CONFLICT (name_sha256) DO NOTHING
+                                    RETURNING gid
+                             )
+                             SELECT gid FROM inserted
+                              UNION ALL
+                             SELECT gid FROM artist_credit WHERE name_sha256 = :name_sha256
+                              LIMIT 1""")
+
+
+@metrics.timed_db_function
 def add_artist_credit(connection, artist_credit):
-    """ Insert a new artist into the MessyBrainz database
+    """ Insert a new artist into the MessyBrainz database, unless an artist
+    with the same name already exists. This is done in a single query.
+
+    If deterministic MSIDs are enabled, a new artist gets its name based ID.
 
     Args:
         connection: the sqlalchemy db connection to be used to execute queries
         artist_credit (str): the name of the artist
 
     Returns:
-        uuid (str): the new Artist MessyBrainz ID
+        uuid (str): the new or existing Artist MessyBrainz ID
     """
-    gid = str(uuid.uuid4())
-    query = text("""INSERT INTO artist_credit (gid, name, submitted)
-                         VALUES (:gid, :name, now())""")
-    connection.execute(query, {"gid": gid, "name": artist_credit})
-    return gid
+    if deterministic_msids:
+        gid = get_artist_credit_gid_from_name(artist_credit)
+    else:
+        gid = str(uuid.uuid4())
+    return _upsert_and_get_gid(connection, _ADD_ARTIST_CREDIT, {
+        "gid": gid,
+        "name": artist_credit,
+        "name_sha256": get_name_sha256(artist_credit),
+    })
+
 
+_ADD_RELEASE = text("""WITH inserted AS (
+                            INSERT INTO release (gid, title, title_sha256, submitted)
+                                 VALUES (:gid, :title, :title_sha256, now())
+                            ON CONFLICT (title_sha256) DO NOTHING
+                              RETURNING gid
+                       )
+                       SELECT gid FROM inserted
+                        UNION ALL
+                       SELECT gid FROM release WHERE title_sha256 = :title_sha256
+                        LIMIT 1""")
 
+
+@metrics.timed_db_function
 def add_release(connection, release):
-    """ Inserts a new release into the MessyBrainz database
+    """ Inserts a new release into the MessyBrainz database, unless a release
+    with the same title already exists. This is done in a single query.
+
+    If deterministic MSIDs are enabled, a new release gets its name based ID.
 
     Args:
         connection: the sqlalchemy db connection to be used to execute queries
         release (str): the title of the release
 
     Returns:
-        uuid (str): the new Release MessyBrainz ID
+        uuid (str): the new or existing Release MessyBrainz ID
     """
-    gid = str(uuid.uuid4())
-    query = text("""INSERT INTO release (gid, title, submitted)
-                         VALUES (:gid, :title, now())""")
-    connection.execute(query, {"gid": gid, "title": release})
-    return gid
+    if deterministic_msids:
+        gid = get_release_gid_from_title(release)
+    else:
+        gid = str(uuid.uuid4())
+    return _upsert_and_get_gid(connection, _ADD_RELEASE, {
+        "gid": gid,
+        "title": release,
+        "title_sha256": get_name_sha256(release),
+    })
+
+
+def get_data_sha256(data):
+    """ Returns the hash which identifies a recording with the specified data.
+
+    Args:
+        data (dict): the recording data dict submitted to MessyBrainz
+
+    Returns:
+        str: the hex sha256 of the lowercased MessyBrainz JSON of the data, the
+             database stores the raw 32 byte digest
+    """
+    _, data_json = convert_to_messybrainz_json(data)
+    return sha256(data_json.encode("utf-8")).hexdigest()
+
+
+def get_meta_sha256(data):
+    """ Returns the hash which is shared by all the recordings with the same
+        artist and title (ignoring case).
+
+    Args:
+        data (dict): the recording data dict submitted to MessyBrainz, only the
+                     artist and title keys are used
+
+    Returns:
+        str: the hex sha256 of the lowercased MessyBrainz JSON of the artist and title
+    """
+    meta = {"artist": data["artist"], "title": data["title"]}
+    _, meta_json = convert_to_messybrainz_json(meta)
+    return sha256(meta_json.encode("utf-8")).hexdigest()
+
+
+_GET_IDS_FROM_META_SHA256 = text("""SELECT s.gid
+                                      FROM recording s
+                                      JOIN recording_json sj
+                                        ON sj.id = s.data
+                                     WHERE sj.meta_sha256 = :meta_sha256
+                                       AND (CAST(:after AS UUID) IS NULL OR s.gid > CAST(:after AS UUID))
+                                  ORDER BY s.gid
+                                     LIMIT :count""")
+
+
+@metrics.timed_db_function
+def get_ids_from_meta_sha256(connection, meta_sha256, after=None, count=100):
+    """ Returns a page of the Recording MessyBrainz IDs of the recordings with the
+        specified meta hash, ordered by MessyBrainz ID.
+
+    Args:
+        connection: the sqlalchemy db connection to be used to execute queries
+        meta_sha256 (str): the meta hash, as returned by get_meta_sha256
+        after (str): only return the MessyBrainz IDs which come after this one, used
+                     as the cursor to fetch the next page
+        count (int): the maximum number of MessyBrainz IDs to return
+
+    Returns:
+        list: the MessyBrainz IDs
+    """
+    result = connection.execute(_GET_IDS_FROM_META_SHA256, {
+        "meta_sha256": bytes.fromhex(meta_sha256),
+        "after": after,
+        "count": count,
+    })
+    return [str(row["gid"]) for row in result]
+
+
+_GET_IDS_FROM_META_SHA256S = text("""SELECT sj.meta_sha256
+                                          , s.gid
+                                       FROM recording s
+                                       JOIN recording_json sj
+                                         ON sj.id = s.data
+                                      WHERE sj.meta_sha256 = ANY(:meta_sha256s)
+                                   ORDER BY s.gid""")
+
+
+@metrics.timed_db_function
+def get_ids_from_meta_sha256s(connection, meta_sha256s):
+    """ Returns the Recording MessyBrainz IDs of all the recordings with the
+        specified meta hashes, in a single query.
+
+    Args:
+        connection: the sqlalchemy db connection to be used to execute queries
+        meta_sha256s (list): the meta hashes, as returned by get_meta_sha256
+
+    Returns:
+        dict: lists of MessyBrainz IDs ordered by MessyBrainz ID keyed by meta hash,
+              hashes which don't exist are left out
+    """
+    if not meta_sha256s:
+        return {}
+
+    result = connection.execute(_GET_IDS_FROM_META_SHA256S, {"meta_sha256s": [bytes.fromhex(h) for h in meta_sha256s]})
+    ids = {}
+    for row in result:
+        ids.setdefault(bytes(row["meta_sha256"]).hex(), []).append(str(row["gid"]))
+    return ids
+
+
+def get_recording_gid_from_sha256(data_sha256):
+    """ Returns the name based Recording MessyBrainz ID for the recording
+        with the specified data hash.
+    """
+    return str(uuid.uuid5(MESSYBRAINZ_NAMESPACE, data_sha256))
+
+
+_GET_ID_FROM_DATA_SHA256 = text("""SELECT s.gid
+                                     FROM recording s
+                                LEFT JOIN recording_json sj
+                                       ON sj.id = s.data
+                                    WHERE sj.data_sha256 = :data_sha256""")
 
-def get_id_from_recording(connection, data):
+
+@metrics.timed_db_function
+def get_id_from_recording(connection, data, data_sha256=None):
     """ Returns the Recording MessyBrainz ID for recording with specified data
 
     Args:
         connection: the sqlalchemy db connection to be used to execute queries
         data (dict): the recording data dict submitted to MessyBrainz
+        data_sha256 (bytes): the data sha256 digest of the recording, computed from
+                             the data if None
 
     Returns:
         the MessyBrainz ID of the recording with passed data if it exists, None otherwise
     """
-    _, data_json = convert_to_messybrainz_json(data)
-    data_sha256 = sha256(data_json.encode("utf-8")).hexdigest()
-
-    query = text("""SELECT s.gid
-                      FROM recording s
-                 LEFT JOIN recording_json sj
-                        ON sj.id = s.data
-                     WHERE sj.data_sha256 = :data_sha256""")
-    result = connection.execute(query, data_sha256=data_sha256)
+    if data_sha256 is None:
+        data_sha256 = bytes.fromhex(get_data_sha256(data))
+
+    result = connection.execute(_GET_ID_FROM_DATA_SHA256, data_sha256=data_sha256)
     if result.rowcount:
         return result.fetchone()["gid"]
     else:
         return None
 
 
-def submit_recording(connection, data):
+_GET_IDS_FROM_DATA_SHA256S = text("""SELECT sj.data_sha256
+                                          , s.gid
+                                       FROM recording s
+                                       JOIN recording_json sj
+                                         ON sj.id = s.data
+                                      WHERE sj.data_sha256 = ANY(:data_sha256s)""")
+
+
+@metrics.timed_db_function
+def get_ids_from_data_sha256s(connection, data_sha256s):
+    """ Returns the Recording MessyBrainz IDs of the recordings with the specified
+        data hashes, in a single query.
+
+    Args:
+        connection: the sqlalchemy db connection to be used to execute queries
+        data_sha256s (list): the data hashes, as returned by get_data_sha256
+
+    Returns:
+        dict: the MessyBrainz IDs keyed by data hash, hashes which don't exist are left out
+    """
+    if not data_sha256s:
+        return {}
+
+    result = connection.execute(_GET_IDS_FROM_DATA_SHA256S, {"data_sha256s": [bytes.fromhex(h) for h in data_sha256s]})
+    return {bytes(row["data_sha256"]).hex(): str(row["gid"]) for row in result}
+
+
+_INSERT_RECORDING_JSON = text("""INSERT INTO recording_json (data, data_sha256, meta_sha256)
+                                      VALUES (:data, :data_sha256, :meta_sha256)
+                                   RETURNING id""")
+
+
+@metrics.timed_db_function
+def submit_recording(connection, data, gid=None, json_and_hashes=None):
     """ Submits a new recording to MessyBrainz.
 
     Args:
         connection: the sqlalchemy db connection to execute queries with
         data (dict): the recording data
+        gid (str): the Recording MessyBrainz ID to use, a random one is generated if None
+        json_and_hashes (tuple): the result of get_recording_json_and_hashes for the data,
+                                 computed from the data if None
 
     Returns:
         the Recording MessyBrainz ID of the data
     """
-    data_json, sha256_json = convert_to_messybrainz_json(data)
-    data_sha256 = sha256(sha256_json.encode("utf-8")).hexdigest()
+    data_json, data_sha256, meta_sha256 = json_and_hashes or get_recording_json_and_hashes(data)
 
-    meta = {"artist": data["artist"], "title": data["title"]}
-    meta_json, meta_sha256_json = convert_to_messybrainz_json(meta)
-    meta_sha256 = sha256(meta_sha256_json.encode("utf-8")).hexdigest()
-
-    artist = get_artist_credit(connection, data["artist"])
-    if not artist:
-        artist = add_artist_credit(connection, data["artist"])
-    if "release" in data:
-        release = get_release(connection, data["release"])
-        if not release:
-            release = add_release(connection, data["release"])
-    else:
-        release = None
-    query = text("""INSERT INTO recording_json (data, data_sha256, meta_sha256)
-                         VALUES (:data, :data_sha256, :meta_sha256)
-                      RETURNING id""")
-    result = connection.execute(query, {
+    artist = add_artist_credit(connection, data["artist"])
+    release = add_release(connection, data["release"]) if "release" in data else None
+    result = connection.execute(_INSERT_RECORDING_JSON, {
         "data": data_json,
         "data_sha256": data_sha256,
         "meta_sha256": meta_sha256,
     })
     id = result.fetchone()["id"]
-    gid = str(uuid.uuid4())
-    query = text("""INSERT INTO recording (gid, data, artist, release, submitted)
-                         VALUES (:gid, :data, :artist, :release, now())""")
-    connection.execute(query, {
+    if gid is None:
+        gid = str(uuid.uuid4())
+    _insert_recording(connection, gid, id, artist, release)
+
+    return gid
+
+
+_INSERT_RECORDING_JSON_IF_NEW = text("""INSERT INTO recording_json (data, data_sha256, meta_sha256)
+                                             VALUES (:data, :data_sha256, :meta_sha256)
+                                        ON CONFLICT (data_sha256) DO NOTHING
+                                          RETURNING id""")
+
+
+@metrics.timed_db_function
+def get_or_submit_recording(connection, data, json_and_hashes=None):
+    """ Returns the Recording MessyBrainz ID of the recording with the specified data,
+        submitting it first if it doesn't exist yet.
+
+    If deterministic MSIDs are enabled, the recording is inserted straight away and
+    only looked up if it turns out to exist already.
+
+    Args:
+        connection: the sqlalchemy db connection to execute queries with
+        data (dict): the recording data
+        json_and_hashes (tuple): the result of get_recording_json_and_hashes for the data,
+                                 computed from the data if None
+
+    Returns:
+        (str, bool): the Recording MessyBrainz ID and whether the recording was added
+    """
+    json_and_hashes = json_and_hashes or get_recording_json_and_hashes(data)
+    data_json, data_sha256, meta_sha256 = json_and_hashes
+    if not deterministic_msids:
+        gid = get_id_from_recording(connection, data, data_sha256=data_sha256)
+        if gid:
+            return str(gid), False
+        return submit_recording(connection, data, json_and_hashes=json_and_hashes), True
+
+    result = connection.execute(_INSERT_RECORDING_JSON_IF_NEW, {
+        "data": data_json,
+        "data_sha256": data_sha256,
+        "meta_sha256": meta_sha256,
+    })
+    row = result.fetchone()
+    if not row:
+        # The recording exists, it may have a random MessyBrainz ID from before
+        # deterministic MSIDs were enabled so it has to be looked up.
+        return str(get_id_from_recording(connection, data, data_sha256=data_sha256)), False
+
+    artist = add_artist_credit(connection, data["artist"])
+    release = add_release(connection, data["release"]) if "release" in data else None
+    gid = get_recording_gid_from_sha256(data_sha256.hex())
+    _insert_recording(connection, gid, row["id"], artist, release)
+    return gid, True
+
+
+_ADD_RECORDING_ALIAS = text("""INSERT INTO recording (gid, data, artist, release, submitted,
+                                                      recording_mbid, artist_mbids, release_mbid)
+                                    SELECT :alias_id, data, artist, release, now(),
+                                           recording_mbid, artist_mbids, release_mbid
+                                      FROM recording
+                                     WHERE gid = :messybrainz_id
+                               ON CONFLICT (gid) DO NOTHING""")
+
+
+@metrics.timed_db_function
+def add_recording_alias(connection, messybrainz_id, alias_id):
+    """ Adds a second Recording MessyBrainz ID for an existing recording, which
+        loads the same data. Does nothing if the alias exists already.
+
+    Args:
+        connection: the sqlalchemy db connection to execute queries with
+        messybrainz_id (str): the Recording MessyBrainz ID of the existing recording
+        alias_id (str): the Recording MessyBrainz ID to add
+    """
+    connection.execute(_ADD_RECORDING_ALIAS, messybrainz_id=messybrainz_id, alias_id=alias_id)
+
+
+def get_recording_json_and_hashes(data):
+    """ Returns the MessyBrainz JSON of the recording data along with its data and meta
+        sha256 digests (bytes). It can be computed ahead of the database functions
+        which take it as their json_and_hashes argument.
+    """
+    data_json, sha256_json = convert_to_messybrainz_json(data)
+    data_sha256 = sha256(sha256_json.encode("utf-8")).digest()
+    meta_sha256 = bytes.fromhex(get_meta_sha256(data))
+
+    return data_json, data_sha256, meta_sha256
+
+
+_INSERT_RECORDING = text("""INSERT INTO recording (gid, data, artist, release, submitted)
+                                 VALUES (:gid, :data, :artist, :release, now())""")
+
+
+def _insert_recording(connection, gid, data_id, artist, release):
+    connection.execute(_INSERT_RECORDING, {
         "gid": gid,
-        "data": id,
+        "data": data_id,
         "artist": artist,
         "release": release,
     })
 
-    return gid
 
-def load_recording(connection, messybrainz_id):
+_LOAD_RECORDING = text("""SELECT rj.data::text AS data
+                               , r.recording_mbid
+                               , r.artist_mbids
+                               , r.release_mbid
+                               , r.artist
+                               , r.release
+                               , r.gid
+                            FROM recording r
+                            JOIN recording_json rj
+                              ON rj.id = r.data
+                           WHERE r.gid = :gid""")
+
+
+@metrics.timed_db_function
+def load_recording(connection, messybrainz_id, raw_payload=False):
     """ Return data for a recording with specified MessyBrainz ID.
 
     Args:
         connection: sqlalchemy connection to execute db queries with
         messybrainz_id (uuid): the MessyBrainz ID of the recording
+        raw_payload (bool): if True, the payload is returned as the RawJSON text
+                            of the stored JSONB, so that it can be written to a
+                            response without being decoded and encoded again
 
     Returns:
         dict: the recording data for the recording with specified MessyBrainz ID
     """
 
-    query = text("""SELECT rj.data
-                         , d.recording_mbid
-                         , r.artist
-                         , r.release
-                         , r.gid
-                      FROM recording_json rj
-                 LEFT JOIN recording r
-                        ON rj.id = r.data
-                 LEFT JOIN recording_cluster rc
-                        ON rc.recording_gid = r.gid
-                 LEFT JOIN recording_redirect d
-                        ON d.recording_cluster_id = rc.cluster_id
-                     WHERE r.gid = :gid""")
-    result = connection.execute(query, {"gid": str(messybrainz_id)})
+    result = connection.execute(_LOAD_RECORDING, {"gid": str(messybrainz_id)})
 
     row = result.fetchone()
     if not row:
         raise exceptions.NoDataFoundException
     result = {}
-    result["payload"] = row["data"]
-    result["ids"] = {"recording_mbid": "", "artist_mbids": [], "release_mbid": ""}
-    result["ids"]["artist_msid"] = str(row["artist"])
-    result["ids"]["release_msid"] = str(row["release"]) if row["release"] else None
-    result["ids"]["recording_msid"] = str(row["gid"])
+    result["payload"] = RawJSON(row["data"]) if raw_payload else json.loads(row["data"])
+    result["ids"] = _get_ids_from_row(row)
     return result
 
 
+_LOAD_RECORDING_IDS = text("""SELECT r.recording_mbid
+                                   , r.artist_mbids
+                                   , r.release_mbid
+                                   , r.artist
+                                   , r.release
+                                   , r.gid
+                                FROM recording r
+                               WHERE r.gid = ANY(CAST(:gids AS UUID[]))""")
+
+
+@metrics.timed_db_function
+def load_recording_ids(connection, messybrainz_ids):
+    """ Returns the MessyBrainz IDs and resolved MBIDs of the recordings with the
+        specified MessyBrainz IDs, without loading their data.
+
+    Args:
+        connection: sqlalchemy connection to execute db queries with
+        messybrainz_ids (list): the MessyBrainz IDs of the recordings
+
+    Returns:
+        dict: the ids of each recording (as in the "ids" key returned by load_recording)
+              keyed by MessyBrainz ID, recordings which don't exist are left out
+    """
+    if not messybrainz_ids:
+        return {}
+
+    result = connection.execute(_LOAD_RECORDING_IDS, {"gids": [str(messybrainz_id) for messybrainz_id in messybrainz_ids]})
+    return {str(row["gid"]): _get_ids_from_row(row) for row in result}
+
+
+def _get_ids_from_row(row):
+    return {
+        "recording_mbid": str(row["recording_mbid"]) if row["recording_mbid"] else "",
+        "artist_mbids": [str(mbid) for mbid in row["artist_mbids"] or []],
+        "release_mbid": str(row["release_mbid"]) if row["release_mbid"] else "",
+        "artist_msid": str(row["artist"]),
+        "release_msid": str(row["release"]) if row["release"] else None,
+        "recording_msid": str(row["gid"]),
+    }
+
+
+# Queries which store the MBIDs that the clusters of each recording's recording,
+# artist credit or release redirect to in the recording row. Only the recordings
+# whose entity is clustered are looked at. A cluster which redirects to more than
+# one MBID (an anomaly) is ambiguous, so its recordings store NULL.
+_UPDATE_RESOLVED_MBIDS = {
+    "recording": text("""
+        UPDATE recording r
+           SET recording_mbid = resolved.recording_mbid
+          FROM (SELECT rc.recording_gid
+                     , CASE WHEN count(DISTINCT rr.recording_mbid) = 1
+                            THEN (array_agg(rr.recording_mbid))[1]
+                        END AS recording_mbid
+                  FROM recording_cluster rc
+                  JOIN recording_redirect rr
+                    ON rr.recording_cluster_id = rc.cluster_id
+              GROUP BY rc.recording_gid
+               ) resolved
+         WHERE r.gid = resolved.recording_gid
+           AND r.recording_mbid IS DISTINCT FROM resolved.recording_mbid
+    """),
+    "artist_credit": text("""
+        UPDATE recording r
+           SET artist_mbids = resolved.artist_mbids
+          FROM (SELECT acc.artist_credit_gid
+                     , CASE WHEN count(DISTINCT acr.artist_mbids) = 1
+                            THEN min(acr.artist_mbids)
+                        END AS artist_mbids
+                  FROM artist_credit_cluster acc
+                  JOIN artist_credit_redirect acr
+                    ON acr.artist_credit_cluster_id = acc.cluster_id
+              GROUP BY acc.artist_credit_gid
+               ) resolved
+         WHERE r.artist = resolved.artist_credit_gid
+           AND r.artist_mbids IS DISTINCT FROM resolved.artist_mbids
+    """),
+    "release": text("""
+        UPDATE recording r
+           SET release_mbid = resolved.release_mbid
+          FROM (SELECT relc.release_gid
+                     , CASE WHEN count(DISTINCT relr.release_mbid) = 1
+                            THEN (array_agg(relr.release_mbid))[1]
+                        END AS release_mbid
+                  FROM release_cluster relc
+                  JOIN release_redirect relr
+                    ON relr.release_cluster_id = relc.cluster_id
+              GROUP BY relc.release_gid
+               ) resolved
+         WHERE r.release = resolved.release_gid
+           AND r.release_mbid IS DISTINCT FROM resolved.release_mbid
+    """),
+}
+
+_CLEAR_RESOLVED_MBIDS = {
+    "recording": text("UPDATE recording SET recording_mbid = NULL WHERE recording_mbid IS NOT NULL"),
+    "artist_credit": text("UPDATE recording SET artist_mbids = NULL WHERE artist_mbids IS NOT NULL"),
+    "release": text("UPDATE recording SET release_mbid = NULL WHERE release_mbid IS NOT NULL"),
+}
+
+
+@metrics.timed_db_function
+def update_resolved_mbids(connection, entity):
+    """ Stores the MBIDs that the clusters of the recording, artist credit or release
+        of each recording redirect to in the recording row, so that load_recording
+        doesn't have to resolve them. Only the recordings whose MBIDs changed are
+        updated. If a cluster redirects to more than one MBID, NULL is stored.
+
+    Args:
+        connection: sqlalchemy connection to execute db queries with
+        entity (str): the clustered entity, "recording", "artist_credit" or "release"
+
+    Returns:
+        int: the number of updated recordings
+    """
+    return connection.execute(_UPDATE_RESOLVED_MBIDS[entity]).rowcount
+
+
+@metrics.timed_db_function
+def clear_resolved_mbids(connection, entity):
+    """ Clears the MBIDs stored by update_resolved_mbids for an entity, once its
+        cluster and redirect tables have been truncated.
+
+    Args:
+        connection: sqlalchemy connection to execute db queries with
+        entity (str): the clustered entity, "recording", "artist_credit" or "release"
+
+    Returns:
+        int: the number of updated recordings
+    """
+    return connection.execute(_CLEAR_RESOLVED_MBIDS[entity]).rowcount
+
+
+_INSERT_RECORDING_CLUSTER = text("""INSERT INTO recording_cluster (cluster_id, gid)
+                                         VALUES (:cluster_id, :gid)""")
+
+_INSERT_RECORDING_REDIRECT = text("""INSERT INTO recording_redirect (recording_cluster_id, recording_mbid)
+                                          VALUES (:cluster_id, :mbid)""")
+
+
+@metrics.timed_db_function
 def link_recording_to_recording_id(connection, msid, mbid):
     """ Link a MessyBrainz recording to specified MusicBrainz Recording ID.
 
@@ -227,16 +691,12 @@ def link_recording_to_recording_id(connection, msid, mbid):
         msid (uuid): the Recording MessyBrainz ID
         mbid (uuid): the Recording MusicBrainz ID
     """
-    query = text("""INSERT INTO recording_cluster (cluster_id, gid)
-                         VALUES (:cluster_id, :gid)""")
-    connection.execute(query, {
+    connection.execute(_INSERT_RECORDING_CLUSTER, {
         "cluster_id": msid,
         "gid": msid,
     })
 
-    query = text("""INSERT INTO recording_redirect (recording_cluster_id, recording_mbid)
-                         VALUES (:cluster_id, :mbid)""")
-    connection.execute(query, {
+    connection.execute(_INSERT_RECORDING_REDIRECT, {
         "cluster_id": msid,
         "mbid": mbid,
     })
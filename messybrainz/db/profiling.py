@@ -0,0 +1,108 @@
+""" Opt-in per-query profiling for the MessyBrainz database engine.
+
+Timings are recorded with the SQLAlchemy cursor execution events and are
+keyed by a fingerprint of the statement (whitespace collapsed and literals
+replaced by '?'), so that the same query executed with different parameters
+is only counted once.
+"""
+import logging
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# fingerprint -> [number of executions, total time, max time] (times in seconds)
+_stats = {}
+_slow_query_threshold = None
+
+
+def fingerprint(statement):
+    """ Returns the fingerprint of an SQL statement."""
+    statement = _LITERAL_RE.sub("?", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def redact_parameters(parameters):
+    """ Returns a printable version of the statement parameters which only
+        contains the parameter names, so that no submitted data gets logged.
+    """
+    if isinstance(parameters, dict):
+        return {key: "<redacted>" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], dict):
+            return "{0} x {1}".format(len(parameters), redact_parameters(parameters[0]))
+        return ["<redacted>"] * len(parameters)
+    return "<redacted>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    key = fingerprint(statement)
+    stats = _stats.setdefault(key, [0, 0.0, 0.0])
+    stats[0] += 1
+    stats[1] += elapsed
+    stats[2] = max(stats[2], elapsed)
+
+    if _slow_query_threshold is not None and elapsed * 1000 >= _slow_query_threshold:
+        logger.warning("Slow query ({0:.1f} ms): {1} Parameters: {2}".format(
+            elapsed * 1000, key, redact_parameters(parameters)))
+
+
+def enable(slow_query_threshold=None):
+    """ Starts recording timings for all the queries executed by any engine.
+
+    Args:
+        slow_query_threshold (float): queries slower than this number of milliseconds
+                                      are logged, None to not log slow queries.
+    """
+    global _slow_query_threshold
+    _slow_query_threshold = slow_query_threshold
+    reset()
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def disable():
+    """ Stops recording query timings."""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def reset():
+    """ Clears the recorded query timings."""
+    _stats.clear()
+
+
+def get_top_queries(limit=10):
+    """ Returns the queries which took the most total time.
+
+    Returns:
+        list of (fingerprint, number of executions, total time, max time) tuples,
+        times are in seconds.
+    """
+    top = sorted(_stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [(key, count, total, max_time) for key, (count, total, max_time) in top]
+
+
+def format_summary(limit=10):
+    """ Returns a human readable summary of the queries which took the most total time."""
+    lines = ["Top {0} queries by total time:".format(limit)]
+    for key, count, total, max_time in get_top_queries(limit):
+        lines.append("-" * 80)
+        lines.append("total: {0:.3f} s, calls: {1}, avg: {2:.2f} ms, max: {3:.2f} ms".format(
+            total, count, total * 1000 / count, max_time * 1000))
+        lines.append(key)
+    return "\n".join(lines)
@@ -1,4 +1,5 @@
 from messybrainz import db
+from messybrainz.db import data
 from sqlalchemy import text
 
 
@@ -92,11 +93,14 @@ def link_recording_mbid_to_recording_msid(connection, cluster_id, mbid):
 
 
 def truncate_recording_cluster_and_recording_redirect_table():
-    """Truncates recording_cluster and recording_redirect tables."""
+    """Truncates recording_cluster and recording_redirect tables and clears the
+       resolved recording MBIDs of the recordings.
+    """
 
     with db.engine.begin() as connection:
         connection.execute(text("""TRUNCATE TABLE recording_cluster"""))
         connection.execute(text("""TRUNCATE TABLE recording_redirect"""))
+        data.clear_resolved_mbids(connection, "recording")
 
 
 def get_recording_cluster_id_using_recording_mbid(connection, recording_mbid):
@@ -146,5 +150,6 @@ def create_recording_clusters():
                     clusters_add_to_redirect +=1
                 insert_recording_cluster(connection, cluster_id, gids)
                 clusters_modified += 1
+        data.update_resolved_mbids(connection, "recording")
 
     return clusters_modified, clusters_add_to_redirect
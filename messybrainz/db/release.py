@@ -1,7 +1,9 @@
 from brainzutils.musicbrainz_db.exceptions import NoDataFoundException
 from messybrainz import db
+from messybrainz.db import data
 from sqlalchemy import text
 import brainzutils.musicbrainz_db.release as mb_release
+import json
 import logging
 import messybrainz.db.common as db_common
 
@@ -117,12 +119,34 @@ def link_release_mbid_to_release_msid(connection, cluster_id, mbid):
     })
 
 
+def link_release_mbids_to_release_cluster_ids(connection, links):
+    """Links the release mbids to the cluster_ids in a single bulk insert.
+
+    Args:
+        connection: the sqlalchemy db connection to be used to execute queries
+        links (list): list of (cluster_id, mbid) tuples.
+    """
+
+    values = [
+        {"cluster_id": cluster_id, "mbid": mbid} for cluster_id, mbid in links
+    ]
+
+    connection.execute(text("""
+        INSERT INTO release_redirect (release_cluster_id, release_mbid)
+             VALUES (:cluster_id, :mbid)
+    """), values
+    )
+
+
 def truncate_release_cluster_and_release_redirect_table():
-    """Truncates release_cluster and release_redirect tables."""
+    """Truncates release_cluster and release_redirect tables and clears the
+       resolved release MBIDs of the recordings.
+    """
 
     with db.engine.begin() as connection:
         connection.execute(text("""TRUNCATE TABLE release_cluster"""))
         connection.execute(text("""TRUNCATE TABLE release_redirect"""))
+        data.clear_resolved_mbids(connection, "release")
 
 
 def get_release_cluster_id_using_release_mbid(connection, release_mbid):
@@ -151,46 +175,29 @@ def get_release_cluster_id_using_release_mbid(connection, release_mbid):
 
 
 
-def fetch_release_left_to_cluster(connection):
-    """ Returns a list of release MBID for the release MBIDs that
-        were not added to redirect table after executing
-        the first phase of clustering. These are anomalies.
+def fetch_release_mbids_and_cluster_ids_left_to_cluster(connection):
+    """ Returns a list of (release MBID, cluster IDs) tuples for the release
+        MBIDs that were not added to redirect table after executing the first
+        phase of clustering. The cluster IDs are the distinct clusters of the
+        release MSIDs which have this release MBID. These are anomalies.
     """
 
     result = connection.execute(text("""
-        SELECT DISTINCT recj.data ->> 'release_mbid'
-                   FROM recording AS rec
-                   JOIN recording_json AS recj
-                     ON rec.data = recj.id
-              LEFT JOIN release_redirect AS relr
-                     ON (recj.data ->> 'release_mbid')::uuid = relr.release_mbid
-                  WHERE recj.data ->> 'release_mbid' IS NOT NULL
-                    AND relr.release_mbid IS NULL
+        SELECT (recj.data ->> 'release_mbid')::uuid AS release_mbid
+             , array_agg(DISTINCT relc.cluster_id) AS cluster_ids
+          FROM recording AS rec
+          JOIN recording_json AS recj
+            ON rec.data = recj.id
+          JOIN release_cluster AS relc
+            ON rec.release = relc.release_gid
+     LEFT JOIN release_redirect AS relr
+            ON (recj.data ->> 'release_mbid')::uuid = relr.release_mbid
+         WHERE recj.data ->> 'release_mbid' IS NOT NULL
+           AND relr.release_mbid IS NULL
+      GROUP BY (recj.data ->> 'release_mbid')::uuid
     """))
 
-    return [r[0] for r in result]
-
-
-def get_release_gids_from_recording_json_using_mbid(connection, release_mbid):
-    """Returns release MSIDs using a release MBID.
-    Args:
-        connection: the sqlalchemy db connection to be used to execute queries
-        release_mbid (UUID): a release MBID for which gids are to be fetched.
-    Returns:
-        gids(list): list of release gids for a given release MBID.
-    """
-
-    result = connection.execute(text("""
-        SELECT DISTINCT r.release
-                   FROM recording AS r
-                   JOIN recording_json AS rj
-                     ON r.data = rj.id
-                  WHERE :release_mbid = (rj.data ->> 'release_mbid')::uuid
-    """), {
-        "release_mbid": release_mbid,
-    })
-
-    return [release_gid[0] for release_gid in result]
+    return [(r['release_mbid'], r['cluster_ids']) for r in result]
 
 
 def get_cluster_id_using_msid(connection, msid):
@@ -243,15 +250,30 @@ def get_release_mbids_using_msid(connection, release_msid):
 def get_recordings_metadata_using_release_mbid(connection, mbid):
     """Returns the recording Metadata from recording_json table using release MBID."""
 
+    return get_recordings_metadata_using_release_mbids(connection, [mbid])[0]
+
+
+def get_recordings_metadata_using_release_mbids(connection, mbids):
+    """Returns the recording Metadata from recording_json table for each of the
+       given release MBIDs, in a single query.
+
+    Returns:
+        list: a list of recordings Metadata for each release MBID, in the order of mbids.
+    """
+
     recordings = connection.execute(text("""
-        SELECT recording_json.data
-          FROM recording_json
-         WHERE (data ->> 'release_mbid')::uuid = :mbid
+        SELECT m.i, rj.data
+          FROM jsonb_array_elements_text(CAST(:mbids AS JSONB)) WITH ORDINALITY AS m(mbid, i)
+          JOIN recording_json AS rj
+            ON (rj.data ->> 'release_mbid')::uuid = m.mbid::uuid
     """), {
-        "mbid": mbid,
+        "mbids": json.dumps([str(mbid) for mbid in mbids]),
     })
 
-    return [recording[0] for recording in recordings]
+    recordings_metadata = [[] for _ in mbids]
+    for i, recording in recordings:
+        recordings_metadata[i - 1].append(recording)
+    return recordings_metadata
 
 
 def create_release_clusters_without_considering_anomalies(connection):
@@ -272,7 +294,7 @@ def create_release_clusters_without_considering_anomalies(connection):
         get_release_cluster_id_using_release_mbid,
         link_release_mbid_to_release_msid,
         insert_release_cluster,
-        get_recordings_metadata_using_release_mbid
+        get_recordings_metadata_using_release_mbids
     )
 
 
@@ -288,11 +310,9 @@ def create_release_clusters_for_anomalies(connection):
     """
 
     return db_common.create_entity_clusters_for_anomalies(connection,
-        fetch_release_left_to_cluster,
-        get_release_gids_from_recording_json_using_mbid,
-        get_cluster_id_using_msid,
-        link_release_mbid_to_release_msid,
-        get_recordings_metadata_using_release_mbid
+        fetch_release_mbids_and_cluster_ids_left_to_cluster,
+        link_release_mbids_to_release_cluster_ids,
+        get_recordings_metadata_using_release_mbids
     )
 
 
@@ -307,6 +327,7 @@ def create_release_clusters():
     return db.common.create_entity_clusters(
         create_release_clusters_without_considering_anomalies,
         create_release_clusters_for_anomalies,
+        "release",
     )
 
 
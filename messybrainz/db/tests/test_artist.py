@@ -362,9 +362,9 @@ class ArtistTestCase(DatabaseTestCase):
             self.assertEqual(cluster_id, cluster_id_from_data)
 
 
-    def test_fetch_artist_credits_left_to_cluster(self):
-        """Tests if artist_credits left to cluster after first
-           pass are correctly fetched.
+    def test_fetch_artist_credits_and_cluster_ids_left_to_cluster(self):
+        """Tests if artist_credits left to cluster after first pass
+           are fetched along with the cluster IDs of their MSIDs.
         """
 
         msb_listens = self._load_test_data("recordings_for_testing_artist_clusters.json")
@@ -372,16 +372,13 @@ class ArtistTestCase(DatabaseTestCase):
 
         with db.engine.begin() as connection:
             artist.create_artist_credit_clusters_without_considering_anomalies(connection)
-            # In the data used from recordings_for_testing_artist_clusters
-            # the recordings for artist 'James Morrison' represents anomaly
-            # as two James Morrison exist with different artist MBIDs
-
-            artist_left = artist.fetch_artist_credits_left_to_cluster(connection)
+            artist_left = artist.fetch_artist_credits_and_cluster_ids_left_to_cluster(connection)
             self.assertEqual(len(artist_left), 1)
 
-            # 'James Morrison' with artist MBID '88a8d8a9-7c9b-4f7b-8700-7f0f7a503688'
-            # was clustered in the first phase.
-            self.assertListEqual(artist_left, [[UUID("b49a9595-3576-44bb-8ac0-e26d3f5b42ff")]])
+            artist_mbids, cluster_ids = artist_left[0]
+            self.assertListEqual(artist_mbids, [UUID("b49a9595-3576-44bb-8ac0-e26d3f5b42ff")])
+            gid_from_data = UUID(data.get_artist_credit(connection, "James Morrison"))
+            self.assertListEqual(cluster_ids, [artist.get_cluster_id_using_msid(connection, gid_from_data)])
 
 
     def test_get_cluster_id_using_msid(self):
@@ -400,26 +397,6 @@ class ArtistTestCase(DatabaseTestCase):
             self.assertEqual(cluster_id_1, cluster_id_2)
 
 
-    def test_get_artist_gids_from_recording_json_using_mbids(self):
-        """Tests if artist_gids are correctly fetched using a given list of artist MBIDs"""
-
-        msb_listens = self._load_test_data("recordings_for_testing_artist_clusters.json")
-        submit_listens(msb_listens)
-
-        with db.engine.begin() as connection:
-            mbids = [
-                        UUID("859d0860-d480-4efd-970c-c05d5f1776b8"),
-                        UUID("f82bcf78-5b69-4622-a5ef-73800768d9ac"),
-                    ]
-            gids = set(artist.get_artist_gids_from_recording_json_using_mbids(connection, mbids))
-            gids_from_data = set([
-                UUID(data.get_artist_credit(connection, "Jay‐Z & Beyoncé")),
-                UUID(data.get_artist_credit(connection, "Jay‐Z and Beyoncé"))
-            ])
-
-            self.assertSetEqual(gids, gids_from_data)
-
-
     def test_get_artist_mbids_using_msid(self):
         """Test if artist_mbids are fetched correctly for given MSID"""
 
@@ -654,6 +631,32 @@ class ArtistTestCase(DatabaseTestCase):
             self.assertDictEqual(recording_1, recordings[0])
 
 
+    def test_get_recordings_metadata_using_artist_mbids_list(self):
+        """ Tests if recordings metadata is fetched correctly for each of the lists of artist MBIDs. """
+
+        recording_1 = {
+            "artist": "Jay‐Z & Beyoncé",
+            "artist_mbids": ["859d0860-d480-4efd-970c-c05d5f1776b8", "f82bcf78-5b69-4622-a5ef-73800768d9ac"],
+            "title": "'03 Bonnie and Clyde",
+        }
+        recording_2 = {
+            "artist": "Sigur Rós",
+            "artist_mbids": ["f6f2a2e1-4f4e-4ee5-9f2a-2f0bb1e2b4b6"],
+            "title": "Hoppípolla",
+        }
+        submit_listens([recording_1, recording_2])
+        with db.engine.begin() as connection:
+            recordings = artist.get_recordings_metadata_using_artist_mbids_list(connection, [
+                [UUID("f6f2a2e1-4f4e-4ee5-9f2a-2f0bb1e2b4b6")],
+                [UUID("859d0860-d480-4efd-970c-c05d5f1776b8")],
+                [UUID("859d0860-d480-4efd-970c-c05d5f1776b8"), UUID("f82bcf78-5b69-4622-a5ef-73800768d9ac")],
+            ])
+            self.assertEqual(len(recordings), 3)
+            self.assertListEqual(recordings[0], [recording_2])
+            self.assertListEqual(recordings[1], [])
+            self.assertListEqual(recordings[2], [recording_1])
+
+
     def test_fetch_unclustered_artist_mbids_using_recording_artist_join(self):
         """ Tests if artist MBIDs are fetched correctly using recording_artist_join table."""
 
@@ -703,69 +706,6 @@ class ArtistTestCase(DatabaseTestCase):
             self.assertSetEqual(set(gids), gids_from_data)
 
 
-    def test_fetch_artist_mbids_left_to_cluster_from_recording_artist_join(self):
-        """ Tests if artist MBIDs left to add to artist_credit_redirect table are
-            fetched correctly.
-        """
-
-        # The recordings for artist 'James Morrison' represents anomaly
-        # as two James Morrison exist with different artist MBIDs
-        recording_1 = {
-            "artist": "James Morrison",
-            "recording_mbid": "71fdb968-48c1-4406-a1f1-9dd2e9e37e0c",
-            "title": "6 Weeks",
-        }
-
-        recording_2 = {
-            "artist": "James Morrison",
-            "recording_mbid": "181d63e7-5ed3-4c6c-9018-dad36128d7a7",
-            "title": "A Brush With Bunj",
-        }
-
-        submit_listens([recording_1, recording_2])
-
-        with db.engine.begin() as connection:
-            artist.insert_artist_mbids(connection,
-                recording_1["recording_mbid"],
-                [UUID("88a8d8a9-7c9b-4f7b-8700-7f0f7a503688")]
-            )
-            artist.insert_artist_mbids(connection,
-                recording_2["recording_mbid"],
-                [UUID("b49a9595-3576-44bb-8ac0-e26d3f5b42ff")]
-            )
-            artist.create_clusters_using_fetched_artist_mbids_without_anomalies(connection)
-
-            artist_left = artist.fetch_artist_mbids_left_to_cluster_from_recording_artist_join(connection)
-            self.assertEqual(len(artist_left), 1)
-
-            # 'James Morrison' with artist MBID '88a8d8a9-7c9b-4f7b-8700-7f0f7a503688'
-            # was clustered in the first phase without considering anomalies.
-            self.assertListEqual(artist_left, [[UUID("b49a9595-3576-44bb-8ac0-e26d3f5b42ff")]])
-
-
-    def test_get_gids_from_recording_using_fetched_artist_mbids(self):
-        """ Tests if artist gids are correctly fetched from recording table using
-            artist MBIDs.
-        """
-
-        self._add_mbids_to_recording_artist_join()
-        msb_listens = self._load_test_data("recordings_for_clustering_using_fetched_artist_mbids.json")
-        submit_listens(msb_listens)
-
-        with db.engine.begin() as connection:
-            mbids = [
-                        UUID("859d0860-d480-4efd-970c-c05d5f1776b8"),
-                        UUID("f82bcf78-5b69-4622-a5ef-73800768d9ac"),
-                    ]
-            gids = set(artist.get_gids_from_recording_using_fetched_artist_mbids(connection, mbids))
-            gids_from_data = set([
-                UUID(data.get_artist_credit(connection, "Jay‐Z & Beyoncé")),
-                UUID(data.get_artist_credit(connection, "Jay‐Z and Beyoncé"))
-            ])
-
-            self.assertSetEqual(gids, gids_from_data)
-
-
     def test_get_recordings_metadata_using_artist_mbids_and_recording_artist_join(self):
         """ Tests if recordings metadata is correctly fetched using artist MBIDs and
             recording_artist_join table.
@@ -55,6 +55,91 @@ class DataTestCase(DatabaseTestCase):
             self.assertEqual(recording_msid, str(data.get_id_from_recording(connection, recording)))
 
 
+    def test_submit_recording_with_gid(self):
+        with db.engine.connect() as connection:
+            gid = data.get_recording_gid_from_sha256(data.get_data_sha256(recording))
+            recording_msid = data.submit_recording(connection, recording, gid=gid)
+            self.assertEqual(recording_msid, gid)
+            self.assertEqual(gid, str(data.get_id_from_recording(connection, recording_diff_case)))
+
+
+    def test_get_ids_from_data_sha256s(self):
+        with db.engine.connect() as connection:
+            recording_msid = data.submit_recording(connection, recording)
+            data_sha256 = data.get_data_sha256(recording)
+            missing_sha256 = data.get_data_sha256({'artist': 'Kanye West', 'title': 'Stronger'})
+            gids = data.get_ids_from_data_sha256s(connection, [data_sha256, missing_sha256])
+            self.assertDictEqual(gids, {data_sha256: recording_msid})
+
+
+    def test_get_ids_from_meta_sha256(self):
+        with db.engine.connect() as connection:
+            msid1 = data.submit_recording(connection, recording)
+            msid2 = data.submit_recording(connection, dict(recording_diff_case, release='Endless'))
+            data.submit_recording(connection, {'artist': 'Frank Ocean', 'title': 'Nikes'})
+            meta_sha256 = data.get_meta_sha256(recording)
+            self.assertEqual(meta_sha256, data.get_meta_sha256(recording_diff_case))
+
+            msids = sorted([msid1, msid2])
+            self.assertListEqual(data.get_ids_from_meta_sha256(connection, meta_sha256), msids)
+            self.assertListEqual(data.get_ids_from_meta_sha256(connection, meta_sha256, count=1), msids[:1])
+            self.assertListEqual(data.get_ids_from_meta_sha256(connection, meta_sha256, after=msids[0]), msids[1:])
+
+            missing_sha256 = data.get_meta_sha256({'artist': 'Kanye West', 'title': 'Stronger'})
+            ids = data.get_ids_from_meta_sha256s(connection, [meta_sha256, missing_sha256])
+            self.assertDictEqual(ids, {meta_sha256: msids})
+
+
+    def test_get_or_submit_recording(self):
+        with db.engine.connect() as connection:
+            recording_msid, added = data.get_or_submit_recording(connection, recording)
+            self.assertTrue(added)
+            recording_msid_2, added = data.get_or_submit_recording(connection, recording_diff_case)
+            self.assertFalse(added)
+            self.assertEqual(recording_msid, recording_msid_2)
+
+
+    def test_get_or_submit_recording_with_json_and_hashes(self):
+        json_and_hashes = data.get_recording_json_and_hashes(recording)
+        self.assertEqual(json_and_hashes[1].hex(), data.get_data_sha256(recording))
+        with db.engine.connect() as connection:
+            recording_msid, added = data.get_or_submit_recording(connection, recording,
+                                                                 json_and_hashes=json_and_hashes)
+            self.assertTrue(added)
+            self.assertEqual(data.get_id_from_recording(connection, recording, data_sha256=json_and_hashes[1]),
+                             recording_msid)
+            self.assertEqual(data.get_or_submit_recording(connection, recording_diff_case,
+                                                          json_and_hashes=data.get_recording_json_and_hashes(recording_diff_case)),
+                             (recording_msid, False))
+
+
+    def test_get_or_submit_recording_deterministic_msids(self):
+        with db.engine.connect() as connection:
+            legacy_msid = data.submit_recording(connection, recording)
+            data.set_deterministic_msids(True)
+            try:
+                # Recordings submitted before keep their random MessyBrainz ID
+                self.assertEqual(data.get_or_submit_recording(connection, recording), (legacy_msid, False))
+
+                new_recording = {'artist': 'Kanye West', 'release': 'Graduation', 'title': 'Stronger'}
+                recording_msid, added = data.get_or_submit_recording(connection, new_recording)
+                self.assertTrue(added)
+                self.assertEqual(recording_msid,
+                    data.get_recording_gid_from_sha256(data.get_data_sha256(new_recording)))
+                self.assertEqual(data.get_artist_credit(connection, 'Kanye West'),
+                    data.get_artist_credit_gid_from_name('Kanye West'))
+                self.assertEqual(data.get_release(connection, 'Graduation'),
+                    data.get_release_gid_from_title('Graduation'))
+
+                # Adding the same artist credit again doesn't create a duplicate
+                self.assertEqual(data.add_artist_credit(connection, 'Kanye West'),
+                    data.get_artist_credit_gid_from_name('Kanye West'))
+                count = connection.execute("SELECT COUNT(*) FROM artist_credit WHERE name = 'Kanye West'")
+                self.assertEqual(count.fetchone()[0], 1)
+            finally:
+                data.set_deterministic_msids(False)
+
+
     def test_get_artist_credit(self):
         with db.engine.connect() as connection:
             recording_msid = data.submit_recording(connection, recording)
@@ -82,6 +167,20 @@ class DataTestCase(DatabaseTestCase):
             release_msid = data.add_release(connection, 'The College Dropout')
             self.assertEqual(release_msid, data.get_release(connection, 'The College Dropout'))
 
+    def test_add_artist_credit_and_release_existing(self):
+        """ Tests that adding an existing artist credit or release returns the existing ID.
+        """
+        with db.engine.connect() as connection:
+            artist_msid = data.add_artist_credit(connection, 'Kanye West')
+            self.assertEqual(data.add_artist_credit(connection, 'Kanye West'), artist_msid)
+            count = connection.execute("SELECT COUNT(*) FROM artist_credit WHERE name = 'Kanye West'")
+            self.assertEqual(count.fetchone()[0], 1)
+
+            release_msid = data.add_release(connection, 'The College Dropout')
+            self.assertEqual(data.add_release(connection, 'The College Dropout'), release_msid)
+            count = connection.execute("SELECT COUNT(*) FROM release WHERE title = 'The College Dropout'")
+            self.assertEqual(count.fetchone()[0], 1)
+
     def test_add_recording_different_cases(self):
         """ Tests that recordings with only case differences get the same MessyBrainz ID.
         """
@@ -95,6 +194,24 @@ class DataTestCase(DatabaseTestCase):
             recording_msid = data.submit_recording(connection, recording)
             result = data.load_recording(connection, recording_msid)
             self.assertDictEqual(result['payload'], recording)
+            result = data.load_recording(connection, recording_msid, raw_payload=True)
+            self.assertIsInstance(result['payload'], data.RawJSON)
+            self.assertDictEqual(json.loads(result['payload']), recording)
+
+    def test_add_recording_alias(self):
+        with db.engine.connect() as connection:
+            recording_msid = data.submit_recording(connection, recording)
+            alias_msid = '6ba092ae-aaf7-4154-b987-9eb9d05f8616'
+            data.add_recording_alias(connection, recording_msid, alias_msid)
+            data.add_recording_alias(connection, recording_msid, alias_msid)
+            self.assertDictEqual(data.load_recording(connection, alias_msid)['payload'], recording)
+
+    def test_load_recording_ids(self):
+        with db.engine.connect() as connection:
+            recording_msid = data.submit_recording(connection, recording)
+            missing_msid = '6ba092ae-aaf7-4154-b987-9eb9d05f8616'
+            ids = data.load_recording_ids(connection, [recording_msid, missing_msid])
+            self.assertDictEqual(ids, {recording_msid: data.load_recording(connection, recording_msid)['ids']})
 
     def test_convert_to_messybrainz_json(self):
         sorted_keys, transformed_json = data.convert_to_messybrainz_json(recording)
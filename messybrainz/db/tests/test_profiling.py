@@ -0,0 +1,33 @@
+import unittest
+
+from messybrainz.db import profiling
+
+
+class ProfilingTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        profiling.reset()
+
+    def test_fingerprint(self):
+        """Tests that the same query with different literals or whitespace has the same fingerprint."""
+
+        query_1 = """SELECT gid
+                       FROM recording
+                      WHERE id = 1 AND data ->> 'recording_mbid' = 'abc'"""
+        query_2 = "SELECT gid FROM recording WHERE id = 42 AND data ->> 'recording_mbid' = 'it''s'"
+        self.assertEqual(profiling.fingerprint(query_1), profiling.fingerprint(query_2))
+        self.assertEqual(profiling.fingerprint(query_1),
+            "SELECT gid FROM recording WHERE id = ? AND data ->> ? = ?")
+        self.assertEqual(profiling.fingerprint("SELECT data_sha256 FROM recording_json"),
+            "SELECT data_sha256 FROM recording_json")
+
+    def test_redact_parameters(self):
+        self.assertDictEqual(profiling.redact_parameters({"gid": "secret"}), {"gid": "<redacted>"})
+        self.assertEqual(profiling.redact_parameters([{"gid": "secret"}, {"gid": "other"}]),
+            "2 x {'gid': '<redacted>'}")
+
+    def test_get_top_queries(self):
+        profiling._stats["SELECT ?"] = [2, 0.5, 0.3]
+        profiling._stats["SELECT gid FROM recording"] = [1, 1.0, 1.0]
+        top = profiling.get_top_queries(limit=1)
+        self.assertListEqual(top, [("SELECT gid FROM recording", 1, 1.0, 1.0)])
@@ -3,12 +3,14 @@ from messybrainz import submit_listens_and_sing_me_a_sweet_song as submit_listen
 from messybrainz import db
 from messybrainz.db import data
 from messybrainz.db.testing import DatabaseTestCase
+from sqlalchemy import text
 from messybrainz.db.recording import fetch_distinct_recording_mbids,\
                                     fetch_unclustered_gids_for_recording_mbid,\
                                     link_recording_mbid_to_recording_msid,\
                                     insert_recording_cluster,\
                                     create_recording_clusters,\
-                                    get_recording_cluster_id_using_recording_mbid
+                                    get_recording_cluster_id_using_recording_mbid,\
+                                    truncate_recording_cluster_and_recording_redirect_table
 
 
 class RecordingTestCase(DatabaseTestCase):
@@ -153,3 +155,44 @@ class RecordingTestCase(DatabaseTestCase):
         clusters_modified, clusters_add_to_redirect = create_recording_clusters()
         self.assertEqual(clusters_modified, 2)
         self.assertEqual(clusters_add_to_redirect, 1)
+
+
+    def test_load_recording_resolved_recording_mbid(self):
+        """Tests that load_recording returns the recording MBID once the recording is clustered."""
+
+        recording = {
+            "artist": "Memphis Minnie",
+            "title": "Banana Man Blues",
+            "recording_mbid": "e1efdbee-2904-437f-b0e2-dbb4906b86d2",
+        }
+        recording_msid = submit_listens([recording])["payload"][0]["ids"]["recording_msid"]
+        with db.engine.connect() as connection:
+            self.assertEqual(data.load_recording(connection, recording_msid)["ids"]["recording_mbid"], "")
+
+        create_recording_clusters()
+        with db.engine.connect() as connection:
+            self.assertEqual(data.load_recording(connection, recording_msid)["ids"]["recording_mbid"],
+                             recording["recording_mbid"])
+
+        truncate_recording_cluster_and_recording_redirect_table()
+        with db.engine.connect() as connection:
+            self.assertEqual(data.load_recording(connection, recording_msid)["ids"]["recording_mbid"], "")
+
+
+    def test_update_resolved_mbids_ambiguous_cluster(self):
+        """Tests that no recording MBID is resolved for a cluster which redirects to more than one MBID."""
+
+        recording = {
+            "artist": "Memphis Minnie",
+            "title": "Banana Man Blues",
+            "recording_mbid": "e1efdbee-2904-437f-b0e2-dbb4906b86d2",
+        }
+        recording_msid = submit_listens([recording])["payload"][0]["ids"]["recording_msid"]
+        create_recording_clusters()
+        with db.engine.begin() as connection:
+            connection.execute(text("""
+                INSERT INTO recording_redirect (recording_cluster_id, recording_mbid)
+                     VALUES (:cluster_id, :recording_mbid)
+            """), cluster_id=recording_msid, recording_mbid="8ab0c57b-5a7f-4bba-91f8-ab06ab85c2a1")
+            self.assertEqual(data.update_resolved_mbids(connection, "recording"), 1)
+            self.assertEqual(data.load_recording(connection, recording_msid)["ids"]["recording_mbid"], "")
@@ -9,14 +9,14 @@ from messybrainz.db.release import fetch_unclustered_distinct_release_mbids,\
                                     link_release_mbid_to_release_msid,\
                                     get_release_cluster_id_using_release_mbid,\
                                     insert_release_cluster,\
-                                    fetch_release_left_to_cluster,\
+                                    fetch_release_mbids_and_cluster_ids_left_to_cluster,\
                                     create_release_clusters_without_considering_anomalies,\
                                     get_cluster_id_using_msid,\
                                     create_release_clusters,\
-                                    get_release_gids_from_recording_json_using_mbid,\
                                     get_release_mbids_using_msid,\
                                     create_release_clusters_for_anomalies,\
-                                    get_recordings_metadata_using_release_mbid
+                                    get_recordings_metadata_using_release_mbid,\
+                                    get_recordings_metadata_using_release_mbids
 from unittest.mock import patch
 from uuid import UUID
 
@@ -153,9 +153,9 @@ class ReleaseTestCase(DatabaseTestCase):
             self.assertEqual(len(release_gids), 0)
 
 
-    def test_fetch_release_left_to_cluster(self):
-        """Tests if release left to cluster after first
-           pass are correctly fetched.
+    def test_fetch_release_mbids_and_cluster_ids_left_to_cluster(self):
+        """Tests if release MBIDs left to cluster after first pass
+           are fetched along with the cluster IDs of their MSIDs.
         """
 
         msb_listens = self._load_test_data("recordings_for_release_clusters.json")
@@ -163,22 +163,15 @@ class ReleaseTestCase(DatabaseTestCase):
 
         with db.engine.begin() as connection:
             create_release_clusters_without_considering_anomalies(connection)
-            # In the data used from recordings_for_release_clusters
-            # the recordings for release 'The Blueprint\u00b2: The Gift & The Curse'
-            # represents anomaly as two release_mbids exists for this release
-            # (2c5e4198-24cf-3c95-a16e-83be8e877dfa, 801678aa-5d30-4342-8227-e9618f164cca)
-            # and release 'The Notorious KIM' also represents two release_mbids
-            # (e8c8bbf8-15c1-477f-af5b-2c1479af037e, 09701309-2f7b-4537-a066-daa1c79b3f06)
-
-            release_left = fetch_release_left_to_cluster(connection)
-            self.assertEqual(len(release_left), 2)
-
-            # 'The Blueprint\u00b2: The Gift & The Curse' with release MBID '2c5e4198-24cf-3c95-a16e-83be8e877dfa'
-            # was clustered in the first phase, The Notorious KIM' with release MBID
-            # '09701309-2f7b-4537-a066-daa1c79b3f06' was clustered in first phase.
+            release_left = dict(fetch_release_mbids_and_cluster_ids_left_to_cluster(connection))
+            self.assertSetEqual(set(release_left), set([
+                UUID('801678aa-5d30-4342-8227-e9618f164cca'),
+                UUID('e8c8bbf8-15c1-477f-af5b-2c1479af037e'),
+            ]))
 
-            self.assertSetEqual(set(release_left),
-                set(['801678aa-5d30-4342-8227-e9618f164cca', 'e8c8bbf8-15c1-477f-af5b-2c1479af037e'])
+            gid_from_data = data.get_release(connection, "The Notorious KIM")
+            self.assertListEqual(release_left[UUID('e8c8bbf8-15c1-477f-af5b-2c1479af037e')],
+                [get_cluster_id_using_msid(connection, gid_from_data)]
             )
 
 
@@ -198,23 +191,6 @@ class ReleaseTestCase(DatabaseTestCase):
             self.assertEqual(cluster_id_1, cluster_id_2)
 
 
-    def test_get_release_gids_from_recording_json_using_mbids(self):
-        """Tests if release_gids are correctly fetched using a given release MBID"""
-
-        msb_listens = self._load_test_data("recordings_for_release_clusters.json")
-        submit_listens(msb_listens)
-
-        with db.engine.begin() as connection:
-            mbid = UUID("2c5e4198-24cf-3c95-a16e-83be8e877dfa")
-            gids = set(get_release_gids_from_recording_json_using_mbid(connection, mbid))
-            gids_from_data = set([
-                UUID(data.get_release(connection, "The Blueprint\u00b2: The Gift & The Curse")),
-                UUID(data.get_release(connection, "The Blueprint\u00b2: The Gift and The Curse")),
-            ])
-
-            self.assertSetEqual(gids, gids_from_data)
-
-
     def test_get_release_mbids_using_msid(self):
         """Test if release_mbid are fetched correctly for a given MSID"""
 
@@ -426,6 +402,32 @@ class ReleaseTestCase(DatabaseTestCase):
             self.assertDictEqual(recording_1, recordings[0])
 
 
+    def test_get_recordings_metadata_using_release_mbids(self):
+        """ Tests if recordings metadata is fetched correctly for each of the release MBIDs. """
+
+        recording_1 = {
+            "artist": "Jay‐Z & Beyoncé",
+            "title": "'03 Bonnie & Clyde",
+            "release_mbid": "2c5e4198-24cf-3c95-a16e-83be8e877dfa",
+        }
+        recording_2 = {
+            "artist": "Sigur Rós",
+            "title": "Hoppípolla",
+            "release_mbid": "fb0d0d1e-0a5c-4b4d-8b50-6d1f6f1b6c1d",
+        }
+        submit_listens([recording_1, recording_2])
+        with db.engine.begin() as connection:
+            recordings = get_recordings_metadata_using_release_mbids(connection, [
+                UUID(recording_2["release_mbid"]),
+                "5e8e7ac6-3f21-4a6f-8b2a-5b2f0b2e1c3d",
+                recording_1["release_mbid"],
+            ])
+            self.assertEqual(len(recordings), 3)
+            self.assertListEqual(recordings[0], [recording_2])
+            self.assertListEqual(recordings[1], [])
+            self.assertListEqual(recordings[2], [recording_1])
+
+
     @patch('messybrainz.db.release.fetch_releases_from_musicbrainz_db')
     def test_fetch_recording_mbids_not_in_recording_release_join(self, mock_fetch_releases):
         """Tests if recording MBIDs that are not in recording_release_join table
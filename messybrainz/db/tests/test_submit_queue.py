@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+
+import redis
+import sqlalchemy.exc
+from messybrainz import submit_queue
+
+
+class StopWriter(Exception):
+    pass
+
+
+class SubmitQueueTestCase(unittest.TestCase):
+
+    def test_load_listen(self):
+        listen = {'gid': '6ba092ae-aaf7-4154-b987-9eb9d05f8616', 'data': {'artist': 'Sigur Ros'}}
+        self.assertDictEqual(submit_queue._load_listen('{"gid": "6ba092ae-aaf7-4154-b987-9eb9d05f8616", '
+                                                       '"data": {"artist": "Sigur Ros"}}'), listen)
+        for item in ('{"gid": "6ba092ae', '[]', '{"data": {}}', '{"gid": "6ba092ae", "data": []}'):
+            with self.assertRaises(submit_queue.InvalidQueuedListen):
+                submit_queue._load_listen(item)
+
+    @patch('messybrainz.submit_queue.time.sleep')
+    @patch('messybrainz.submit_queue.write_queued_listens')
+    def test_run_writer_survives_unavailable_database(self, write_queued_listens, sleep):
+        write_queued_listens.side_effect = [
+            sqlalchemy.exc.OperationalError('INSERT', {}, Exception('server closed the connection')),
+            redis.exceptions.ConnectionError('Connection refused'),
+            sqlalchemy.exc.OperationalError('INSERT', {}, Exception('server closed the connection')),
+            10,
+            StopWriter,
+        ]
+        with self.assertRaises(StopWriter):
+            submit_queue.run_writer(batch_size=10, idle_sleep=1.0)
+        self.assertEqual(write_queued_listens.call_count, 5)
+        # The wait is doubled after each failed attempt and reset once a batch is written
+        self.assertListEqual([call[0][0] for call in sleep.call_args_list], [1.0, 2.0, 4.0])
+
+    @patch('messybrainz.submit_queue.time.sleep')
+    @patch('messybrainz.submit_queue.write_queued_listens')
+    def test_run_writer_raises_other_errors(self, write_queued_listens, sleep):
+        write_queued_listens.side_effect = KeyError('gid')
+        with self.assertRaises(KeyError):
+            submit_queue.run_writer(batch_size=10)
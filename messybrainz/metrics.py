@@ -0,0 +1,84 @@
+""" Prometheus metrics for the MessyBrainz server.
+
+When running under uwsgi, the `prometheus_multiproc_dir` environment variable
+must point to an empty directory which is shared by all the workers, so that
+the metrics exposed on /metrics are aggregated across them.
+"""
+import os
+import time
+
+from functools import wraps
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY
+from prometheus_client import multiprocess
+
+
+REQUEST_LATENCY = Histogram(
+    "messybrainz_request_latency_seconds",
+    "Time spent handling an API request.",
+    ["endpoint"],
+)
+
+LISTENS_PER_SUBMIT = Histogram(
+    "messybrainz_listens_per_submit",
+    "Number of listens in a single submission.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+
+RECORDINGS_SUBMITTED = Counter(
+    "messybrainz_recordings_submitted_total",
+    "Number of submitted recordings, by whether they already existed, were added, were added "
+    "as an alias of an existing recording or failed to be added from the submit queue.",
+    ["status"],
+)
+
+SUBMIT_RETRIES = Counter(
+    "messybrainz_submit_retries_total",
+    "Number of times a submission transaction was retried after an IntegrityError.",
+)
+
+SUBMIT_WRITER_UNAVAILABLE = Counter(
+    "messybrainz_submit_writer_unavailable_total",
+    "Number of times the submit queue writer backed off because Postgres or Redis was unavailable.",
+)
+
+SUBMITS_REJECTED = Counter(
+    "messybrainz_submits_rejected_total",
+    "Number of submissions rejected by the rate limits or the concurrent submissions cap.",
+    ["reason"],
+)
+
+DB_QUERY_LATENCY = Histogram(
+    "messybrainz_db_query_latency_seconds",
+    "Time spent in a messybrainz.db.data function.",
+    ["function"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+
+
+def timed_db_function(f):
+    """ Decorator which records the time spent in the decorated
+        db function in DB_QUERY_LATENCY.
+    """
+    histogram = DB_QUERY_LATENCY.labels(function=f.__name__)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return decorated
+
+
+def get_registry():
+    """ Returns the registry to collect metrics from. If uwsgi workers share
+        a multiprocess directory, a registry which aggregates the metrics of
+        all the workers is returned.
+    """
+    if "prometheus_multiproc_dir" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
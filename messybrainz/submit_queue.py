@@ -0,0 +1,210 @@
+""" Write-behind queue for submissions.
+
+In async submit mode (ASYNC_SUBMIT config), submitted recordings are not
+inserted by the webserver. Their MSIDs are computed up front, either from
+existing recordings with the same data or as name based IDs derived from
+the data hash, and they are pushed to a Redis list. A single writer process
+(`manage.py run_submit_writer`) drains the list in batches and inserts them.
+
+Items are only removed from the list once the batch has been committed, so
+nothing is lost if the writer dies halfway. This requires that only one
+writer runs at a time. Items which can't be inserted are moved to a dead
+letter list, so that they don't block the ones behind them. While Postgres
+or Redis can't be reached, the writer backs off and retries the batch.
+"""
+import logging
+import time
+
+import redis
+import sqlalchemy.exc
+import ujson
+
+import messybrainz
+from messybrainz import db
+from messybrainz import metrics
+from messybrainz.db import data
+
+
+DEFAULT_QUEUE_KEY = "messybrainz:submit_queue"
+DEAD_LETTER_SUFFIX = ":dead_letter"
+
+# Maximum number of seconds the writer waits before retrying when Postgres or
+# Redis can't be reached, the wait is doubled after each failed attempt up to it
+MAX_WRITER_BACKOFF = 60
+
+
+class InvalidQueuedListen(ValueError):
+    """Raised when a queued item can't be decoded into a listen."""
+    pass
+
+
+# Errors caused by the content of a queued item, rather than by the database or
+# a concurrent submission. Retrying the item would fail again.
+BAD_ITEM_ERRORS = (sqlalchemy.exc.DataError, InvalidQueuedListen)
+
+# Errors caused by Postgres or Redis being unavailable, the batch is retried
+# once they are back.
+UNAVAILABLE_ERRORS = (sqlalchemy.exc.OperationalError, redis.exceptions.ConnectionError,
+                      redis.exceptions.TimeoutError)
+
+redis_connection = None
+queue_key = DEFAULT_QUEUE_KEY
+
+
+def init_redis_connection(host, port, key=DEFAULT_QUEUE_KEY):
+    global redis_connection, queue_key
+    redis_connection = redis.StrictRedis(host=host, port=port)
+    queue_key = key
+
+
+def queue_listens(recordings, ids_only=False, json_and_hashes=None):
+    """ Computes the MSIDs of the recordings and queues them to be inserted.
+
+    Args:
+        recordings (list): the submitted recording data dicts
+        ids_only (bool): if True, the submitted payloads are left out of the result
+        json_and_hashes (list): the data.get_recording_json_and_hashes results of the
+                                recordings, computed from the recordings if None
+
+    Returns:
+        dict: the submitted payloads along with their recording MSIDs, in the same
+              format as submit_listens_and_sing_me_a_sweet_song
+    """
+    messybrainz.validate_recordings(recordings)
+    metrics.LISTENS_PER_SUBMIT.observe(len(recordings))
+
+    if json_and_hashes is None:
+        data_sha256s = [data.get_data_sha256(recording) for recording in recordings]
+    else:
+        data_sha256s = [data_sha256.hex() for _, data_sha256, _ in json_and_hashes]
+    with db.engine.connect() as connection:
+        existing = data.get_ids_from_data_sha256s(connection, set(data_sha256s))
+
+    payload = []
+    items = []
+    for recording, data_sha256 in zip(recordings, data_sha256s):
+        gid = existing.get(data_sha256)
+        if gid is None:
+            gid = data.get_recording_gid_from_sha256(data_sha256)
+            items.append(ujson.dumps({"gid": gid, "data": recording}))
+        if ids_only:
+            payload.append({"ids": {"recording_msid": gid}})
+        else:
+            payload.append({"payload": recording, "ids": {"recording_msid": gid}})
+
+    if items:
+        redis_connection.rpush(queue_key, *items)
+    metrics.RECORDINGS_SUBMITTED.labels(status="existing").inc(len(recordings) - len(items))
+    return {"payload": payload}
+
+
+def _load_listen(item):
+    """ Decodes a queued item into a dict with the gid and data of the listen.
+
+    Raises:
+        InvalidQueuedListen: if the item isn't a queued listen
+    """
+    try:
+        listen = ujson.loads(item)
+    except ValueError as e:
+        raise InvalidQueuedListen("Cannot decode queued listen: %s" % e)
+    if not isinstance(listen, dict) or not isinstance(listen.get("gid"), str) \
+            or not isinstance(listen.get("data"), dict):
+        raise InvalidQueuedListen("Queued listen must have a gid and data")
+    return listen
+
+
+def _write_listens(connection, items):
+    """ Inserts the queued items which aren't in the database yet.
+
+    Returns:
+        (int, int): the number of recordings which were added, and the number which
+                    existed under another MSID and got the queued MSID as an alias
+    """
+    listens = [_load_listen(item) for item in items]
+    num_added = num_aliased = 0
+    existing = data.get_ids_from_data_sha256s(connection,
+        {data.get_data_sha256(listen["data"]) for listen in listens})
+    for listen in listens:
+        data_sha256 = data.get_data_sha256(listen["data"])
+        gid = existing.get(data_sha256)
+        if gid is None:
+            existing[data_sha256] = data.submit_recording(connection, listen["data"], gid=listen["gid"])
+            num_added += 1
+        elif str(gid) != listen["gid"]:
+            # The recording was inserted under another MSID after the item was queued,
+            # the queued MSID was already returned to the client so it must still work.
+            logging.getLogger(__name__).warning("Queued recording %s exists as %s, adding it as an alias",
+                                                listen["gid"], gid)
+            data.add_recording_alias(connection, str(gid), listen["gid"])
+            num_aliased += 1
+    return num_added, num_aliased
+
+
+def write_queued_listens(batch_size=1000):
+    """ Inserts the next batch of queued recordings in a single transaction.
+
+    If an item of the batch can't be inserted, the items of the batch are inserted
+    one by one instead, and the ones which fail are moved to the dead letter list
+    (the queue key with a ":dead_letter" suffix), so that they don't block the queue.
+
+    Returns:
+        int: the number of queued items which were processed
+    """
+    items = redis_connection.lrange(queue_key, 0, batch_size - 1)
+    if not items:
+        return 0
+
+    num_failed = 0
+    try:
+        with db.engine.begin() as connection:
+            num_added, num_aliased = _write_listens(connection, items)
+    except BAD_ITEM_ERRORS:
+        num_added = num_aliased = 0
+        for item in items:
+            try:
+                with db.engine.begin() as connection:
+                    added, aliased = _write_listens(connection, [item])
+            except BAD_ITEM_ERRORS as e:
+                logging.getLogger(__name__).error("Moving queued listen to the dead letter list: %s", e)
+                redis_connection.rpush(queue_key + DEAD_LETTER_SUFFIX, item)
+                num_failed += 1
+                continue
+            num_added += added
+            num_aliased += aliased
+
+    redis_connection.ltrim(queue_key, len(items), -1)
+    metrics.RECORDINGS_SUBMITTED.labels(status="new").inc(num_added)
+    metrics.RECORDINGS_SUBMITTED.labels(status="aliased").inc(num_aliased)
+    metrics.RECORDINGS_SUBMITTED.labels(status="failed").inc(num_failed)
+    metrics.RECORDINGS_SUBMITTED.labels(status="existing").inc(len(items) - num_added - num_aliased - num_failed)
+    return len(items)
+
+
+def run_writer(batch_size=1000, idle_sleep=1.0):
+    """ Drains the queue forever, sleeping for `idle_sleep` seconds when it is empty.
+
+    If Postgres or Redis can't be reached, the batch is retried after waiting for
+    `idle_sleep` seconds, doubled after each failed attempt up to MAX_WRITER_BACKOFF,
+    so that the writer outlives restarts and failovers.
+    """
+    logger = logging.getLogger(__name__)
+    backoff = idle_sleep
+    while True:
+        try:
+            processed = write_queued_listens(batch_size)
+        except sqlalchemy.exc.IntegrityError as e:
+            # A recording of the batch was inserted by a concurrent synchronous
+            # submission, the batch is retried and that recording skipped.
+            logger.warning("Retrying batch of queued listens: {0}".format(e))
+            metrics.SUBMIT_RETRIES.inc()
+            continue
+        except UNAVAILABLE_ERRORS as e:
+            logger.error("Cannot write queued listens, retrying in {0} seconds: {1}".format(backoff, e))
+            metrics.SUBMIT_WRITER_UNAVAILABLE.inc()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MAX_WRITER_BACKOFF)
+            continue
+        backoff = idle_sleep
+        if not processed:
+            time.sleep(idle_sleep)
@@ -27,6 +27,53 @@ REDIS_HOST = "redis"
 REDIS_PORT = 6379
 REDIS_NAMESPACE = "messybrainz"
 
+# ASYNC SUBMIT
+# If True, submitted recordings are queued in Redis and inserted by the writer
+# process started with `python manage.py run_submit_writer`, instead of being
+# inserted while the client waits.
+ASYNC_SUBMIT = False
+SUBMIT_QUEUE_KEY = "messybrainz:submit_queue"
+
+# If True, new recordings, artist credits and releases get MessyBrainz IDs derived from
+# their data hash or name (UUIDv5) and are inserted without being looked up first.
+# MessyBrainz IDs that were generated before this was enabled stay valid.
+DETERMINISTIC_MSIDS = False
+
+# Submissions with a larger body (in bytes) or more recordings are rejected
+# with 413 Request Entity Too Large.
+MAX_SUBMIT_BODY_SIZE = 10 * 1024 * 1024
+MAX_SUBMIT_BATCH_SIZE = 1000
+
+# API responses larger than this many bytes are compressed with gzip, or brotli if the
+# brotli package is installed, when the client accepts it. None disables compression.
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_LEVEL = 6
+
+# SUBMISSION RATE LIMITS
+# If True, each client IP address (see REMOTE_ADDR_HEADER) can submit at most
+# SUBMIT_RATE_LIMIT_REQUESTS requests and SUBMIT_RATE_LIMIT_LISTENS listens per
+# SUBMIT_RATE_LIMIT_WINDOW seconds, in bursts or spread out. Clients over the limit
+# get 429 Too Many Requests with a Retry-After header.
+SUBMIT_RATE_LIMIT_ON = False
+SUBMIT_RATE_LIMIT_KEY = "messybrainz:rate_limit"
+SUBMIT_RATE_LIMIT_WINDOW = 60
+SUBMIT_RATE_LIMIT_REQUESTS = 120
+SUBMIT_RATE_LIMIT_LISTENS = 20000
+
+# At most this many submissions are handled at once by all the workers, the others get
+# 503 Service Unavailable with Retry-After set to CONCURRENT_SUBMITS_RETRY_AFTER seconds.
+# None disables the cap.
+MAX_CONCURRENT_SUBMITS = None
+CONCURRENT_SUBMITS_RETRY_AFTER = 1
+
+# If True, the app imports the API modules, compiles its templates and requests the
+# home page (which uses neither the database nor Redis) when it is created, before
+# uwsgi forks the workers from it, so that the workers share the result. Each worker
+# then connects to the database and Redis once it has been forked. The objects are
+# only frozen for the workers to share their memory on Python 3.7+, the Python 3.6
+# image gets no memory sharing benefit. See messybrainz/webserver/warmup.py.
+WARMUP_APP = False
+
 
 # LOGGING
 
@@ -47,10 +94,20 @@ REDIS_NAMESPACE = "messybrainz"
 #REMOTE_ADDR_HEADER = "X-MB-Remote-Addr"
 
 IP_FILTER_ON = False
+# Addresses and networks in CIDR notation, e.g. '10.0.0.0/8'
 IP_WHITELIST = [
     #'127.0.0.1',
 ]
 
+# Only these addresses and networks can read /metrics, whether IP_FILTER_ON is set
+# or not. See REMOTE_ADDR_HEADER if the app is behind a gateway.
+METRICS_IP_WHITELIST = [
+    '127.0.0.1',
+    '10.0.0.0/8',
+    '172.16.0.0/12',
+    '192.168.0.0/16',
+]
+
 # Mail server
 # These variables need to be defined if you enabled log emails.
 #SMTP_SERVER = "localhost"
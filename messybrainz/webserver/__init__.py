@@ -6,7 +6,7 @@ from brainzutils.flask import CustomFlask
 from messybrainz import db
 
 
-def create_app(debug=None, config_path=None):
+def create_app(debug=None, config_path=None, warmup=None):
     app = CustomFlask(
         import_name=__name__,
         use_flask_uuid=True,
@@ -43,6 +43,24 @@ def create_app(debug=None, config_path=None):
         logging.error("Redis is not defined in config file. Error: {}".format(e))
         raise
 
+    # Write-behind queue for submissions
+    if app.config.get("ASYNC_SUBMIT", False):
+        from messybrainz import submit_queue
+        submit_queue.init_redis_connection(
+            host=app.config["REDIS_HOST"],
+            port=app.config["REDIS_PORT"],
+            key=app.config["SUBMIT_QUEUE_KEY"],
+        )
+
+    # Submission rate limits
+    if app.config.get("SUBMIT_RATE_LIMIT_ON", False) or app.config.get("MAX_CONCURRENT_SUBMITS"):
+        from messybrainz.webserver import rate_limit
+        rate_limit.init_redis_connection(
+            host=app.config["REDIS_HOST"],
+            port=app.config["REDIS_PORT"],
+            prefix=app.config["SUBMIT_RATE_LIMIT_KEY"],
+        )
+
     # Logging
     app.init_loggers(
         file_config=app.config.get('LOG_FILE'),
@@ -54,6 +72,11 @@ def create_app(debug=None, config_path=None):
     from flask_uuid import FlaskUUID
     FlaskUUID(app)
 
+    # Compile the IP whitelists up front, so that invalid entries are found on startup
+    from messybrainz.webserver.decorators import get_ip_filter, get_metrics_whitelist
+    get_ip_filter(app)
+    get_metrics_whitelist(app)
+
     # Error handling
     from messybrainz.webserver.errors import init_error_handlers
     init_error_handlers(app)
@@ -67,11 +90,20 @@ def create_app(debug=None, config_path=None):
     # Blueprints
     from messybrainz.webserver.views.index import index_bp
     from messybrainz.webserver.views.api import api_bp
+    from messybrainz.webserver.views.metrics import metrics_bp
     app.register_blueprint(index_bp)
     app.register_blueprint(api_bp)
+    app.register_blueprint(metrics_bp)
 
     db.init_db_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    from messybrainz.db import data
+    data.set_deterministic_msids(app.config.get('DETERMINISTIC_MSIDS', False))
 
-    return app
+    # Warmup, shared by the uwsgi workers forked from this process
+    if warmup is None:
+        warmup = app.config.get('WARMUP_APP', False)
+    if warmup:
+        from messybrainz.webserver.warmup import warm_up
+        warm_up(app)
 
-application = create_app()
+    return app
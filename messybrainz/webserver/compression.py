@@ -0,0 +1,101 @@
+""" Compression of API request bodies and responses.
+
+Gzip is always available, brotli is only used for responses if the brotli
+package is installed.
+"""
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class GzipDecompressingStream(object):
+    """ Wraps a binary stream of gzip compressed data. Each read returns at most the
+        requested number of decompressed bytes, so that the size of the decompressed
+        data can be limited while it is read.
+    """
+
+    def __init__(self, stream, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._decompressor = zlib.decompressobj(GZIP_WBITS)
+        self._eof = False
+
+    def read(self, size):
+        try:
+            while True:
+                if self._decompressor.unconsumed_tail:
+                    data = self._decompressor.decompress(self._decompressor.unconsumed_tail, size)
+                elif self._eof:
+                    return b""
+                else:
+                    chunk = self.stream.read(self.chunk_size)
+                    if chunk:
+                        data = self._decompressor.decompress(chunk, size)
+                    else:
+                        self._eof = True
+                        data = self._decompressor.flush()
+                        if not self._decompressor.eof:
+                            raise ValueError("Truncated gzip request body")
+                if data:
+                    return data
+        except zlib.error as e:
+            raise ValueError("Cannot decompress gzip request body: %s" % e)
+
+
+def _gzip_compressor():
+    compressor = zlib.compressobj(current_app.config["RESPONSE_COMPRESSION_LEVEL"], zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _brotli_compressor():
+    compressor = brotli.Compressor(quality=current_app.config["RESPONSE_COMPRESSION_LEVEL"])
+    return compressor.process, compressor.finish
+
+
+def _stream_compressed(iterable, compress, finish):
+    for chunk in iterable:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def compress_response(response):
+    """ Compresses the response with the best encoding accepted by the client, if it
+        is larger than RESPONSE_COMPRESSION_MIN_SIZE bytes. Streamed responses are
+        always compressed, as their size isn't known up front.
+
+    To be registered as an after_request function.
+    """
+    min_size = current_app.config["RESPONSE_COMPRESSION_MIN_SIZE"]
+    if min_size is None or response.direct_passthrough or "Content-Encoding" in response.headers \
+            or not 200 <= response.status_code < 300 or response.status_code == 204:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(["br", "gzip"] if brotli else ["gzip"])
+    if encoding is None:
+        return response
+
+    compress, finish = _brotli_compressor() if encoding == "br" else _gzip_compressor()
+    if response.is_streamed:
+        response.response = _stream_compressed(response.response, compress, finish)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data) + finish())
+    response.headers["Content-Encoding"] = encoding
+    return response
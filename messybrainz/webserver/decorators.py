@@ -1,6 +1,7 @@
 from functools import update_wrapper, wraps
 from datetime import timedelta
 from flask import request, current_app, make_response
+from messybrainz.webserver.ip_whitelist import IPWhitelist
 from six import string_types
 from werkzeug.exceptions import Forbidden
 
@@ -18,6 +19,17 @@ def crossdomain(origin='*', methods=None, headers=None,
     if isinstance(max_age, timedelta):
         max_age = max_age.total_seconds()
 
+    cors_headers = [
+        ('Access-Control-Allow-Origin', origin),
+        ('Access-Control-Max-Age', str(max_age)),
+    ]
+    if headers is not None:
+        cors_headers.append(('Access-Control-Allow-Headers', headers))
+
+    # The headers are built once for each URL rule of the view, as finding the
+    # allowed methods of a rule requires building an OPTIONS response.
+    rule_headers = {}
+
     def get_methods():
         if methods is not None:
             return methods
@@ -25,6 +37,16 @@ def crossdomain(origin='*', methods=None, headers=None,
         options_resp = current_app.make_default_options_response()
         return options_resp.headers['allow']
 
+    def get_headers():
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        try:
+            return rule_headers[rule]
+        except KeyError:
+            h = cors_headers + [('Access-Control-Allow-Methods', get_methods())]
+            if rule is not None:
+                rule_headers[rule] = h
+            return h
+
     def decorator(f):
         def wrapped_function(*args, **kwargs):
             if automatic_options and request.method == 'OPTIONS':
@@ -35,12 +57,8 @@ def crossdomain(origin='*', methods=None, headers=None,
                 return resp
 
             h = resp.headers
-
-            h['Access-Control-Allow-Origin'] = origin
-            h['Access-Control-Allow-Methods'] = get_methods()
-            h['Access-Control-Max-Age'] = str(max_age)
-            if headers is not None:
-                h['Access-Control-Allow-Headers'] = headers
+            for name, value in get_headers():
+                h[name] = value
             return resp
 
         f.provide_automatic_options = False
@@ -48,16 +66,74 @@ def crossdomain(origin='*', methods=None, headers=None,
     return decorator
 
 
+class _IPFilter(object):
+    """ The IP filter settings of an app, with the whitelist compiled."""
+
+    def __init__(self, config):
+        self.whitelist_entries = config['IP_WHITELIST']
+        self.enabled = config.get('IP_FILTER_ON', False)
+        self.behind_gateway = config.get('BEHIND_GATEWAY', False)
+        self.remote_addr_header = config.get('REMOTE_ADDR_HEADER')
+        self.whitelist = IPWhitelist(self.whitelist_entries)
+
+    def is_current(self, config):
+        return config['IP_WHITELIST'] is self.whitelist_entries \
+            and config.get('IP_FILTER_ON', False) == self.enabled \
+            and config.get('BEHIND_GATEWAY', False) == self.behind_gateway \
+            and config.get('REMOTE_ADDR_HEADER') == self.remote_addr_header
+
+
+def get_ip_filter(app):
+    """ Returns the IP filter settings of the app. The whitelist is compiled on first
+        use and again whenever IP_WHITELIST is replaced or the other settings change.
+        IP_WHITELIST must be replaced rather than modified in place to be reloaded.
+    """
+    settings = app.extensions.get('ip_filter')
+    if settings is None or not settings.is_current(app.config):
+        settings = app.extensions['ip_filter'] = _IPFilter(app.config)
+    return settings
+
+
+def get_remote_addr():
+    """ Returns the IP address of the client, from REMOTE_ADDR_HEADER if the app is
+        behind a gateway.
+    """
+    settings = get_ip_filter(current_app)
+    if settings.behind_gateway:
+        return request.headers.get(settings.remote_addr_header)
+    return request.remote_addr
+
+
 def ip_filter(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        if current_app.config.get('IP_FILTER_ON', False):
-            if current_app.config.get('BEHIND_GATEWAY', False):
-                ip_addr = request.headers.get(current_app.config['REMOTE_ADDR_HEADER'])
-            else:
-                ip_addr = request.remote_addr
-            if ip_addr not in current_app.config['IP_WHITELIST']:
-                raise Forbidden
+        settings = get_ip_filter(current_app)
+        if settings.enabled and get_remote_addr() not in settings.whitelist:
+            raise Forbidden
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+def get_metrics_whitelist(app):
+    """ Returns the compiled METRICS_IP_WHITELIST of the app. It is compiled again
+        whenever METRICS_IP_WHITELIST is replaced.
+    """
+    entries = app.config['METRICS_IP_WHITELIST']
+    compiled = app.extensions.get('metrics_ip_whitelist')
+    if compiled is None or compiled[0] is not entries:
+        compiled = app.extensions['metrics_ip_whitelist'] = (entries, IPWhitelist(entries))
+    return compiled[1]
+
+
+def metrics_ip_filter(f):
+    """ Only lets the clients in METRICS_IP_WHITELIST through, whether IP_FILTER_ON
+        is set or not.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if get_remote_addr() not in get_metrics_whitelist(current_app):
+            raise Forbidden
         return f(*args, **kwargs)
 
     return decorated
@@ -1,6 +1,11 @@
 from flask import render_template
 
 
+def _retry_after_headers(error):
+    retry_after = getattr(error, 'retry_after', None)
+    return {'Retry-After': str(retry_after)} if retry_after is not None else {}
+
+
 def init_error_handlers(app):
 
     @app.errorhandler(400)
@@ -15,10 +20,14 @@ def init_error_handlers(app):
     def not_found(error):
         return render_template('errors/404.html', error=error), 404
 
+    @app.errorhandler(429)
+    def too_many_requests(error):
+        return render_template('errors/429.html', error=error), 429, _retry_after_headers(error)
+
     @app.errorhandler(500)
     def internal_server_error(error):
         return render_template('errors/500.html', error=error), 500
 
     @app.errorhandler(503)
     def service_unavailable(error):
-        return render_template('errors/503.html', error=error), 503
+        return render_template('errors/503.html', error=error), 503, _retry_after_headers(error)
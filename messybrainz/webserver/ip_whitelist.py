@@ -0,0 +1,44 @@
+""" Whitelist of IP addresses and networks used by the ip_filter decorator.
+
+The entries are grouped by IP version and prefix length, so checking an
+address takes one set lookup per distinct prefix length in the whitelist,
+however many entries it has.
+"""
+import ipaddress
+
+
+class IPWhitelist(object):
+    """ A set of IPv4 and IPv6 addresses and networks.
+
+    Args:
+        entries: addresses ('127.0.0.1') and networks in CIDR notation ('10.0.0.0/8')
+
+    Raises:
+        ValueError: if an entry isn't a valid address or network
+    """
+
+    def __init__(self, entries):
+        networks = {4: {}, 6: {}}
+        for entry in entries:
+            network = ipaddress.ip_network(entry.strip(), strict=False)
+            networks[network.version].setdefault(network.netmask, set()).add(int(network.network_address))
+        self._networks = {
+            version: [(int(netmask), addresses) for netmask, addresses in by_netmask.items()]
+            for version, by_netmask in networks.items()
+        }
+
+    def __contains__(self, ip_addr):
+        if not ip_addr:
+            return False
+        try:
+            address = ipaddress.ip_address(ip_addr.strip())
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+
+        value = int(address)
+        for netmask, addresses in self._networks[address.version]:
+            if value & netmask in addresses:
+                return True
+        return False
@@ -0,0 +1,121 @@
+""" Incremental parsing of JSON arrays from request bodies.
+
+Only the current chunk and the item being decoded are kept in memory, so
+large submissions can be validated item by item and rejected as soon as
+they get too large, without reading the whole body first.
+"""
+import codecs
+import json
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class NotAListError(ValueError):
+    """ Raised if the JSON document isn't an array."""
+    pass
+
+
+class _Buffer(object):
+    """ Decoded text read from a binary stream, which only holds what hasn't been consumed yet."""
+
+    def __init__(self, stream, chunk_size, max_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.size = 0
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read(self, min_length=0):
+        """ Reads chunks of the stream until at least min_length characters have been
+            added to the text (and at least one chunk), returns False if the stream
+            has ended.
+        """
+        if self.eof:
+            return False
+        texts = [self.text[self.pos:]]
+        length = 0
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            self.size += len(chunk)
+            if self.max_size is not None and self.size > self.max_size:
+                raise RequestEntityTooLarge("Request body is larger than %d bytes" % self.max_size)
+            if not chunk:
+                self.eof = True
+            texts.append(self._decoder.decode(chunk, final=self.eof))
+            length += len(texts[-1])
+            if self.eof or length >= min_length:
+                break
+        self.text = "".join(texts)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ Returns the next non whitespace character, or None at the end of the stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read():
+                return None
+
+    def decode(self):
+        """ Decodes the JSON value which starts at the current position."""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # A value which isn't followed by a delimiter yet may be incomplete (e.g. a number)
+                if self.eof or (end < len(self.text) and self.text[end] in WHITESPACE + ",]"):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # The text of the value read so far is at least doubled before it is decoded
+            # again, so that a value spanning many chunks isn't decoded once per chunk
+            self.read(len(self.text) - self.pos)
+
+
+def iter_json_array(stream, chunk_size=DEFAULT_CHUNK_SIZE, max_size=None):
+    """ Yields the items of the JSON array read from a binary stream one by one.
+
+    Args:
+        stream: the file like object to read the UTF-8 encoded JSON document from
+        chunk_size (int): the number of bytes to read at a time
+        max_size (int): the maximum number of bytes to read, None for no limit
+
+    Raises:
+        NotAListError: if the document isn't a JSON array
+        ValueError: if the document isn't valid JSON
+        RequestEntityTooLarge: if the stream is larger than max_size
+    """
+    buffer = _Buffer(stream, chunk_size, max_size)
+    if buffer.peek() != "[":
+        raise NotAListError("submitted data must be a list")
+    buffer.pos += 1
+
+    if buffer.peek() == "]":
+        buffer.pos += 1
+    else:
+        while True:
+            if buffer.peek() is None:
+                raise ValueError("Unexpected end of JSON array")
+            yield buffer.decode()
+            separator = buffer.peek()
+            buffer.pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ValueError("Expecting ',' delimiter between array items")
+
+    if buffer.peek() is not None:
+        raise ValueError("Extra data after JSON array")
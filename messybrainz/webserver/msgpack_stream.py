@@ -0,0 +1,118 @@
+""" MessagePack request parsing and response encoding for the API.
+
+Decoded documents are restricted to the types which can be represented in
+JSON, so that a recording submitted as MessagePack is stored and hashed
+exactly like the same recording submitted as JSON.
+"""
+import math
+
+import msgpack
+
+from messybrainz.webserver.json_stream import DEFAULT_CHUNK_SIZE, NotAListError
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+MIMETYPE = "application/msgpack"
+MIMETYPES = (MIMETYPE, "application/x-msgpack")
+
+
+class _LimitedStream(object):
+
+    def __init__(self, stream, max_size):
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+
+    def read(self, size):
+        data = self.stream.read(size)
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge("Request body is larger than %d bytes" % self.max_size)
+        return data
+
+
+def check_json_types(value):
+    """ Raises ValueError if the value can't be represented in JSON."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise ValueError("Object keys must be strings")
+            check_json_types(item)
+    elif isinstance(value, list):
+        for item in value:
+            check_json_types(item)
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("NaN and Infinity can't be represented in JSON")
+    elif value is not None and not isinstance(value, (str, int, float, bool)):
+        raise ValueError("Unsupported MessagePack type: %s" % type(value).__name__)
+
+
+def iter_msgpack_array(stream, chunk_size=DEFAULT_CHUNK_SIZE, max_size=None, max_items=None):
+    """ Yields the items of the MessagePack array read from a binary stream one by one.
+
+    Args:
+        stream: the file like object to read the MessagePack document from
+        chunk_size (int): the number of bytes to read at a time
+        max_size (int): the maximum number of bytes to read, None for no limit
+        max_items (int): the maximum number of items in the array, None for no limit
+
+    Raises:
+        NotAListError: if the document isn't an array
+        ValueError: if the document isn't valid or contains types which can't be represented in JSON
+        RequestEntityTooLarge: if the stream is larger than max_size or the array
+                               has more than max_items items
+    """
+    unpacker = msgpack.Unpacker(_LimitedStream(stream, max_size), read_size=chunk_size, raw=False)
+    try:
+        length = unpacker.read_array_header()
+    except (msgpack.exceptions.UnpackException, ValueError):
+        raise NotAListError("submitted data must be a list")
+    if max_items is not None and length > max_items:
+        raise RequestEntityTooLarge("Cannot submit more than %d recordings at once" % max_items)
+
+    try:
+        for _ in range(length):
+            item = unpacker.unpack()
+            check_json_types(item)
+            yield item
+    except msgpack.exceptions.OutOfData:
+        raise ValueError("Unexpected end of MessagePack array")
+    except msgpack.exceptions.UnpackException as e:
+        raise ValueError(str(e))
+
+    try:
+        unpacker.unpack()
+    except msgpack.exceptions.OutOfData:
+        return
+    except (msgpack.exceptions.UnpackException, ValueError):
+        pass
+    raise ValueError("Extra data after MessagePack array")
+
+
+def packb(value):
+    """ Encodes the value as MessagePack."""
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def iter_packed_payload(payload, chunk_items):
+    """ Yields the MessagePack encoding of {"payload": payload} for a list or dict
+        payload, `chunk_items` payload items at a time.
+    """
+    packer = msgpack.Packer(use_bin_type=True)
+    if isinstance(payload, dict):
+        header = packer.pack_map_header(len(payload))
+        items = (packer.pack(key) + packer.pack(value) for key, value in payload.items())
+    else:
+        header = packer.pack_array_header(len(payload))
+        items = (packer.pack(item) for item in payload)
+
+    yield packer.pack_map_header(1) + packer.pack("payload") + header
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_items:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
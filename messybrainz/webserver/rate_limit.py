@@ -0,0 +1,188 @@
+""" Rate limiting and admission control for submissions.
+
+Each client IP address has two token buckets in Redis, one for requests and
+one for listens. A bucket holds up to its limit of tokens and is refilled at
+limit / SUBMIT_RATE_LIMIT_WINDOW tokens per second. A submission which finds
+too few tokens is rejected with 429 Too Many Requests.
+
+The number of submissions being handled at once by all the workers is capped
+with MAX_CONCURRENT_SUBMITS. Submissions over the cap are rejected with
+503 Service Unavailable, so that clients back off instead of piling up on
+database locks.
+
+Both responses have a Retry-After header. If Redis can't be reached,
+submissions aren't limited.
+"""
+import math
+import time
+import uuid
+from functools import wraps
+
+import redis
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+from messybrainz import metrics
+from messybrainz.webserver.decorators import get_remote_addr
+
+
+DEFAULT_KEY_PREFIX = "messybrainz:rate_limit"
+
+# Submissions which have been in flight for longer than this many seconds are assumed
+# to belong to a worker which died without releasing them
+IN_FLIGHT_TIMEOUT = 300
+
+# Takes tokens from a bucket if it has enough of them, and returns the number of
+# seconds until it does otherwise. A cost larger than the limit is allowed with a
+# full bucket, which then goes negative.
+# KEYS: bucket; ARGV: limit, tokens per second, cost, current time
+_TAKE_TOKENS = """
+local limit = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or limit
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - updated) * rate)
+local required = math.min(cost, limit)
+if tokens < required then
+    return tostring((required - tokens) / rate)
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens - cost), 'updated', ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil((limit - tokens + cost) / rate) + 1)
+return '0'
+"""
+
+# Adds a submission to the sorted set of in flight submissions if there are fewer
+# than the cap, after removing the ones which timed out. Returns 1 if it was added.
+# KEYS: set; ARGV: cap, submission id, current time, timeout
+_ACQUIRE_SLOT = """
+local now = tonumber(ARGV[3])
+local timeout = tonumber(ARGV[4])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - timeout)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[2])
+redis.call('EXPIRE', KEYS[1], timeout)
+return 1
+"""
+
+redis_connection = None
+key_prefix = DEFAULT_KEY_PREFIX
+_take_tokens = None
+_acquire_slot = None
+
+
+class RateLimitExceeded(TooManyRequests):
+
+    def __init__(self, retry_after, description=None):
+        super(RateLimitExceeded, self).__init__(description)
+        self.retry_after = retry_after
+
+    def get_headers(self, *args, **kwargs):
+        headers = super(RateLimitExceeded, self).get_headers(*args, **kwargs)
+        return headers + [('Retry-After', str(self.retry_after))]
+
+
+class TooManyConcurrentSubmits(ServiceUnavailable):
+
+    def __init__(self, retry_after, description=None):
+        super(TooManyConcurrentSubmits, self).__init__(description)
+        self.retry_after = retry_after
+
+    def get_headers(self, *args, **kwargs):
+        headers = super(TooManyConcurrentSubmits, self).get_headers(*args, **kwargs)
+        return headers + [('Retry-After', str(self.retry_after))]
+
+
+def init_redis_connection(host, port, prefix=DEFAULT_KEY_PREFIX):
+    global redis_connection, key_prefix, _take_tokens, _acquire_slot
+    redis_connection = redis.StrictRedis(host=host, port=port)
+    key_prefix = prefix
+    _take_tokens = redis_connection.register_script(_TAKE_TOKENS)
+    _acquire_slot = redis_connection.register_script(_ACQUIRE_SLOT)
+
+
+def take_tokens(bucket, limit, window, cost):
+    """ Takes `cost` tokens from a bucket which holds up to `limit` tokens and is
+        refilled over `window` seconds.
+
+    Returns:
+        float: 0 if the tokens were taken, otherwise the number of seconds until
+               the bucket has enough tokens
+    """
+    try:
+        return float(_take_tokens(keys=["%s:%s" % (key_prefix, bucket)],
+                                  args=[limit, limit / window, cost, time.time()]))
+    except redis.exceptions.RedisError:
+        current_app.logger.error("Cannot check the submission rate limit", exc_info=True)
+        return 0
+
+
+def _check_rate_limit(name, limit, cost):
+    if not limit:
+        return
+    bucket = "%s:%s" % (name, get_remote_addr() or "unknown")
+    wait = take_tokens(bucket, limit, current_app.config["SUBMIT_RATE_LIMIT_WINDOW"], cost)
+    if wait:
+        metrics.SUBMITS_REJECTED.labels(reason="rate_limit_%s" % name).inc()
+        raise RateLimitExceeded(int(math.ceil(wait)), "Too many %s submitted, try again later" % name)
+
+
+def check_listens_rate_limit(count):
+    """ Takes `count` tokens from the listens bucket of the client.
+
+    Raises:
+        RateLimitExceeded: if the client submitted too many listens recently
+    """
+    if current_app.config.get("SUBMIT_RATE_LIMIT_ON", False):
+        _check_rate_limit("listens", current_app.config["SUBMIT_RATE_LIMIT_LISTENS"], count)
+
+
+def _acquire_submit_slot(max_concurrent):
+    """ Returns the id of the acquired slot, None if Redis can't be reached."""
+    slot = str(uuid.uuid4())
+    try:
+        acquired = _acquire_slot(keys=["%s:in_flight" % key_prefix],
+                                 args=[max_concurrent, slot, time.time(), IN_FLIGHT_TIMEOUT])
+    except redis.exceptions.RedisError:
+        current_app.logger.error("Cannot check the number of concurrent submissions", exc_info=True)
+        return None
+    if not acquired:
+        metrics.SUBMITS_REJECTED.labels(reason="concurrency").inc()
+        raise TooManyConcurrentSubmits(current_app.config["CONCURRENT_SUBMITS_RETRY_AFTER"],
+                                       "Too many submissions are being handled, try again later")
+    return slot
+
+
+def _release_submit_slot(slot):
+    try:
+        redis_connection.zrem("%s:in_flight" % key_prefix, slot)
+    except redis.exceptions.RedisError:
+        current_app.logger.error("Cannot release a concurrent submission slot", exc_info=True)
+
+
+def limit_submits(f):
+    """ Applies the requests rate limit of the client and the cap of concurrent
+        submissions to a view. The listens rate limit is applied by the view with
+        check_listens_rate_limit once it knows the number of listens.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        config = current_app.config
+        if config.get("SUBMIT_RATE_LIMIT_ON", False):
+            _check_rate_limit("requests", config["SUBMIT_RATE_LIMIT_REQUESTS"], 1)
+
+        max_concurrent = config.get("MAX_CONCURRENT_SUBMITS")
+        if not max_concurrent:
+            return f(*args, **kwargs)
+        slot = _acquire_submit_slot(max_concurrent)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            if slot is not None:
+                _release_submit_slot(slot)
+
+    return decorated
@@ -0,0 +1,47 @@
+import gzip
+import io
+
+from flask import Response
+from messybrainz.webserver import compression
+from messybrainz.webserver.testing import ServerTestCase
+
+
+class CompressionTestCase(ServerTestCase):
+
+    def test_gzip_decompressing_stream(self):
+        data = b'[' + b','.join([b'{"artist": "Sigur Ros", "title": "Hoppipolla"}'] * 1000) + b']'
+        stream = compression.GzipDecompressingStream(io.BytesIO(gzip.compress(data)), chunk_size=100)
+        chunks = []
+        while True:
+            chunk = stream.read(512)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 512)
+            chunks.append(chunk)
+        self.assertEqual(b''.join(chunks), data)
+
+    def test_gzip_decompressing_stream_invalid(self):
+        with self.assertRaises(ValueError):
+            compression.GzipDecompressingStream(io.BytesIO(b'not gzip')).read(512)
+        with self.assertRaises(ValueError):
+            stream = compression.GzipDecompressingStream(io.BytesIO(gzip.compress(b'[]' * 1000)[:-10]))
+            while stream.read(512):
+                pass
+
+    def test_compress_response(self):
+        data = 'x' * self.app.config['RESPONSE_COMPRESSION_MIN_SIZE']
+        with self.app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = compression.compress_response(Response(data))
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.get_data()), data.encode('utf-8'))
+
+            response = compression.compress_response(Response(iter([data, data])))
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.get_data()), (data * 2).encode('utf-8'))
+
+            response = compression.compress_response(Response(data[1:]))
+            self.assertNotIn('Content-Encoding', response.headers)
+
+        with self.app.test_request_context():
+            response = compression.compress_response(Response(data))
+            self.assertNotIn('Content-Encoding', response.headers)
@@ -0,0 +1,20 @@
+import unittest
+
+from messybrainz.webserver.ip_whitelist import IPWhitelist
+
+
+class IPWhitelistTestCase(unittest.TestCase):
+
+    def test_contains(self):
+        whitelist = IPWhitelist(['127.0.0.1', '10.1.0.0/16', '192.168.1.7/24', '2001:db8::/32'])
+        for ip_addr in ('127.0.0.1', '10.1.255.3', '192.168.1.200', '2001:db8::1', '::ffff:10.1.0.1', ' 127.0.0.1'):
+            self.assertIn(ip_addr, whitelist)
+        for ip_addr in ('127.0.0.2', '10.2.0.1', '192.168.2.1', '2001:db9::1', '::1', '', None, 'localhost'):
+            self.assertNotIn(ip_addr, whitelist)
+
+    def test_empty(self):
+        self.assertNotIn('127.0.0.1', IPWhitelist([]))
+
+    def test_invalid_entry(self):
+        with self.assertRaises(ValueError):
+            IPWhitelist(['10.0.0.0/33'])
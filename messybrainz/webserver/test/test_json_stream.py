@@ -0,0 +1,39 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from messybrainz.webserver import json_stream
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class JSONStreamTestCase(unittest.TestCase):
+
+    def test_iter_json_array(self):
+        items = [{'artist': 'Sigur Rós', 'title': 'Hoppípolla'}, 1234567, -1.5e3, [1, 2], 'a', None, True]
+        document = json.dumps(items).encode('utf-8')
+        for chunk_size in (1, 2, 3, 64):
+            parsed = list(json_stream.iter_json_array(io.BytesIO(document), chunk_size=chunk_size))
+            self.assertListEqual(parsed, items)
+        self.assertListEqual(list(json_stream.iter_json_array(io.BytesIO(b' [ ] '))), [])
+
+    def test_iter_json_array_large_item(self):
+        items = [{'artist': 'Sigur Rós', 'title': 'Hoppípolla' * 100000}, 1]
+        document = json.dumps(items).encode('utf-8')
+        with patch.object(json_stream, '_decoder', wraps=json_stream._decoder) as decoder:
+            parsed = list(json_stream.iter_json_array(io.BytesIO(document), chunk_size=16))
+        self.assertListEqual(parsed, items)
+        # The item isn't decoded again after each of the ~60000 chunks it spans
+        self.assertLess(decoder.raw_decode.call_count, 40)
+
+    def test_iter_json_array_invalid(self):
+        with self.assertRaises(json_stream.NotAListError):
+            list(json_stream.iter_json_array(io.BytesIO(b'{"artist": "Sigur Ros"}')))
+        for document in (b'', b'[1 2]', b'[1,', b'[1,]', b'[1]x', b'[1.5e3'):
+            with self.assertRaises(ValueError):
+                list(json_stream.iter_json_array(io.BytesIO(document), chunk_size=2))
+
+    def test_iter_json_array_max_size(self):
+        document = json.dumps([{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}] * 10).encode('utf-8')
+        with self.assertRaises(RequestEntityTooLarge):
+            list(json_stream.iter_json_array(io.BytesIO(document), chunk_size=16, max_size=100))
@@ -0,0 +1,42 @@
+import io
+import unittest
+
+import msgpack
+
+from messybrainz.webserver import json_stream
+from messybrainz.webserver import msgpack_stream
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class MessagePackStreamTestCase(unittest.TestCase):
+
+    def test_iter_msgpack_array(self):
+        items = [{'artist': 'Sigur Rós', 'title': 'Hoppípolla'}, 1234567, -1.5e3, [1, 2], 'a', None, True]
+        document = msgpack_stream.packb(items)
+        for chunk_size in (1, 2, 3, 64):
+            parsed = list(msgpack_stream.iter_msgpack_array(io.BytesIO(document), chunk_size=chunk_size))
+            self.assertListEqual(parsed, items)
+        self.assertListEqual(list(msgpack_stream.iter_msgpack_array(io.BytesIO(msgpack_stream.packb([])))), [])
+
+    def test_iter_msgpack_array_invalid(self):
+        with self.assertRaises(json_stream.NotAListError):
+            list(msgpack_stream.iter_msgpack_array(io.BytesIO(msgpack_stream.packb({'artist': 'Sigur Ros'}))))
+        document = msgpack_stream.packb([1, 2])
+        for document in (document[:-1], document + b'\x01', msgpack_stream.packb([b'bytes']),
+                         msgpack_stream.packb([{1: 'a'}]), msgpack_stream.packb([float('nan')]),
+                         msgpack_stream.packb([{'duration': float('-inf')}])):
+            with self.assertRaises(ValueError):
+                list(msgpack_stream.iter_msgpack_array(io.BytesIO(document), chunk_size=2))
+
+    def test_iter_msgpack_array_max_size(self):
+        document = msgpack_stream.packb([{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}] * 10)
+        with self.assertRaises(RequestEntityTooLarge):
+            list(msgpack_stream.iter_msgpack_array(io.BytesIO(document), chunk_size=16, max_size=100))
+        with self.assertRaises(RequestEntityTooLarge):
+            next(msgpack_stream.iter_msgpack_array(io.BytesIO(document), max_items=9))
+
+    def test_iter_packed_payload(self):
+        items = [{'ids': {'recording_msid': str(i)}} for i in range(5)]
+        for payload in ([], items, {}, {item['ids']['recording_msid']: item for item in items}):
+            document = b''.join(msgpack_stream.iter_packed_payload(payload, 2))
+            self.assertEqual(msgpack.unpackb(document, raw=False), {'payload': payload})
@@ -0,0 +1,50 @@
+import json
+import uuid
+
+from flask import url_for
+from messybrainz.webserver import rate_limit
+from messybrainz.webserver.testing import ServerTestCase
+
+
+class RateLimitTestCase(ServerTestCase):
+
+    def setUp(self):
+        super(RateLimitTestCase, self).setUp()
+        # A fresh prefix for each test, so that the buckets start full
+        rate_limit.init_redis_connection(
+            host=self.app.config['REDIS_HOST'],
+            port=self.app.config['REDIS_PORT'],
+            prefix='messybrainz:test_rate_limit:%s' % uuid.uuid4(),
+        )
+
+    def test_take_tokens(self):
+        self.assertEqual(rate_limit.take_tokens('bucket', 2, 60, 1), 0)
+        self.assertEqual(rate_limit.take_tokens('bucket', 2, 60, 1), 0)
+        self.assertGreater(rate_limit.take_tokens('bucket', 2, 60, 1), 0)
+
+        # A cost larger than the limit is allowed with a full bucket
+        self.assertEqual(rate_limit.take_tokens('large', 2, 60, 10), 0)
+        self.assertGreater(rate_limit.take_tokens('large', 2, 60, 1), 25)
+
+    def test_submit_requests_rate_limit(self):
+        self.app.config['SUBMIT_RATE_LIMIT_ON'] = True
+        self.app.config['SUBMIT_RATE_LIMIT_REQUESTS'] = 1
+        data = json.dumps({'artist': 'Sigur Ros'})
+        resp = self.client.post(url_for('api.submit'), data=data, content_type='application/json')
+        self.assert400(resp)
+        resp = self.client.post(url_for('api.submit'), data=data, content_type='application/json')
+        self.assertStatus(resp, 429)
+        self.assertGreater(int(resp.headers['Retry-After']), 0)
+
+    def test_submit_concurrency_cap(self):
+        self.app.config['MAX_CONCURRENT_SUBMITS'] = 1
+        slot = rate_limit._acquire_submit_slot(1)
+        resp = self.client.post(url_for('api.submit'), data=json.dumps({'artist': 'Sigur Ros'}),
+                                content_type='application/json')
+        self.assertStatus(resp, 503)
+        self.assertEqual(resp.headers['Retry-After'], str(self.app.config['CONCURRENT_SUBMITS_RETRY_AFTER']))
+
+        rate_limit._release_submit_slot(slot)
+        resp = self.client.post(url_for('api.submit'), data=json.dumps({'artist': 'Sigur Ros'}),
+                                content_type='application/json')
+        self.assert400(resp)
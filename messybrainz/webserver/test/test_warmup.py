@@ -0,0 +1,33 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+import sqlalchemy.exc
+from messybrainz import db
+from messybrainz.webserver import warmup
+from messybrainz.webserver.testing import ServerTestCase
+
+
+@patch('messybrainz.webserver.warmup.gc')
+class WarmupTestCase(ServerTestCase):
+
+    def test_warm_up(self, gc):
+        engine = db.engine
+        warmup.warm_up(self.app)
+        self.assertIs(db.engine, engine)
+        gc.collect.assert_called_once_with()
+
+    def test_warm_up_database_request(self, gc):
+        engine = db.engine
+        with patch.object(warmup, 'WARMUP_PATHS', ('/%s' % uuid.uuid4(),)):
+            with self.assertRaises(RuntimeError):
+                warmup.warm_up(self.app)
+        self.assertIs(db.engine, engine)
+
+    def test_prime_connections(self, gc):
+        with patch.object(db, 'engine', MagicMock()) as engine:
+            warmup.prime_connections()
+            engine.connect.assert_called_once_with()
+
+            # The worker still starts if the database can't be reached
+            engine.connect.side_effect = sqlalchemy.exc.OperationalError('SELECT 1', {}, Exception('refused'))
+            warmup.prime_connections()
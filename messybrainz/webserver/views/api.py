@@ -1,13 +1,30 @@
+import msgpack
 import ujson
-from flask import Blueprint, request, Response
+from flask import Blueprint, current_app, request, Response
+from messybrainz.webserver import compression
+from messybrainz.webserver import json_stream
+from messybrainz.webserver import msgpack_stream
+from messybrainz.webserver import rate_limit
 from messybrainz.webserver.decorators import crossdomain, ip_filter
-from werkzeug.exceptions import BadRequest, NotFound
+from werkzeug.exceptions import BadRequest, NotFound, RequestEntityTooLarge, UnsupportedMediaType
+from uuid import UUID
 
 import messybrainz
 import messybrainz.db.exceptions
+from messybrainz.db.data import RawJSON, get_recording_json_and_hashes
+from messybrainz import metrics
+from messybrainz import submit_queue
 import ujson
 
 api_bp = Blueprint('api', __name__)
+api_bp.after_request(compression.compress_response)
+
+# Number of payload items encoded per chunk of a streamed response
+STREAM_CHUNK_ITEMS = 100
+
+DEFAULT_META_LOOKUP_COUNT = 100
+MAX_META_LOOKUP_COUNT = 1000
+MAX_IDS_LOOKUP_COUNT = 1000
 
 def ujsonify(*args, **kwargs):
     """An implementation of flask's jsonify which uses ujson
@@ -17,35 +34,230 @@ def ujsonify(*args, **kwargs):
     return Response((ujson.dumps(dict(*args, **kwargs)), '\n'),
                         mimetype='application/json')
 
+
+def dumps_recording(recording):
+    """Encodes a loaded recording as JSON. A RawJSON payload is written
+    to the output as is.
+    """
+    payload = recording.get("payload")
+    if not isinstance(payload, RawJSON):
+        return ujson.dumps(recording)
+    others = ujson.dumps({key: value for key, value in recording.items() if key != "payload"})
+    if others == '{}':
+        return '{"payload":%s}' % payload
+    return '{"payload":%s,%s' % (payload, others[1:])
+
+
+def wants_msgpack():
+    """Returns True if the client prefers MessagePack over JSON responses."""
+    mimetypes = ('application/json',) + msgpack_stream.MIMETYPES
+    return request.accept_mimetypes.best_match(mimetypes) in msgpack_stream.MIMETYPES
+
+
+def make_api_response(value):
+    """Returns a MessagePack or JSON response of the value, depending on the Accept header."""
+    if wants_msgpack():
+        return Response(msgpack_stream.packb(value), mimetype=msgpack_stream.MIMETYPE)
+    return ujsonify(value)
+
+
+def stream_payload(payload, encode=ujson.dumps):
+    """Returns the JSON response {"payload": payload} for a list or dict payload.
+    The response is encoded and sent a few payload items at a time, instead of
+    being built as a single string first. MessagePack is used instead if the
+    client prefers it, in which case the payload must not contain RawJSON.
+    """
+    if wants_msgpack():
+        return Response(msgpack_stream.iter_packed_payload(payload, STREAM_CHUNK_ITEMS),
+                        mimetype=msgpack_stream.MIMETYPE)
+
+    if isinstance(payload, dict):
+        start, end = '{"payload":{', '}}\n'
+        items = ('%s:%s' % (ujson.dumps(key), encode(value)) for key, value in payload.items())
+    else:
+        start, end = '{"payload":[', ']}\n'
+        items = (encode(item) for item in payload)
+
+    def generate():
+        yield start
+        chunk = []
+        separator = ''
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == STREAM_CHUNK_ITEMS:
+                yield separator + ','.join(chunk)
+                chunk = []
+                separator = ','
+        if chunk:
+            yield separator + ','.join(chunk)
+        yield end
+
+    return Response(generate(), mimetype='application/json')
+
+
+def get_bool_arg(name):
+    """Returns True if the query parameter is set to 1 or true."""
+    return request.args.get(name, '').lower() in ('1', 'true')
+
+
+def is_msgpack_request():
+    """Returns True if the request body is MessagePack instead of JSON."""
+    return request.mimetype in msgpack_stream.MIMETYPES
+
+
 @api_bp.route("/submit", methods=["POST"])
 @crossdomain()
 @ip_filter
+@rate_limit.limit_submits
+@metrics.REQUEST_LATENCY.labels(endpoint="submit").time()
 def submit():
-    raw_data = request.get_data()
+    max_body_size = current_app.config["MAX_SUBMIT_BODY_SIZE"]
+    max_batch_size = current_app.config["MAX_SUBMIT_BATCH_SIZE"]
+    if request.content_length is not None and request.content_length > max_body_size:
+        raise RequestEntityTooLarge("Request body is larger than %d bytes" % max_body_size)
+
+    content_encoding = request.headers.get("Content-Encoding", "identity").lower()
+    if content_encoding == "gzip":
+        stream = compression.GzipDecompressingStream(request.stream)
+    elif content_encoding == "identity":
+        stream = request.stream
+    else:
+        raise UnsupportedMediaType("Unsupported Content-Encoding: %s" % content_encoding)
+
+    if is_msgpack_request():
+        document_type = "MessagePack"
+        recordings = msgpack_stream.iter_msgpack_array(stream, max_size=max_body_size, max_items=max_batch_size)
+    else:
+        document_type = "JSON"
+        recordings = json_stream.iter_json_array(stream, max_size=max_body_size)
+
+    # The recordings are validated and hashed while the body is read, so that
+    # invalid or oversized submissions are rejected without reading all of it.
+    # The size limit applies to the decompressed body.
+    data = []
+    json_and_hashes = []
     try:
-        data = ujson.loads(raw_data.decode("utf-8"))
+        for recording in recordings:
+            if len(data) == max_batch_size:
+                raise RequestEntityTooLarge("Cannot submit more than %d recordings at once" % max_batch_size)
+            messybrainz.validate_recordings([recording])
+            data.append(recording)
+            json_and_hashes.append(get_recording_json_and_hashes(recording))
+    except json_stream.NotAListError as e:
+        raise BadRequest(e)
     except ValueError as e:
-        raise BadRequest("Cannot parse JSON document: %s" % e)
+        raise BadRequest("Cannot parse %s document: %s" % (document_type, e))
+    except messybrainz.exceptions.BadDataException as e:
+        raise BadRequest(e)
 
-    if not isinstance(data, list):
-        raise BadRequest("submitted data must be a list")
+    rate_limit.check_listens_rate_limit(len(data))
 
+    # If ids_only is set, the submitted data isn't echoed back in the response
+    ids_only = get_bool_arg("ids_only")
     try:
-        result = messybrainz.submit_listens_and_sing_me_a_sweet_song(data)
-        return ujsonify(result)
+        if current_app.config.get("ASYNC_SUBMIT", False):
+            result = submit_queue.queue_listens(data, ids_only=ids_only, json_and_hashes=json_and_hashes)
+        else:
+            result = messybrainz.submit_listens_and_sing_me_a_sweet_song(data, ids_only=ids_only,
+                                                                         raw_payloads=not wants_msgpack(),
+                                                                         json_and_hashes=json_and_hashes)
+        return stream_payload(result["payload"], encode=dumps_recording)
     except messybrainz.exceptions.BadDataException as e:
         raise BadRequest(e)
 
 
 @api_bp.route("/<uuid:messybrainz_id>")
 @crossdomain()
+@metrics.REQUEST_LATENCY.labels(endpoint="get").time()
 def get(messybrainz_id):
+    use_msgpack = wants_msgpack()
     try:
-        data = messybrainz.load_recording(messybrainz_id)
+        data = messybrainz.load_recording(messybrainz_id, raw_payload=not use_msgpack)
     except messybrainz.exceptions.NoDataFoundException:
         raise NotFound
 
-    return Response(ujson.dumps(data), mimetype='application/json')
+    if use_msgpack:
+        return make_api_response(data)
+    return Response(dumps_recording(data), mimetype='application/json')
+
+
+@api_bp.route("/<uuid:messybrainz_id>/ids")
+@crossdomain()
+@metrics.REQUEST_LATENCY.labels(endpoint="ids").time()
+def get_ids(messybrainz_id):
+    """Returns the MessyBrainz IDs and resolved MusicBrainz IDs of a recording,
+    without its submitted data.
+    """
+    ids = messybrainz.load_recording_ids([messybrainz_id])
+    if not ids:
+        raise NotFound
+    return make_api_response(ids[str(messybrainz_id)])
+
+
+@api_bp.route("/ids", methods=["POST"])
+@crossdomain()
+@metrics.REQUEST_LATENCY.labels(endpoint="ids_batch").time()
+def get_ids_batch():
+    """Returns the MessyBrainz IDs and resolved MusicBrainz IDs of the recordings
+    whose MessyBrainz IDs are posted as a JSON or MessagePack list (at most 1000),
+    keyed by MessyBrainz ID. Recordings which don't exist are left out.
+    """
+    try:
+        if is_msgpack_request():
+            msids = msgpack.unpackb(request.get_data(), raw=False)
+        else:
+            msids = ujson.loads(request.get_data().decode("utf-8"))
+    except (ValueError, msgpack.exceptions.UnpackException) as e:
+        raise BadRequest("Cannot parse document: %s" % e)
+
+    if not isinstance(msids, list):
+        raise BadRequest("submitted data must be a list")
+    if len(msids) > MAX_IDS_LOOKUP_COUNT:
+        raise BadRequest("Cannot look up more than %d MessyBrainz IDs at once" % MAX_IDS_LOOKUP_COUNT)
+    try:
+        msids = [str(UUID(msid)) for msid in msids]
+    except (TypeError, ValueError, AttributeError):
+        raise BadRequest("submitted data must be a list of MessyBrainz IDs")
+
+    return stream_payload(messybrainz.load_recording_ids(msids))
+
+
+@api_bp.route("/meta")
+@crossdomain()
+@metrics.REQUEST_LATENCY.labels(endpoint="meta").time()
+def get_meta():
+    """Returns the MessyBrainz IDs of all the recordings with the same artist and
+    title (ignoring case) as the `artist` and `title` query parameters.
+
+    The MessyBrainz IDs are ordered and paginated with `count` (default 100,
+    at most 1000) and `after`. If there may be more results, `next` in the
+    response is the `after` value to fetch the next page with.
+    """
+    artist = request.args.get("artist")
+    title = request.args.get("title")
+    if artist is None or title is None:
+        raise BadRequest("Require artist and title query parameters")
+
+    try:
+        count = int(request.args.get("count", DEFAULT_META_LOOKUP_COUNT))
+    except ValueError:
+        raise BadRequest("count must be an integer")
+    if not 0 < count <= MAX_META_LOOKUP_COUNT:
+        raise BadRequest("count must be between 1 and %d" % MAX_META_LOOKUP_COUNT)
+
+    after = request.args.get("after")
+    if after is not None:
+        try:
+            after = str(UUID(after))
+        except ValueError:
+            raise BadRequest("after must be a MessyBrainz ID")
+
+    meta_sha256, msids = messybrainz.get_msids_from_meta(artist, title, after=after, count=count)
+    return make_api_response({
+        "meta_sha256": meta_sha256,
+        "payload": msids,
+        "next": msids[-1] if len(msids) == count else None,
+    })
 
 
 @api_bp.route("/<uuid:messybrainz_id>/aka")
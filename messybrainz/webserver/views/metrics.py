@@ -0,0 +1,16 @@
+from flask import Blueprint, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from messybrainz import metrics
+from messybrainz.webserver.decorators import metrics_ip_filter
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route("/metrics")
+@metrics_ip_filter
+def get_metrics():
+    """Exposes the server metrics in the Prometheus text format, to the clients
+    in METRICS_IP_WHITELIST only.
+    """
+    return Response(generate_latest(metrics.get_registry()), mimetype=CONTENT_TYPE_LATEST)
@@ -1,8 +1,191 @@
 
+import gzip
+import json
+import uuid
+
+from flask import url_for
+from messybrainz.db.data import RawJSON
+from messybrainz.db.testing import DatabaseTestCase
+from messybrainz.webserver import msgpack_stream
 from messybrainz.webserver.testing import ServerTestCase
+from messybrainz.webserver.views import api
 
 
 class APIViewsTestCase(ServerTestCase):
 
-    # TODO: Don't be lazy and write some tests!
-    pass
+    def test_stream_payload(self):
+        items = [{'ids': {'recording_msid': str(i)}} for i in range(api.STREAM_CHUNK_ITEMS * 2 + 1)]
+        for payload in ([], items, {}, {item['ids']['recording_msid']: item for item in items}):
+            resp = api.stream_payload(payload)
+            self.assertDictEqual(json.loads(resp.get_data(as_text=True)), {'payload': payload})
+
+    def test_dumps_recording(self):
+        ids = {'recording_msid': '6ba092ae-aaf7-4154-b987-9eb9d05f8616'}
+        recording = {'payload': {'artist': 'Sigur Rós', 'title': 'Hoppípolla'}, 'ids': ids}
+        raw_recording = {'payload': RawJSON(json.dumps(recording['payload'])), 'ids': ids}
+        self.assertDictEqual(json.loads(api.dumps_recording(raw_recording)), recording)
+        self.assertDictEqual(json.loads(api.dumps_recording(recording)), recording)
+
+    def test_submit_not_a_list(self):
+        resp = self.client.post(url_for('api.submit'), data=json.dumps({'artist': 'Sigur Ros'}),
+                                content_type='application/json')
+        self.assert400(resp)
+
+    def test_submit_missing_keys(self):
+        resp = self.client.post(url_for('api.submit'), data=json.dumps([{'artist': 'Sigur Ros'}]),
+                                content_type='application/json')
+        self.assert400(resp)
+
+    def test_submit_unsupported_content_encoding(self):
+        resp = self.client.post(url_for('api.submit'), data=json.dumps([{'artist': 'Sigur Ros'}]),
+                                content_type='application/json', headers={'Content-Encoding': 'compress'})
+        self.assertStatus(resp, 415)
+
+    def test_submit_gzip_too_large(self):
+        recordings = [{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}] * 100
+        body = gzip.compress(json.dumps(recordings).encode('utf-8'))
+        self.app.config['MAX_SUBMIT_BODY_SIZE'] = len(body) + 1
+        resp = self.client.post(url_for('api.submit'), data=body, content_type='application/json',
+                                headers={'Content-Encoding': 'gzip'})
+        self.assertStatus(resp, 413)
+
+    def test_submit_too_large(self):
+        recordings = [{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}] * 3
+
+        self.app.config['MAX_SUBMIT_BATCH_SIZE'] = 2
+        resp = self.client.post(url_for('api.submit'), data=json.dumps(recordings),
+                                content_type='application/json')
+        self.assertStatus(resp, 413)
+
+        self.app.config['MAX_SUBMIT_BODY_SIZE'] = 10
+        resp = self.client.post(url_for('api.submit'), data=json.dumps(recordings),
+                                content_type='application/json')
+        self.assertStatus(resp, 413)
+
+    def test_submit_msgpack_not_a_list(self):
+        resp = self.client.post(url_for('api.submit'), data=msgpack_stream.packb({'artist': 'Sigur Ros'}),
+                                content_type=msgpack_stream.MIMETYPE)
+        self.assert400(resp)
+
+    def test_submit_msgpack_too_large(self):
+        recordings = [{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}] * 3
+        self.app.config['MAX_SUBMIT_BATCH_SIZE'] = 2
+        resp = self.client.post(url_for('api.submit'), data=msgpack_stream.packb(recordings),
+                                content_type=msgpack_stream.MIMETYPE)
+        self.assertStatus(resp, 413)
+
+    def test_submit_ip_filter(self):
+        self.app.config['IP_FILTER_ON'] = True
+        self.app.config['BEHIND_GATEWAY'] = True
+        self.app.config['REMOTE_ADDR_HEADER'] = 'X-MB-Remote-Addr'
+        self.app.config['IP_WHITELIST'] = ['10.1.0.0/16']
+        resp = self.client.post(url_for('api.submit'), data=json.dumps({'artist': 'Sigur Ros'}),
+                                content_type='application/json', headers={'X-MB-Remote-Addr': '10.2.0.1'})
+        self.assert403(resp)
+
+        # A replaced whitelist is compiled again
+        self.app.config['IP_WHITELIST'] = ['10.2.0.0/16']
+        resp = self.client.post(url_for('api.submit'), data=json.dumps({'artist': 'Sigur Ros'}),
+                                content_type='application/json', headers={'X-MB-Remote-Addr': '10.2.0.1'})
+        self.assert400(resp)
+
+    def test_submit_invalid_values(self):
+        for body in ('[{"artist": "Sigur Ros\\u0000", "title": "Hoppipolla"}]',
+                     '[{"artist": "Sigur Ros", "title": "Hoppipolla", "duration": NaN}]',
+                     '[{"artist": "Sigur Ros", "title": "Hoppipolla", "duration": 1e999}]'):
+            resp = self.client.post(url_for('api.submit'), data=body, content_type='application/json')
+            self.assert400(resp)
+
+    def test_ids_batch_not_a_list(self):
+        resp = self.client.post(url_for('api.get_ids_batch'), data=json.dumps({'msid': str(uuid.uuid4())}),
+                                content_type='application/json')
+        self.assert400(resp)
+
+    def test_ids_batch_invalid_msid(self):
+        for msids in (['notauuid'], [str(uuid.uuid4()), 1], [None]):
+            resp = self.client.post(url_for('api.get_ids_batch'), data=json.dumps(msids),
+                                    content_type='application/json')
+            self.assert400(resp)
+
+    def test_ids_batch_too_many(self):
+        msids = [str(uuid.uuid4()) for _ in range(api.MAX_IDS_LOOKUP_COUNT + 1)]
+        resp = self.client.post(url_for('api.get_ids_batch'), data=json.dumps(msids),
+                                content_type='application/json')
+        self.assert400(resp)
+
+    def test_meta_missing_title(self):
+        resp = self.client.get(url_for('api.get_meta'), query_string={'artist': 'Sigur Ros'})
+        self.assert400(resp)
+
+    def test_meta_invalid_count(self):
+        for count in ('0', '1001', 'abc'):
+            resp = self.client.get(url_for('api.get_meta'),
+                                   query_string={'artist': 'Sigur Ros', 'title': 'Hoppipolla', 'count': count})
+            self.assert400(resp)
+
+    def test_meta_invalid_after(self):
+        resp = self.client.get(url_for('api.get_meta'),
+                               query_string={'artist': 'Sigur Ros', 'title': 'Hoppipolla', 'after': 'notauuid'})
+        self.assert400(resp)
+
+
+class APIDatabaseViewsTestCase(ServerTestCase, DatabaseTestCase):
+
+    def submit(self, recordings):
+        resp = self.client.post(url_for('api.submit'), data=json.dumps(recordings),
+                                content_type='application/json')
+        self.assert200(resp)
+        return [recording['ids']['recording_msid'] for recording in resp.json['payload']]
+
+    def test_meta_next(self):
+        msids = sorted(self.submit([{'artist': 'Sigur Ros', 'title': 'Hoppipolla'},
+                                    {'artist': 'sigur ros', 'title': 'HOPPIPOLLA'}]))
+
+        resp = self.client.get(url_for('api.get_meta'),
+                               query_string={'artist': 'Sigur Ros', 'title': 'Hoppipolla', 'count': 1})
+        self.assert200(resp)
+        self.assertListEqual(resp.json['payload'], msids[:1])
+        self.assertEqual(resp.json['next'], msids[0])
+
+        resp = self.client.get(url_for('api.get_meta'),
+                               query_string={'artist': 'Sigur Ros', 'title': 'Hoppipolla',
+                                             'count': 1, 'after': resp.json['next']})
+        self.assert200(resp)
+        self.assertListEqual(resp.json['payload'], msids[1:])
+        self.assertEqual(resp.json['next'], msids[1])
+
+        resp = self.client.get(url_for('api.get_meta'),
+                               query_string={'artist': 'Sigur Ros', 'title': 'Hoppipolla',
+                                             'count': 1, 'after': resp.json['next']})
+        self.assert200(resp)
+        self.assertListEqual(resp.json['payload'], [])
+        self.assertIsNone(resp.json['next'])
+
+    def test_ids(self):
+        msid = self.submit([{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}])[0]
+        resp = self.client.get(url_for('api.get_ids', messybrainz_id=msid))
+        self.assert200(resp)
+        self.assertEqual(resp.json['recording_msid'], msid)
+        self.assertNotIn('payload', resp.json)
+
+    def test_ids_unknown_msid(self):
+        resp = self.client.get(url_for('api.get_ids', messybrainz_id=uuid.uuid4()))
+        self.assert404(resp)
+
+    def test_ids_batch(self):
+        msids = self.submit([{'artist': 'Sigur Ros', 'title': 'Hoppipolla'},
+                             {'artist': 'Sigur Ros', 'title': 'Glosoli'}])
+        unknown_msid = str(uuid.uuid4())
+        resp = self.client.post(url_for('api.get_ids_batch'), data=json.dumps(msids + [unknown_msid]),
+                                content_type='application/json')
+        self.assert200(resp)
+        self.assertSetEqual(set(resp.json['payload']), set(msids))
+        for msid in msids:
+            self.assertEqual(resp.json['payload'][msid]['recording_msid'], msid)
+
+    def test_ids_batch_msgpack(self):
+        msids = self.submit([{'artist': 'Sigur Ros', 'title': 'Hoppipolla'}])
+        resp = self.client.post(url_for('api.get_ids_batch'), data=msgpack_stream.packb(msids),
+                                content_type=msgpack_stream.MIMETYPE)
+        self.assert200(resp)
+        self.assertListEqual(list(resp.json['payload']), msids)
@@ -0,0 +1,29 @@
+from flask import url_for
+from messybrainz.webserver.testing import ServerTestCase
+
+
+class MetricsViewsTestCase(ServerTestCase):
+
+    def test_metrics(self):
+        resp = self.client.get(url_for('metrics.get_metrics'))
+        self.assert200(resp)
+        self.assertIn('messybrainz_request_latency_seconds', resp.data.decode('utf-8'))
+
+    def test_metrics_ip_whitelist(self):
+        resp = self.client.get(url_for('metrics.get_metrics'), environ_base={'REMOTE_ADDR': '203.0.113.1'})
+        self.assert403(resp)
+
+        # A replaced whitelist is compiled again
+        self.app.config['METRICS_IP_WHITELIST'] = ['203.0.113.0/24']
+        resp = self.client.get(url_for('metrics.get_metrics'), environ_base={'REMOTE_ADDR': '203.0.113.1'})
+        self.assert200(resp)
+        resp = self.client.get(url_for('metrics.get_metrics'))
+        self.assert403(resp)
+
+    def test_metrics_ip_whitelist_behind_gateway(self):
+        self.app.config['BEHIND_GATEWAY'] = True
+        self.app.config['REMOTE_ADDR_HEADER'] = 'X-MB-Remote-Addr'
+        resp = self.client.get(url_for('metrics.get_metrics'), headers={'X-MB-Remote-Addr': '203.0.113.1'})
+        self.assert403(resp)
+        resp = self.client.get(url_for('metrics.get_metrics'), headers={'X-MB-Remote-Addr': '10.2.0.1'})
+        self.assert200(resp)
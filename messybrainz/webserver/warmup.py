@@ -0,0 +1,109 @@
+""" Warmup of the app before uwsgi forks its workers.
+
+uwsgi creates the app once in the master process and forks the workers
+from it. Work done here is done once and shared by all the workers, where
+they would otherwise each do it again on their first requests: the modules
+used by the API are imported, which also builds the module level text()
+queries of messybrainz.db.data, and the templates are compiled.
+
+After the warmup, the objects which exist are moved out of the reach of the
+garbage collector with gc.freeze() (Python 3.7+), so that collections in the
+workers don't write to their memory pages, which would copy them into each
+worker. On Python 3.6, which the production image uses, this step is skipped
+and the workers get no memory sharing benefit from it.
+
+No connection to the database or Redis must be opened before the fork, as
+the workers would inherit its socket. The connections are instead primed in
+each worker once it has been forked, see prime_connections.
+"""
+import gc
+import importlib
+import logging
+
+import redis
+import sqlalchemy.exc
+from sqlalchemy import text
+
+from messybrainz import db
+
+
+# Modules imported by the API views, some of them lazily
+PRELOAD_MODULES = (
+    "messybrainz.db.data",
+    "messybrainz.submit_queue",
+    "messybrainz.webserver.views.api",
+    "messybrainz.webserver.rate_limit",
+    "messybrainz.webserver.json_stream",
+    "messybrainz.webserver.msgpack_stream",
+    "messybrainz.webserver.compression",
+)
+
+# Pages requested during the warmup. They must not use the database or Redis,
+# the home page only renders a static template.
+WARMUP_PATHS = ("/",)
+
+_PING = text("SELECT 1")
+
+
+class _NoDatabase(object):
+    """ Stands in for the database engine during the warmup requests."""
+
+    def __getattr__(self, name):
+        raise RuntimeError("The warmup requests must not use the database")
+
+
+def warm_up(app):
+    """ Imports the modules used by the API, compiles all the templates and requests
+        the pages in WARMUP_PATHS, which sets up the parts of Flask and Jinja which
+        are only set up on first use.
+
+    Raises:
+        RuntimeError: if a warmup request uses the database
+    """
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
+
+    # The engine is replaced during the requests, so that a page which uses the
+    # database fails here instead of opening a connection that the workers inherit
+    engine, db.engine = db.engine, _NoDatabase()
+    try:
+        with app.test_client() as client:
+            for path in WARMUP_PATHS:
+                response = client.get(path)
+                if response.status_code != 200:
+                    raise RuntimeError("Warmup request to %s failed with status %d" % (path, response.status_code))
+    finally:
+        db.engine = engine
+
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+
+def prime_connections():
+    """ Connects to the database and to the Redis servers used by the API in a newly
+        forked worker, so that its first requests don't wait for it. The database
+        engine uses NullPool, so its connection isn't kept, but the engine's first
+        connection, which detects the server version and settings, is made here.
+        Errors are logged, the worker still starts.
+    """
+    from messybrainz import submit_queue
+    from messybrainz.webserver import rate_limit
+
+    logger = logging.getLogger(__name__)
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(_PING)
+    except sqlalchemy.exc.SQLAlchemyError:
+        logger.error("Cannot connect to the database after fork", exc_info=True)
+
+    for redis_connection in (submit_queue.redis_connection, rate_limit.redis_connection):
+        if redis_connection is None:
+            continue
+        try:
+            redis_connection.ping()
+        except redis.exceptions.RedisError:
+            logger.error("Cannot connect to Redis after fork", exc_info=True)
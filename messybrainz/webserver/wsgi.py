@@ -0,0 +1,22 @@
+""" The WSGI application, as loaded by uwsgi (see docker/prod/uwsgi/uwsgi.ini).
+
+The app is created when this module is imported rather than when
+messybrainz.webserver is, so that manage.py commands and tests which only
+need create_app don't build an app they never use.
+
+When the app is warmed up (WARMUP_APP), each uwsgi worker connects to the
+database and Redis as soon as it has been forked.
+"""
+from messybrainz.webserver import create_app
+
+application = create_app()
+
+try:
+    import uwsgidecorators
+except ImportError:
+    # Not running under uwsgi
+    uwsgidecorators = None
+
+if uwsgidecorators is not None and application.config.get("WARMUP_APP", False):
+    from messybrainz.webserver.warmup import prime_connections
+    uwsgidecorators.postfork(prime_connections)